@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# MIT license
+#
+# Copyright (C) 2018 by XESS Corporation / Hildo Guillardi Júnior
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Benchmark of the debug messages cost at the default (WARNING) verbosity.
+
+   Compare the messages formatted before the level check (the old way of
+   the scrape and grouping code) against the deferred `%s` arguments and
+   `LazyLog()` wrappers. Run from the repository root with:
+   `python benchmarks/bench_logging.py [NUM_CALLS]`
+'''
+
+from __future__ import print_function
+import os, sys
+import timeit
+import logging
+# Use the KiCost of this repository even if it is not installed.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kicost.global_vars import logger, LazyLog, DEBUG_OBSESSIVE, DEBUG_DETAILED
+from kicost.eda_tools.references import order_refs
+from kicost.eda_tools.eda_tools import manf_code_qtypart
+
+
+def bench(name, eager, lazy, number):
+    t_eager = timeit.timeit(eager, number=number)
+    t_lazy = timeit.timeit(lazy, number=number)
+    print('{:<32} eager {:8.3f}us  lazy {:8.3f}us  ({:.1f}x)'.format(
+            name, 1e6*t_eager/number, 1e6*t_lazy/number, t_eager/t_lazy))
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+
+    refs = ['C{}'.format(i) for i in range(1, 40)] + ['R{}'.format(i) for i in range(1, 20)]
+    fields = {'manf#': 'GRM188R71H104KA93D', 'manf': 'Murata', 'value': '100nF',
+              'footprint': 'Capacitors_SMD:C_0603', 'desc': 'Ceramic capacitor'}
+    name = 'digikey'
+    pn = 'GRM188R71H104KA93D'
+
+    print('Logger level: {}, {} calls each.'.format(
+            logging.getLevelName(logger.getEffectiveLevel()), number))
+
+    # `distributor.get_part_html_tree()`.
+    bench('get_part_html_tree() refs',
+        lambda: logger.log(DEBUG_OBSESSIVE, 'Looking in {} by {}:'.format(name, order_refs(refs, True))),
+        lambda: logger.log(DEBUG_OBSESSIVE, 'Looking in %s by %s:', name, LazyLog(order_refs, refs, True)),
+        number)
+    # Distributor modules `dist_get_part_html_tree()`.
+    bench('dist_get_part_html_tree() misc',
+        lambda: logger.log(DEBUG_OBSESSIVE, 'No HTML page for {} from {}'.format(pn, name)),
+        lambda: logger.log(DEBUG_OBSESSIVE, 'No HTML page for %s from %s', pn, name),
+        number)
+    # `eda_tools.subpartqty_split()`.
+    bench('subpartqty_split() fields',
+        lambda: logger.log(DEBUG_DETAILED, '{} >> {}'.format('C1', fields)),
+        lambda: logger.log(DEBUG_DETAILED, '%s >> %s', 'C1', fields),
+        number)
+    # `eda_tools.manf_code_qtypart()`, the whole function.
+    subpart = '2/3:' + pn
+    bench('manf_code_qtypart()',
+        lambda: (manf_code_qtypart(subpart),
+                 logger.log(DEBUG_OBSESSIVE, 'part/qty>> {}\t\tpart>>{}\tqty>>{}'.format(subpart, pn, '2/3'))),
+        lambda: manf_code_qtypart(subpart),
+        number)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# MIT license
+#
+# Copyright (C) 2018 by XESS Corporation / Hildo Guillardi Júnior
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Benchmark of the purchase order formulas, array formulas against `static_order`.
+
+   A synthetic BOM with scraped data of all the distributors is written in
+   both modes. It is reported the creation time, the file size and the cells
+   read by the order formulas in a recalculation. If LibreOffice (`soffice`)
+   is found, it is also timed the load and recalculation of each spreadsheet
+   (a conversion to CSV). Run from the repository root with:
+   `python benchmarks/bench_order.py [NUM_PARTS]`
+'''
+
+from __future__ import print_function
+import os, sys
+import re
+import time
+import shutil
+import tempfile
+import subprocess
+import zipfile
+# Use the KiCost of this repository even if it is not installed.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kicost.spreadsheet import create_spreadsheet
+from bench_spreadsheet import synthetic_parts
+
+
+def order_cells_read(filename):
+    '''Cells read by the order formulas, each range counted by its size.'''
+    with zipfile.ZipFile(filename) as xlsx:
+        sheet = xlsx.read('xl/worksheets/sheet1.xml').decode('utf-8')
+    cells = 0
+    for formula in re.findall('<f[^>]*>([^<]*)</f>', sheet):
+        if 'CONCATENATE' not in formula and 'TEXT(' not in formula and '&amp;' not in formula:
+            continue
+        for r1, r2 in re.findall(r'\$?[A-Z]+\$?(\d+):\$?[A-Z]+\$?(\d+)', formula):
+            cells += int(r2) - int(r1) + 1
+        cells += len(re.findall(r'(?<![:\w$])\$?[A-Z]+\$?\d+(?![:\d])', formula))
+    return cells
+
+
+def bench(parts, static_order, out_dir):
+    prj_info = [{'title': 'Bench', 'company': 'KiCost', 'date': '2018-01-01'}]
+    filename = os.path.join(out_dir, 'static.xlsx' if static_order else 'array.xlsx')
+    start = time.time()
+    create_spreadsheet(parts, prj_info, filename, True, [], '', False, static_order)
+    elapsed = time.time() - start
+    print('static_order={!s:<5}  create {:7.2f}s  size {:7.1f}kB  order cells read {:>12d}'.format(
+            static_order, elapsed, os.path.getsize(filename) / 1024.0, order_cells_read(filename)))
+    soffice = shutil.which('soffice') or shutil.which('libreoffice')
+    if soffice:
+        start = time.time()
+        subprocess.call([soffice, '--headless', '--convert-to', 'csv',
+                         '--outdir', out_dir, filename],
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        print('{:20}LibreOffice open/recalc {:7.2f}s'.format('', time.time() - start))
+
+
+def main():
+    num_parts = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    parts, dists = synthetic_parts(num_parts)
+    print('{} parts, {} distributors.'.format(num_parts, len(dists)))
+    out_dir = tempfile.mkdtemp()
+    try:
+        bench(parts, False, out_dir)
+        bench(parts, True, out_dir)
+    finally:
+        shutil.rmtree(out_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# MIT license
+#
+# Copyright (C) 2018 by XESS Corporation / Hildo Guillardi Júnior
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Benchmark of the price breaks, inline in each unit price formula or in a table.
+
+   A synthetic BOM with scraped data of all the distributors is written with
+   the price breaks inline (the default), in the hidden `PriceBreaks` worksheet
+   (`price_table`) and also without the price break comments. It is reported
+   the creation time and the file size. Run from the repository root with:
+   `python benchmarks/bench_price_table.py [NUM_PARTS]`
+'''
+
+from __future__ import print_function
+import os, sys
+import time
+import tempfile
+# Use the KiCost of this repository even if it is not installed.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kicost.spreadsheet import create_spreadsheet
+from bench_spreadsheet import synthetic_parts
+
+
+def bench(parts, price_table, price_comments):
+    prj_info = [{'title': 'Bench', 'company': 'KiCost', 'date': '2018-01-01'}]
+    fd, filename = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        start = time.time()
+        create_spreadsheet(parts, prj_info, filename, True, [], '', False, False,
+                           price_table, price_comments)
+        elapsed = time.time() - start
+        size = os.path.getsize(filename)
+    finally:
+        os.remove(filename)
+    print('price_table={!s:<5} price_comments={!s:<5}  {:7.2f}s  size {:8.1f}kB'.format(
+            price_table, price_comments, elapsed, size / 1024.0))
+
+
+def main():
+    num_parts = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    parts, dists = synthetic_parts(num_parts)
+    print('{} parts, {} distributors.'.format(num_parts, len(dists)))
+    bench(parts, False, True)
+    bench(parts, True, True)
+    bench(parts, True, False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# MIT license
+#
+# Copyright (C) 2018 by XESS Corporation / Hildo Guillardi Júnior
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Benchmark of the spreadsheet creation time and peak memory.
+
+   A synthetic BOM with scraped data of all the distributors is written with
+   and without the xlsxwriter `constant_memory` mode. Run from the repository
+   root with: `python benchmarks/bench_spreadsheet.py [NUM_PARTS]`
+   (Python 3, it uses `tracemalloc`).
+'''
+
+from __future__ import print_function
+import os, sys
+import time
+import tempfile
+import tracemalloc
+# Use the KiCost of this repository even if it is not installed.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kicost.distributors.global_vars import distributor_dict
+from kicost.eda_tools.eda_tools import IdenticalComponents
+from kicost.spreadsheet import create_spreadsheet
+
+
+def synthetic_parts(num_parts):
+    dists = list(distributor_dict.keys())
+    parts = []
+    for i in range(num_parts):
+        part = IdenticalComponents()
+        part.refs = ['R{}'.format(i+1)]
+        part.fields = {'value': '{}k'.format(i % 100), 'footprint': 'R_0603',
+                       'manf': 'Yageo', 'manf#': 'RC0603FR-07{}KL'.format(i)}
+        for j, dist in enumerate(dists):
+            part.set_dist_data(dist, '{}-{}'.format(dist, i), 'https://{}/{}'.format(dist, i),
+                {1: 0.1 + j/100.0, 10: 0.05, 100: 0.01}, 1000 + i, {'value': part.fields['value']})
+        parts.append(part)
+    return parts, dists
+
+
+def bench(parts, constant_memory):
+    prj_info = [{'title': 'Bench', 'company': 'KiCost', 'date': '2018-01-01'}]
+    fd, filename = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        tracemalloc.start()
+        start = time.time()
+        create_spreadsheet(parts, prj_info, filename, True, [], '', constant_memory)
+        elapsed = time.time() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        os.remove(filename)
+    print('constant_memory={!s:<5}  {:7.2f}s  peak {:8.1f}MB'.format(
+            constant_memory, elapsed, peak / 1024.0 / 1024.0))
+
+
+def main():
+    num_parts = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    parts, dists = synthetic_parts(num_parts)
+    print('{} parts, {} distributors.'.format(num_parts, len(dists)))
+    bench(parts, False)
+    bench(parts, True)
+
+
+if __name__ == '__main__':
+    main()
@@ -31,6 +31,7 @@ standard_library.install_aliases()
 
 import argparse as ap # Command argument parser.
 import os, sys, platform
+import glob
 import logging, time
 #import inspect # To get the internal module and informations of a module/class.
 from .kicost import * # kicost core functions.
@@ -41,6 +42,15 @@ except ImportError:
          # the user just want the KiCost CLI.
 from .distributors.global_vars import distributor_dict
 from .eda_tools import eda_tool_dict
+from .eda_tools.eda_tools import BOM_ORDER
+from .spreadsheet import DEFAULT_BUILD_QTY
+from .exporters import export_format, export_format_dict
+from .snapshot import DEFAULT_TTL
+from .priority import PRIORITY_KEYS, DEFAULT_PRIORITY
+from .distributors.url_cache import URL_CACHE_FILE, MISS_TTL
+from .distributors.fake_browser import BREAKER_RATIO
+from .distributors.session_cache import SESSION_CACHE_FILE, SESSION_TTL
+from .server import serve, DEFAULT_ADDRESS
 from . import __version__ # Version control by @xesscorp and collaborator.
 
 NUM_PROCESSES = 30  # Maximum number of parallel web-scraping processes.
@@ -60,6 +70,35 @@ def kicost_gui_notdependences():
     print('Or download from last version from <https://wxpython.org/pages/downloads/>')
     sys.exit(1)
 
+SWEEP_POINTS = 25 # Default number of board quantities of a `--sweep` range.
+
+def board_qtys_arg(text):
+    '''Board quantities of the `--sweep` option: a comma separated list, as
+       `1,10,50`, or a logarithmic spaced range `FIRST-LAST[/POINTS]`, as `1-10000/40`.'''
+    try:
+        if '-' not in text:
+            qtys = [int(q) for q in text.split(',')]
+        else:
+            first, last = text.split('/')[0].split('-')
+            first, last = int(first), int(last)
+            points = int(text.split('/')[1]) if '/' in text else SWEEP_POINTS
+            qtys = [int(round(first * (float(last) / first) ** (i / max(points - 1, 1))))
+                    for i in range(points)]
+    except (ValueError, ZeroDivisionError):
+        raise ap.ArgumentTypeError('invalid board quantities {!r}, use e.g. `1,10,50` or `1-10000/40`.'.format(text))
+    if min(qtys) < 1:
+        raise ap.ArgumentTypeError('the board quantities must be positive.')
+    return sorted(set(qtys))
+
+def priority_arg(text):
+    '''Scraping priority of the `--priority` option: a comma separated list
+       of the `PRIORITY_KEYS`, as `cost,ics`, or `bom` for the BOM order.'''
+    keys = [k.strip() for k in text.split(',') if k.strip() and k.strip() != 'bom']
+    for k in keys:
+        if k not in PRIORITY_KEYS:
+            raise ap.ArgumentTypeError('invalid priority {!r}, use a list of {} or `bom`.'.format(k, ', '.join(PRIORITY_KEYS)))
+    return keys
+
 ###############################################################################
 # Command-line interface.
 ###############################################################################
@@ -81,6 +120,9 @@ def main():
                         type=str,
                         metavar='FILE.XLSX',
                         help='Generated cost spreadsheet.')
+    parser.add_argument('--format',
+                        choices=['xlsx'] + sorted(export_format_dict.keys()),
+                        help='Output format, by default given by the output file extension (XLSX if not known). The CSV, JSON, JSON-lines and Parquet (needs PyArrow) formats have the grouped parts and their distributors pricing, without the spreadsheet formulas and formatting.')
     parser.add_argument('-f', '--fields',
                         nargs='+',
                         type=str,
@@ -94,6 +136,14 @@ def main():
                         type=str,
                         default=' ', # Default variant is a space.
                         help='schematic variant name filter.')
+    parser.add_argument('--multi_variant', '--multi-variant',
+                        nargs='?',
+                        choices=['sheets', 'files'],
+                        const='sheets',
+                        help='Cost each one of the `--variant` names, reading the BOM files and scraping the parts of all of them at once, in one worksheet by variant (`sheets`, default) or in one output file by variant (`files`).')
+    parser.add_argument('--batch',
+                        action='store_true',
+                        help='Cost each BOM file apart, in one output file by BOM (with its name, in the `--output` folder or in the folder of the BOM), reading the BOM files and scraping the parts of all of them at once. The `--input` may be folders (of XML and CSV files) and file patterns, as `boms/*.xml`.')
     parser.add_argument('-w', '--overwrite',
                         action='store_true',
                         help='Allow overwriting of an existing spreadsheet.')
@@ -142,6 +192,73 @@ def main():
     parser.add_argument('--no_collapse',
                         action='store_true',
                         help='Do not collapse the part references in the spreadsheet.')
+    parser.add_argument('--bom_order',
+                        nargs='?', type=str, default=BOM_ORDER,
+                        metavar='ORDER',
+                        help='Comma separated designators order of the parts in the spreadsheet, the not listed ones go at the end alphabetically. Default: `{}`.'.format(BOM_ORDER))
+    parser.add_argument('--constant_memory',
+                        action='store_true',
+                        help='Write the spreadsheet rows directly to the file, using less memory for big BOMs.')
+    parser.add_argument('--static_order',
+                        action='store_true',
+                        help='Choose the part of each purchase order line when creating the spreadsheet, instead of using array formulas that search all the parts. Much faster to recalculate on big BOMs, but the lines of the parts not purchased stay blank.')
+    parser.add_argument('--price_table',
+                        action='store_true',
+                        help='Store the price breaks of the parts in a hidden worksheet, instead of repeating them in each unit price formula.')
+    parser.add_argument('--no_price_comments',
+                        action='store_true',
+                        help='Do not add the price breaks as comments of the unit price cells, faster to create the spreadsheet of big BOMs.')
+    parser.add_argument('--board_qty',
+                        nargs='?', type=int, default=DEFAULT_BUILD_QTY,
+                        metavar='QTY',
+                        help='Quantity of boards to build, of each project. Default: `{}`.'.format(DEFAULT_BUILD_QTY))
+    parser.add_argument('--optimize',
+                        action='store_true',
+                        help='Print the cheapest purchase (distributor and quantity) of each part to build `--board_qty` boards. Needs NumPy.')
+    parser.add_argument('--fill_purch',
+                        action='store_true',
+                        help='Fill the cheapest purchase of each part in the spreadsheet purchase columns. Needs NumPy.')
+    parser.add_argument('--sweep',
+                        nargs='?', type=board_qtys_arg, default=None,
+                        metavar='QTYS',
+                        help='Compute the cost of the cheapest purchase for many board quantities, a list as `1,10,50` or a logarithmic range as `1-10000/40` (default {} points), added to the spreadsheet and in a "_sweep.csv" file. Needs NumPy.'.format(SWEEP_POINTS))
+    parser.add_argument('--snapshot',
+                        nargs='?', type=str, default=None,
+                        metavar='FILE.JSONL',
+                        help='Write the grouped parts and their scraped data to a snapshot file, to create the spreadsheet again by `--from_snapshot`.')
+    parser.add_argument('--from_snapshot', '--from-snapshot',
+                        nargs='?', type=str, default=None,
+                        metavar='FILE.JSONL',
+                        help='Create the spreadsheet from a snapshot file instead of reading BOM files and scraping the distributors.')
+    parser.add_argument('--incremental',
+                        nargs='?',
+                        type=str,
+                        const='',
+                        metavar='FILE.JSONL',
+                        help='Scrape just the parts changed since the previous run, reusing the data of its snapshot file, that is updated (default, the output file name with "_snapshot.jsonl").')
+    parser.add_argument('--ttl',
+                        type=float,
+                        default=DEFAULT_TTL,
+                        metavar='HOURS',
+                        help='Hours that the data of the `--incremental` snapshot is reused, the older parts are scraped again (default {}).'.format(DEFAULT_TTL))
+    parser.add_argument('--priority',
+                        type=priority_arg,
+                        default=DEFAULT_PRIORITY,
+                        metavar='KEYS',
+                        help='Order to scrape the parts, a comma separated list of: `uncached` (parts without data of the `--incremental` snapshot first), `cost` (highest quantity times last known price first) and `ics` (integrated circuits first, passives last), or `bom` for the BOM order (default `{}`).'.format(','.join(DEFAULT_PRIORITY)))
+    parser.add_argument('--time_budget', '--time-budget',
+                        type=float,
+                        default=None,
+                        metavar='SECONDS',
+                        help='Stop the web lookups after this time, the parts left (the least important by `--priority`) get the data of the `--incremental` snapshot, even if older than `--ttl`, or no data.')
+    parser.add_argument('--checkpoint',
+                        type=str,
+                        default=None,
+                        metavar='FILE.JSONL',
+                        help='File to keep the data of each part as soon as it is scraped, removed when all the parts are scraped (default, the output file name with "_checkpoint.jsonl").')
+    parser.add_argument('--resume',
+                        action='store_true',
+                        help='Resume a run that did not finish (or stopped by `--time_budget`), scraping just the parts missing in its `--checkpoint` file.')
     parser.add_argument('-e', '--exclude',
                         nargs='+', type=str, default='',
                         metavar = 'DIST',
@@ -153,6 +270,32 @@ def main():
     parser.add_argument('--no_scrape',
                         action='store_true',
                         help='Create a spreadsheet without scraping part data from distributor websites.')
+    parser.add_argument('--url_cache',
+                        type=str,
+                        default=URL_CACHE_FILE,
+                        metavar='FILE.JSON',
+                        help='File of the product page URLs found for the part numbers, requested directly by the next runs instead of the site search (default {}).'.format(URL_CACHE_FILE))
+    parser.add_argument('--no_url_cache',
+                        action='store_true',
+                        help='Always search the parts in the distributor websites, without the URL cache.')
+    parser.add_argument('--session_cache',
+                        type=str,
+                        default=SESSION_CACHE_FILE,
+                        metavar='FILE.JSON',
+                        help='File of the distributors web sessions (cookies and localized sites), reused by the next runs for {} hours (default {}).'.format(SESSION_TTL, SESSION_CACHE_FILE))
+    parser.add_argument('--no_session_cache',
+                        action='store_true',
+                        help='Start new web sessions with the distributors, without the session cache.')
+    parser.add_argument('--miss_ttl',
+                        type=float,
+                        default=MISS_TTL,
+                        metavar='HOURS',
+                        help='Hours that the parts not found at a distributor are not searched again (default {}).'.format(MISS_TTL))
+    parser.add_argument('--breaker_ratio',
+                        type=float,
+                        default=BREAKER_RATIO,
+                        metavar='RATIO',
+                        help='Ratio of failed requests to a distributor website to stop requesting it, but a periodic probe until it recovers (default {}, 0 to never stop).'.format(BREAKER_RATIO))
     parser.add_argument('-rt', '--retries',
                         nargs='?',
                         type=int,
@@ -168,6 +311,12 @@ def main():
                         type=str,
                         default='USD',
                         help='Define the priority locale/country and currency on the scrape. Use the ISO4217 for currency and ISO3166:2 for country. Input e.g.: `US`, `USD`, `US-USD` or `EUR-US`. Currency is priritized over the locale/country. If give country with more than one currency, it will be chosen, in the sequence, `USD`, `EUR` or alphabetical order. Default: `USD`.')
+    parser.add_argument('--serve',
+                        nargs='?',
+                        type=str,
+                        const=DEFAULT_ADDRESS,
+                        metavar='[HOST:]PORT',
+                        help='Run as a service, costing the BOMs posted to a local HTTP/JSON API (see `server.py`) with the scraping options given, keeping the distributors sessions and caches between them (default address {}).'.format(DEFAULT_ADDRESS))
     parser.add_argument('--guide',
                         nargs='+',
                         type=str,
@@ -197,19 +346,106 @@ def main():
         print('EDA supported list:', *sorted(list(eda_tool_dict.keys())))
         return
 
+    # Set number of processes to use for web scraping.
+    if args.serial:
+        num_processes = 1
+    else:
+        num_processes = args.num_processes
+
+    # Remove all the distributor from the list for not scrape any web site.
+    if args.no_scrape:
+        dist_list = None
+    else:
+        if not args.include:
+            dist_list = list(distributor_dict.keys())
+        else:
+            dist_list = args.include
+        for d in args.exclude:
+            dist_list.remove(d)
+
+    if args.batch:
+        # Expand the folders and file patterns to the BOM files.
+        if args.input == None:
+            logger.critical('The --batch mode needs the BOM files (--input).')
+            sys.exit(1)
+        files_input = []
+        for name in args.input:
+            if os.path.isdir(name):
+                files_input += sorted(glob.glob(os.path.join(name, '*.xml'))
+                                      + glob.glob(os.path.join(name, '*.csv')))
+            elif any(c in name for c in '*?['):
+                files_input += sorted(glob.glob(name))
+            else:
+                files_input.append(name)
+        if not files_input:
+            logger.critical('No BOM file found in {}.'.format(' '.join(args.input)))
+            sys.exit(1)
+        args.input = files_input
+        # The EDA tool of each BOM file, by its extension.
+        eda_tool = args.eda_tool[0] if isinstance(args.eda_tool, list) else args.eda_tool
+        args.eda_tool = ['csv' if os.path.splitext(f)[1].lower() == '.csv' else eda_tool
+                         for f in args.input]
+
+    if args.serve:
+        # Run the jobs asked by HTTP, with these scraping and caches options.
+        serve(args.serve, defaults=dict(dist_list=dist_list, num_processes=num_processes,
+            scrape_retries=args.retries, throttling_delay=args.throttling_delay,
+            local_currency=args.currency, collapse_refs=not args.no_collapse,
+            bom_order=args.bom_order, board_qty=args.board_qty,
+            url_cache_file=None if args.no_url_cache else args.url_cache,
+            miss_ttl=args.miss_ttl, breaker_ratio=args.breaker_ratio or None,
+            session_cache_file=None if args.no_session_cache else args.session_cache))
+        return
+
+    # Output format, by the option or the output file extension.
+    if args.format == None:
+        args.format = export_format(args.output or '') or 'xlsx'
+    if args.format == 'xlsx':
+        out_exts = ['.xlsx']
+    else:
+        out_exts = export_format_dict[args.format]['extensions']
+
+    if args.batch:
+        # The output is the folder of the output files, of the BOM names.
+        out_filenames = batch_filenames(args.input, args.output, out_exts[0])
+        if args.output and not os.path.isdir(args.output):
+            os.makedirs(args.output)
+        if args.incremental == '':
+            # The snapshots of the incremental runs are kept with the output files.
+            args.incremental = os.path.join(args.output or os.path.dirname(args.input[0]),
+                                            'batch_snapshot.jsonl')
+        if args.checkpoint == None:
+            args.checkpoint = os.path.join(args.output or os.path.dirname(args.input[0]),
+                                           'batch_checkpoint.jsonl')
+        for filename in out_filenames:
+            if os.path.isfile(filename) and not args.overwrite:
+                logger.critical('''Output file {} already exists! Use the
+                    --overwrite option to replace it.'''.format(filename))
+                sys.exit(1)
+
     # Set up spreadsheet output file.
-    if args.output == None:
+    elif args.output == None:
         # If no output file is given...
         if args.input != None:
             # Send output to spreadsheet with name of input file.
             # Compose a name with the multiple BOM input file names.
-            args.output = output_filename(args.input)
+            args.output = os.path.splitext(output_filename(args.input))[0] + out_exts[0]
+        elif args.from_snapshot != None:
+            # Send output to spreadsheet with name of the snapshot file.
+            args.output = os.path.splitext(args.from_snapshot)[0] + out_exts[0]
         else:
             # Send output to spreadsheet with name of this application.
-            args.output = os.path.splitext(sys.argv[0])[0] + '.xlsx'
-    else:
-        # Output file was given. Make sure it has spreadsheet extension.
-        args.output = os.path.splitext(args.output)[0] + '.xlsx'
+            args.output = os.path.splitext(sys.argv[0])[0] + out_exts[0]
+    elif os.path.splitext(args.output)[1].lower() not in out_exts:
+        # Output file was given. Make sure it has the output format extension.
+        args.output = os.path.splitext(args.output)[0] + out_exts[0]
+
+    if args.incremental == '':
+        # The snapshot of the incremental runs is kept with the output file.
+        args.incremental = os.path.splitext(args.output)[0] + '_snapshot.jsonl'
+    if args.checkpoint == None:
+        # As the checkpoint of the scraping.
+        args.checkpoint = os.path.splitext(args.output)[0] + '_checkpoint.jsonl'
 
     # Call the KiCost interface to alredy run KiCost, this is just to use the
     # saved user configurations of the graphical interface.
@@ -221,7 +457,7 @@ def main():
         return
 
     # Handle case where output is going into an existing spreadsheet file.
-    if os.path.isfile(args.output):
+    if not args.batch and os.path.isfile(args.output):
         if not args.overwrite:
             logger.critical('''Output file {} already exists! Use the
                 --overwrite option to replace it.'''.format(args.output))
@@ -234,13 +470,15 @@ def main():
             kicost_gui_notdependences()
         return
 
-    if args.input == None:
+    if args.from_snapshot != None:
+        pass # The BOM files are not read.
+    elif args.input == None:
         try:
             kicost_gui() # Use the user guide if no input is given.
         except (ImportError, NameError):
             kicost_gui_notdependences()
         return
-    else:
+    elif not args.batch: # The batch BOM files have their EDA tool.
         # Otherwise get XML from the given file.
         for i in range(len(args.input)):
             # Set '.xml' as the default file extension, treating this exception
@@ -253,23 +491,6 @@ def main():
             except IndexError:
                 pass
 
-    # Set number of processes to use for web scraping.
-    if args.serial:
-        num_processes = 1
-    else:
-        num_processes = args.num_processes
-
-    # Remove all the distributor from the list for not scrape any web site.
-    if args.no_scrape:
-        dist_list = None
-    else:
-        if not args.include:
-            dist_list = list(distributor_dict.keys())
-        else:
-            dist_list = args.include
-        for d in args.exclude:
-            dist_list.remove(d)
-
     logger.log(DEBUG_OBSESSIVE, 'Started KiCost v.{} on {}({}) Python {}.{}.{}'.format(
                                               __version__,
                                               platform.platform(),
@@ -282,11 +503,23 @@ def main():
     #try:
     kicost(in_file=args.input, eda_tool_name=args.eda_tool,
         out_filename=args.output, collapse_refs=not args.no_collapse,
+        bom_order=args.bom_order,
         user_fields=args.fields, ignore_fields=args.ignore_fields,
         group_fields=args.group_fields, variant=args.variant,
         dist_list=dist_list, num_processes=num_processes,
         scrape_retries=args.retries, throttling_delay=args.throttling_delay,
-        local_currency=args.currency)
+        local_currency=args.currency, constant_memory=args.constant_memory,
+        static_order=args.static_order, price_table=args.price_table,
+        price_comments=not args.no_price_comments, board_qty=args.board_qty,
+        optimize=args.optimize, fill_purch=args.fill_purch, sweep_qtys=args.sweep,
+        snapshot=args.snapshot, from_snapshot=args.from_snapshot,
+        out_format=args.format, multi_variant=args.multi_variant,
+        incremental=args.incremental, ttl=args.ttl,
+        url_cache_file=None if args.no_url_cache else args.url_cache,
+        miss_ttl=args.miss_ttl, breaker_ratio=args.breaker_ratio or None,
+        session_cache_file=None if args.no_session_cache else args.session_cache,
+        batch=args.batch, priority=args.priority, time_budget=args.time_budget,
+        checkpoint=args.checkpoint, resume=args.resume)
     #except Exception as e:
     #    sys.exit(e)
 
@@ -32,6 +32,7 @@ from bs4 import BeautifulSoup
 import http.client # For web scraping exceptions.
 from ...global_vars import PartHtmlError
 from ...global_vars import logger, DEBUG_OVERVIEW, DEBUG_DETAILED, DEBUG_OBSESSIVE, DEBUG_HTTP_RESPONSES
+from ...global_vars import LazyLog
 
 from .. import fake_browser
 from .. import distributor
@@ -168,11 +169,11 @@ class dist_digikey(distributor.distributor):
                 # Fetch cookies for new URL.
                 self.browser.scrape_URL(url)
         except:
-            self.logger.log(DEBUG_OVERVIEW, 'Kept the last configuration {}, {} on {}.'.format(
-                    pycountry.currencies.get(alpha_3=distributor_dict['digikey']['site']['currency']).name,
-                    pycountry.countries.get(alpha_2=distributor_dict['digikey']['site']['locale']).name,
+            self.logger.log(DEBUG_OVERVIEW, 'Kept the last configuration %s, %s on %s.',
+                    LazyLog(lambda: pycountry.currencies.get(alpha_3=distributor_dict['digikey']['site']['currency']).name),
+                    LazyLog(lambda: pycountry.countries.get(alpha_2=distributor_dict['digikey']['site']['locale']).name),
                     distributor_dict[self.name]['site']['url']
-                )) # Keep the current configuration.
+                ) # Keep the current configuration.
         return
 
     def dist_get_part_num(self, html_tree):
@@ -236,13 +237,13 @@ class dist_digikey(distributor.distributor):
         try:
             html = self.browser.scrape_URL(url)
         except Exception as ex:
-            self.logger.log(DEBUG_OBSESSIVE,'No HTML page for {} from {}, ex: {}'.format(pn, self.name, type(ex).__name__))
+            self.logger.log(DEBUG_OBSESSIVE,'No HTML page for %s from %s, ex: %s', pn, self.name, type(ex).__name__)
             raise PartHtmlError
 
         # Abort if the part number isn't in the HTML somewhere.
         # (Only use the numbers and letters to compare PN to HTML.)
         if re.sub('[\W_]','',str.lower(pn)) not in re.sub('[\W_]','',str.lower(str(html))):
-            self.logger.log(DEBUG_OBSESSIVE,'No part number {} in HTML page from {}'.format(pn, self.name))
+            self.logger.log(DEBUG_OBSESSIVE,'No part number %s in HTML page from %s', pn, self.name)
             raise PartHtmlError
 
         # Use the following code if Javascript challenge pages are used to block scrapers.
@@ -258,7 +259,7 @@ class dist_digikey(distributor.distributor):
         try:
             tree = BeautifulSoup(html, 'lxml')
         except Exception:
-            self.logger.log(DEBUG_OBSESSIVE,'No HTML tree for {} from {}'.format(pn, self.name))
+            self.logger.log(DEBUG_OBSESSIVE,'No HTML tree for %s from %s', pn, self.name)
             raise PartHtmlError
 
         # If the tree contains the tag for a product page, then return it.
@@ -276,14 +277,14 @@ class dist_digikey(distributor.distributor):
                             id='additionalPackaging').find_all(
                                 'ul', class_='more-expander-item')
                     ]
-                    self.logger.log(DEBUG_OBSESSIVE,'Found {} alternate packagings for {} from {}'.format(len(ap_urls), pn, self.name))
+                    self.logger.log(DEBUG_OBSESSIVE,'Found %s alternate packagings for %s from %s', len(ap_urls), pn, self.name)
                     ap_trees_and_urls = []  # Initialize as empty in case no alternate packagings are found.
                     try:
                         ap_trees_and_urls = [self.dist_get_part_html_tree(pn, 
                                          extra_search_terms, ap_url, descend=0)
                                          for ap_url in ap_urls]
                     except Exception:
-                        self.logger.log(DEBUG_OBSESSIVE,'Failed to find alternate packagings for {} from {}'.format(pn, self.name))
+                        self.logger.log(DEBUG_OBSESSIVE,'Failed to find alternate packagings for %s from %s', pn, self.name)
 
                     # Put the main tree on the list as well and then look through
                     # the entire list for one that's non-reeled. Use this as the
@@ -309,18 +310,18 @@ class dist_digikey(distributor.distributor):
                             # and merge available quantity, using the maximum found.
                             self.merge_qty_avail(tree, ap_tree, pn)
                         except AttributeError:
-                            self.logger.log(DEBUG_OVERVIEW,'Problem merging price/qty for {} from {}'.format(pn, self.name))
+                            self.logger.log(DEBUG_OVERVIEW,'Problem merging price/qty for %s from %s', pn, self.name)
                             continue
                 except AttributeError as e:
-                    self.logger.log(DEBUG_OVERVIEW,'Problem parsing URLs from product page for {} from {}'.format(pn, self.name))
+                    self.logger.log(DEBUG_OVERVIEW,'Problem parsing URLs from product page for %s from %s', pn, self.name)
 
             return tree, url  # Return the parse tree and the URL where it came from.
 
         # If the tree is for a list of products, then examine the links to try to find the part number.
         if tree.find('table', id='productTable') is not None:
-            self.logger.log(DEBUG_OBSESSIVE,'Found product table for {} from {}'.format(pn, self.name))
+            self.logger.log(DEBUG_OBSESSIVE,'Found product table for %s from %s', pn, self.name)
             if descend <= 0:
-                self.logger.log(DEBUG_OBSESSIVE,'Passed descent limit for {} from {}'.format(pn, self.name))
+                self.logger.log(DEBUG_OBSESSIVE,'Passed descent limit for %s from %s', pn, self.name)
                 raise PartHtmlError
             else:
                 # Look for the table of products.
@@ -347,19 +348,19 @@ class dist_digikey(distributor.distributor):
                 for l in product_links:
                     if l.text == match:
                         # Get the tree for the linked-to page and return that.
-                        self.logger.log(DEBUG_OBSESSIVE,'Selecting {} from product table for {} from {}'.format(l.text.strip(), pn, self.name))
+                        self.logger.log(DEBUG_OBSESSIVE,'Selecting %s from product table for %s from %s', l.text.strip(), pn, self.name)
                         return self.dist_get_part_html_tree(pn, extra_search_terms,
                                                   url=l.get('href', ''),
                                                   descend=descend - 1)
 
         # If the HTML contains a list of part categories, then give up.
         if tree.find('form', id='keywordSearchForm') is not None:
-            self.logger.log(DEBUG_OBSESSIVE,'Found high-level part categories for {} from {}'.format(pn, self.name))
+            self.logger.log(DEBUG_OBSESSIVE,'Found high-level part categories for %s from %s', pn, self.name)
             raise PartHtmlError
 
         # I don't know what happened here, so give up.
-        self.logger.log(DEBUG_OBSESSIVE,'Unknown error for {} from {}'.format(pn, self.name))
-        self.logger.log(DEBUG_HTTP_RESPONSES,'Response was %s' % html)
+        self.logger.log(DEBUG_OBSESSIVE,'Unknown error for %s from %s', pn, self.name)
+        self.logger.log(DEBUG_HTTP_RESPONSES,'Response was %s', html)
         raise PartHtmlError
 
     def part_is_reeled(self, html_tree):
@@ -382,7 +383,7 @@ class dist_digikey(distributor.distributor):
             for tr in alt_tree.find('table', id='product-dollars').find_all('tr'):
                 insertion_point.insert_after(tr)
         except AttributeError:
-            self.logger.log(DEBUG_OVERVIEW, 'Problem merging price tiers for Digikey part {} with alternate packaging!'.format(pn))
+            self.logger.log(DEBUG_OVERVIEW, 'Problem merging price tiers for Digikey part %s with alternate packaging!', pn)
 
     def merge_qty_avail(self, main_tree, alt_tree, pn):
         '''Merge the quantities from the alternate-packaging tree into the main tree.'''
@@ -399,4 +400,4 @@ class dist_digikey(distributor.distributor):
                 insertion_point = main_tree.find('td', id='quantityAvailable').find('span', id='dkQty')
                 insertion_point.string = '{}'.format(merged_qty)
         except AttributeError:
-            self.logger.log(DEBUG_OVERVIEW, 'Problem merging available quantities for Digikey part {} with alternate packaging!'.format(pn))
+            self.logger.log(DEBUG_OVERVIEW, 'Problem merging available quantities for Digikey part %s with alternate packaging!', pn)
@@ -40,6 +40,7 @@ from ..eda_tools.eda_tools import order_refs # To better print the warnings abou
 import http.client # For web scraping exceptions.
 
 from ..global_vars import logger, DEBUG_OVERVIEW, DEBUG_DETAILED, DEBUG_OBSESSIVE # Debug configurations.
+from ..global_vars import LazyLog
 from ..global_vars import SEPRTR
 from ..global_vars import PartHtmlError
 
@@ -47,6 +48,7 @@ import os, re
 
 class distributor(object):
     start_time = time.time()
+    url_cache = None # Product page URLs of the parts looked up, see `url_cache.url_cache`.
     def __init__(self, name, domain, scrape_retries, throttle_delay):
         self.name = name
         self.scrape_retries = scrape_retries
@@ -55,8 +57,8 @@ class distributor(object):
 
         # Don't create fake_browser for "local" distributor.
         if self.domain != None:
-            self.browser = fake_browser.fake_browser \
-                (self.domain, self.logger, self.scrape_retries, throttle_delay)
+            self.browser = fake_browser.fake_browser.get \
+                (self.domain, self.logger, self.scrape_retries, throttle_delay, name)
 
     # Abstract methods, implemented in distributor specific modules.
     @staticmethod
@@ -100,7 +102,7 @@ class distributor(object):
                         currency = alpha
                 self.dist_define_locale_currency(locale, currency)
         except NotImplementedError:
-            logger.warning('No currency/country configuration for {}.'.format(self.name))
+            logger.warning('No currency/country configuration for %s.', self.name)
             pass
 
     def scrape_part(self, id, part):
@@ -151,9 +153,9 @@ class distributor(object):
         @param `str` part Part manufacture code or distributor stock code.
         @return `str` with the HTML webpage.'''
 
-        self.logger.log(DEBUG_OBSESSIVE, 'Looking in %s by %s:', self.name, order_refs(part.refs, True))
+        self.logger.log(DEBUG_OBSESSIVE, 'Looking in %s by %s:', self.name, LazyLog(order_refs, part.refs, True))
 
-        for extra_search_terms in set([part.fields.get('manf', ''), '']):
+        for extra_search_terms in self.search_plan(part.fields.get('manf', '')):
             try:
                 # Search for part information using one of the following:
                 #    1) the distributor's catalog number.
@@ -161,9 +163,9 @@ class distributor(object):
                 for key in (self.name+'#', self.name+SEPRTR+'cat#', 'manf#'):
                     if key in part.fields:
                         if part.fields[key]:
-                            self.logger.log(DEBUG_OBSESSIVE, "%s: scrape timing: %.2f" \
-                                % (self.name, time.time() - distributor.start_time))
-                            return self.dist_get_part_html_tree(part.fields[key], extra_search_terms)
+                            self.logger.log(DEBUG_OBSESSIVE, "%s: scrape timing: %.2f",
+                                self.name, time.time() - distributor.start_time)
+                            return self.lookup_part_html_tree(part.fields[key], extra_search_terms)
                 # No distributor or manufacturer number, so give up.
                 else:
                     self.page_accessed = False
@@ -175,6 +177,60 @@ class distributor(object):
                 pass
             except AttributeError:
                 break
-        self.logger.warning("Part %s not found at %s.", order_refs(part.refs, False), self.name)
+        self.logger.warning("Part %s not found at %s.", LazyLog(order_refs, part.refs, False), self.name)
         # If no HTML page was found, then return a tree for an empty page.
         return BeautifulSoup('<html></html>', 'lxml'), ''
+
+    def lookup_part_html_tree(self, pn, extra_search_terms=''):
+        '''@brief Get the HTML tree of the product page of a part number.
+
+        Request the product page URL found in a previous look up, if cached,
+        instead of the site search. An URL that no longer gives the page of
+        the part (but not a failed request) is dropped from the cache and the
+        part searched again. The searches that recently did not find the part are not repeated.
+        @param pn `str` Part number, manufacture code or distributor stock code.
+        @param extra_search_terms `str` Other terms of the search.
+        @return (html tree, url) of the part page.'''
+
+        cache = distributor.url_cache
+        if cache is None or distributor_dict[self.name]['scrape'] != 'web':
+            return self.dist_get_part_html_tree(pn, extra_search_terms)
+
+        if cache.is_missing(self.name, pn, extra_search_terms):
+            self.logger.log(DEBUG_OBSESSIVE, 'Recent search of %s at %s did not find it.', pn, self.name)
+            raise PartHtmlError
+
+        url = cache.get(self.name, pn, extra_search_terms)
+        if url:
+            failed_requests = self.browser.failed_requests
+            try:
+                self.logger.log(DEBUG_OBSESSIVE, 'Requesting %s cached for %s at %s.', url, pn, self.name)
+                return self.dist_get_part_html_tree(pn, extra_search_terms, url=url)
+            except PartHtmlError:
+                # Keep the URL if the site could not be reached, it may be still valid.
+                if self.browser.failed_requests != failed_requests:
+                    raise
+                self.logger.log(DEBUG_DETAILED, 'Cached URL %s is no longer valid for %s at %s.', url, pn, self.name)
+                cache.discard(self.name, pn, extra_search_terms)
+
+        failed_requests = self.browser.failed_requests
+        try:
+            html_tree, url = self.dist_get_part_html_tree(pn, extra_search_terms)
+        except PartHtmlError:
+            # Keep just the misses of the site search, not the failures to connect it.
+            if self.browser.failed_requests == failed_requests:
+                cache.set_missing(self.name, pn, extra_search_terms)
+                cache.count_search(self.name, extra_search_terms, False)
+            raise
+        cache.count_search(self.name, extra_search_terms, True)
+        if url:
+            cache.set(self.name, pn, extra_search_terms, url)
+        return html_tree, url
+
+    def search_plan(self, manf=''):
+        '''@brief Extra search terms to look up a part, in the order to try.
+        @param manf `str` Manufacturer name of the part.
+        @return `list` of the extra search terms.'''
+        if distributor.url_cache is None:
+            return set([manf, ''])
+        return distributor.url_cache.search_plan(self.name, manf)
@@ -27,12 +27,27 @@ __email__ = 'info@xess.com'
 import sys
 from random import choice
 import time
+from collections import deque
 
 import http.client # For web scraping exceptions.
 import requests
+from requests.adapters import HTTPAdapter
 
 from ..global_vars import DEBUG_OVERVIEW, DEBUG_DETAILED, DEBUG_OBSESSIVE, DEBUG_HTTP_HEADERS, DEBUG_HTTP_RESPONSES
 
+# Circuit breaker of each website: when `BREAKER_RATIO` of the last
+# `BREAKER_WINDOW` requests failed (after all the retries), the next requests
+# fail at once, without accessing the site, but one probe request each
+# `BREAKER_PROBE_DELAY` seconds, that closes the breaker again if successful.
+BREAKER_WINDOW = 10
+BREAKER_RATIO = 0.8
+BREAKER_PROBE_DELAY = 60
+
+# Connection pools of each browser: hosts kept (the sites may redirect to
+# others) and connections kept alive by host.
+POOL_HOSTS = 4
+POOL_SIZE = 1
+
 def get_user_agent():
     ''' The default user_agent_list comprises chrome, IE, firefox, Mozilla, opera, netscape.
       You can find more user agent strings at https://techblog.willshouse.com/2012/01/03/most-common-user-agents/.
@@ -137,10 +152,41 @@ def get_user_agent():
 
 # Open the URL, read the HTML from it, and parse it into a tree structure.
 class fake_browser:
-    def __init__(self, domain, logger, scrape_retries, throttle_delay):
+    breaker_ratio = BREAKER_RATIO # Failure ratio to trip the circuit breaker, `None` to disable it.
+    sessions = None # Sessions of the previous runs, see `session_cache.session_cache`.
+    pool_size = POOL_SIZE # Connections by host, the concurrent requests to the distributor.
+    live = None # Browsers kept by distributor name for the next runs (see `server.py`), `None` to not keep.
+
+    @classmethod
+    def get(cls, domain, logger, scrape_retries, throttle_delay, name=None):
+        '''@brief Browser of a distributor, the one kept alive by a previous run if any.
+
+        A browser kept keeps its throttling, circuit breaker and connection
+        pools, its session is restored from the `sessions` cache (if there)
+        and its request counts are the ones of the new run.
+        The parameters are the ones of the constructor.'''
+        browser = cls.live.get(name) if cls.live is not None and name else None
+        if browser is None:
+            browser = cls(domain, logger, scrape_retries, throttle_delay, name)
+            if cls.live is not None and name:
+                cls.live[name] = browser
+            return browser
+        browser.domain = domain
+        browser.logger = logger
+        browser.scrape_retries = scrape_retries
+        browser.throttle_delay = throttle_delay
+        browser.requests = browser.failed_requests = browser.skipped_requests = 0
+        # The trips are counted by job, a breaker still open is one of this job.
+        browser.breaker_trips = int(browser.breaker_open)
+        browser.cached_session = cls.sessions.get(name) if cls.sessions else None
+        browser.restored = None
+        return browser
+
+    def __init__(self, domain, logger, scrape_retries, throttle_delay, name=None):
         '''@brief fake_browser
            @param logger
            @param scrape_retries `int` Quantity of retries in case of fail.
+           @param name `str` Distributor name, to reuse its cached session.
         '''
 
         self.config_cookies = list()
@@ -151,16 +197,80 @@ class fake_browser:
         self.scrape_retries = scrape_retries
         self.logger = logger
         self.ret_url = None
+        self.requests = 0
+        self.failed_requests = 0 # Requests without any page after all the retries.
+
+        # Circuit breaker state.
+        self.last_requests_ok = deque(maxlen=BREAKER_WINDOW)
+        self.breaker_open = False
+        self.breaker_trips = 0
+        self.probe_time = 0
+        self.skipped_requests = 0
+
+        # The connection pools are kept by the new sessions, just the cookies and
+        # User-Agent are changed.
+        self.adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=self.pool_size)
+
+        # Session of a previous run to restore, instead of requesting the site.
+        self.cached_session = fake_browser.sessions.get(name) if fake_browser.sessions and name else None
+        self.restored = None # The session state restored.
 
         self.start_new_session(False)
 
-    def start_new_session(self, scrape_base_url=True):
-        self.userAgent = get_user_agent()
+    def get_state(self):
+        '''@brief State of the session, to restore it by `set_state()`.
+           @return `dict()` of JSON types.
+        '''
+        return {
+            'domain': self.domain,
+            'user_agent': self.userAgent,
+            'ret_url': self.ret_url,
+            'config_cookies': [list(c) for c in self.config_cookies],
+            'cookies': [[c.domain, c.name, c.value, c.path] for c in self.session.cookies],
+        }
 
+    def set_state(self, state):
+        '''@brief Restore a session state given by `get_state()`.'''
+        self.domain = state['domain']
+        self.ret_url = state['ret_url']
+        self.config_cookies = [tuple(c) for c in state['config_cookies']]
+        self.userAgent = state['user_agent']
+        self.session = self.new_session()
+        for domain, name, value, path in state['cookies']:
+            self.session.cookies.set(name, value, domain=domain, path=path)
+
+    def new_session(self):
+        '''@brief New `requests` session with the User-Agent, sharing the connection pools.'''
         # Use "requests" instead of "urllib" because "urllib" does not allow
         # to remove "Connection: close" header which causes problems with some servers.
-        self.session = requests.session()
-        self.session.headers["User-Agent"] = self.userAgent
+        session = requests.session()
+        session.headers["User-Agent"] = self.userAgent
+        session.headers["Accept-Encoding"] = "gzip, deflate"
+        session.headers["Connection"] = "keep-alive"
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+        return session
+
+    def connection_stats(self):
+        '''@brief Count the HTTP requests (retries included) and the connections opened.
+           @return (requests, connections) `int` of the current connection pools.
+        '''
+        pools = self.adapter.poolmanager.pools
+        pools = [pools.get(k) for k in list(pools.keys())]
+        return (sum(p.num_requests for p in pools if p is not None),
+                sum(p.num_connections for p in pools if p is not None))
+
+    def start_new_session(self, scrape_base_url=True):
+        if scrape_base_url and self.cached_session:
+            # Just once, a new session is asked on failures.
+            self.logger.log(DEBUG_OVERVIEW, 'Reusing the session of %s started at %s.',
+                self.cached_session['domain'], time.ctime(self.cached_session['date']))
+            self.set_state(self.cached_session)
+            self.restored, self.cached_session = self.cached_session, None
+            return
+
+        self.userAgent = get_user_agent()
+        self.session = self.new_session()
 
         # Restore configuration cookies from previous session.
         for c in self.config_cookies:
@@ -173,24 +283,54 @@ class fake_browser:
 
     def show_cookies(self):
         for x in self.session.cookies:
-            self.logger.log(DEBUG_OBSESSIVE,"%s Cookie %s" % (x.domain, x.name))
+            self.logger.log(DEBUG_OBSESSIVE,"%s Cookie %s", x.domain, x.name)
 
     def add_cookie(self, domain, name, value):
         self.session.cookies.set(name, value, domain=domain)
         self.config_cookies.append((domain, name, value))
 
+    def request_done(self, ok):
+        '''@brief Update the circuit breaker with the result of a request.
+           @param ok `True` if the page was got.
+        '''
+        if self.breaker_open:
+            if ok:
+                self.breaker_open = False
+                self.logger.warning('%s is responding again, resuming its requests.', self.domain)
+            return
+        self.last_requests_ok.append(ok)
+        failures = self.last_requests_ok.count(False)
+        # A `breaker_ratio` `None` or 0 never trips it.
+        if self.breaker_ratio and len(self.last_requests_ok) == BREAKER_WINDOW \
+                and failures > 0 and failures >= self.breaker_ratio * BREAKER_WINDOW:
+            self.breaker_open = True
+            self.breaker_trips += 1
+            self.probe_time = time.time()
+            self.last_requests_ok.clear()
+            self.logger.warning('%d of the last %d requests to %s failed, skipping its requests (probing it each %d s).',
+                failures, BREAKER_WINDOW, self.domain, BREAKER_PROBE_DELAY)
+
     def scrape_URL(self, url, retry=True, postData=None):
+        self.requests += 1
         retries = self.scrape_retries
         if retry == False:
             retries = 1
+        if self.breaker_open:
+            if time.time() - self.probe_time < BREAKER_PROBE_DELAY:
+                self.skipped_requests += 1
+                self.failed_requests += 1
+                raise ValueError('Site failing')
+            # Probe the site with a single request.
+            self.probe_time = time.time()
+            retries = 1
         for _ in range(retries):
             try:
                 # Check the throttling timeout of this browser to see if
                 # another access to its website is allowed.
 
                 sleepTime = self.throttle_timeout - time.time()
-                self.logger.log(DEBUG_OBSESSIVE, "browser: time=%.2f, timeout=%.2f, sleep=%.2f" \
-                    % (time.time(), self.throttle_timeout, sleepTime))
+                self.logger.log(DEBUG_OBSESSIVE, "browser: time=%.2f, timeout=%.2f, sleep=%.2f",
+                    time.time(), self.throttle_timeout, sleepTime)
                 if sleepTime > 0:
                     time.sleep(sleepTime)
 
@@ -202,8 +342,8 @@ class fake_browser:
                 else:
                     resp = self.session.get(url, timeout=15)
 
-                self.logger.log(DEBUG_HTTP_HEADERS, "Request headers: %s" % resp.request.headers)
-                self.logger.log(DEBUG_HTTP_HEADERS, "Response headers: %s" % resp.headers)
+                self.logger.log(DEBUG_HTTP_HEADERS, "Request headers: %s", resp.request.headers)
+                self.logger.log(DEBUG_HTTP_HEADERS, "Response headers: %s", resp.headers)
 
                 # Uncomment this to dump received HTML to file.
                 #if self.logger.isEnabledFor(DEBUG_HTTP_RESPONSES):
@@ -217,7 +357,7 @@ class fake_browser:
                 if resp.status_code == 403:
                     self.start_new_session()
                     self.logger.warning("Received 403, scraper possibly detected:" \
-                        " Starting new session for %s" % self.domain)
+                        " Starting new session for %s", self.domain)
                     continue
 
                 # Store last accessed URL to allow check for regional redirect.
@@ -225,11 +365,14 @@ class fake_browser:
                 html = resp.text
                 break
             except Exception as ex:
-                self.logger.log(DEBUG_DETAILED,'Exception of type "%s" while web-scraping %s' \
-                    % (type(ex).__name__, format(url)))
+                self.logger.log(DEBUG_DETAILED,'Exception of type "%s" while web-scraping %s',
+                    type(ex).__name__, url)
                 pass
         else:
+            self.failed_requests += 1
+            self.request_done(False)
             raise ValueError('No page')
+        self.request_done(True)
         return html
 
     def ajax_request(self, url, data=None, retry=True):
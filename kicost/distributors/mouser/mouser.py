@@ -32,6 +32,7 @@ from bs4 import BeautifulSoup
 import http.client # For web scraping exceptions.
 from ...global_vars import PartHtmlError
 from ...global_vars import logger, DEBUG_OVERVIEW, DEBUG_DETAILED, DEBUG_OBSESSIVE, DEBUG_HTTP_RESPONSES
+from ...global_vars import LazyLog
 
 from .. import fake_browser
 from .. import distributor
@@ -224,12 +225,12 @@ class dist_mouser(distributor.distributor):
                 self.browser.start_new_session()
 
         except Exception as ex:
-            self.logger.log(DEBUG_OBSESSIVE, "Exception was %s" % type(ex).__name__)
-            self.logger.log(DEBUG_OVERVIEW, 'Kept the last configuration {}, {} on {}.'.format(
-                    pycountry.currencies.get(alpha_3=distributor_dict[self.name]['site']['currency']).name,
-                    pycountry.countries.get(alpha_2=distributor_dict[self.name]['site']['locale']).name,
+            self.logger.log(DEBUG_OBSESSIVE, "Exception was %s", type(ex).__name__)
+            self.logger.log(DEBUG_OVERVIEW, 'Kept the last configuration %s, %s on %s.',
+                    LazyLog(lambda: pycountry.currencies.get(alpha_3=distributor_dict[self.name]['site']['currency']).name),
+                    LazyLog(lambda: pycountry.countries.get(alpha_2=distributor_dict[self.name]['site']['locale']).name),
                     distributor_dict[self.name]['site']['url']
-                )) # Keep the current configuration.
+                ) # Keep the current configuration.
         return
 
     def dist_get_part_html_tree(self, pn, extra_search_terms='', url=None, descend=2):
@@ -256,19 +257,19 @@ class dist_mouser(distributor.distributor):
         try:
             html = self.browser.scrape_URL(url)
         except Exception as ex:
-            self.logger.log(DEBUG_OBSESSIVE,'No HTML page for {} from {}'.format(pn, self.name))
+            self.logger.log(DEBUG_OBSESSIVE,'No HTML page for %s from %s', pn, self.name)
             raise PartHtmlError
 
         # Abort if the part number isn't in the HTML somewhere.
         # (Only use the numbers and letters to compare PN to HTML.)
         if re.sub('[\W_]','',str.lower(pn)) not in re.sub('[\W_]','',str.lower(str(html))):
-            self.logger.log(DEBUG_OBSESSIVE,'No part number {} in HTML page from {}'.format(pn, self.name))
+            self.logger.log(DEBUG_OBSESSIVE,'No part number %s in HTML page from %s', pn, self.name)
             raise PartHtmlError
         
         try:
             tree = BeautifulSoup(html, 'lxml')
         except Exception:
-            self.logger.log(DEBUG_OBSESSIVE,'No HTML tree for {} from {}'.format(pn, self.name))
+            self.logger.log(DEBUG_OBSESSIVE,'No HTML tree for %s from %s', pn, self.name)
             raise PartHtmlError
 
         # If the tree contains the tag for a product page, then just return it.
@@ -277,9 +278,9 @@ class dist_mouser(distributor.distributor):
 
         # If the tree is for a list of products, then examine the links to try to find the part number.
         if tree.find('div', id='searchResultsTbl') is not None:
-            self.logger.log(DEBUG_OBSESSIVE,'Found product table for {} from {}'.format(pn, self.name))
+            self.logger.log(DEBUG_OBSESSIVE,'Found product table for %s from %s', pn, self.name)
             if descend <= 0:
-                self.logger.log(DEBUG_OBSESSIVE,'Passed descent limit for {} from {}'.format(pn, self.name))
+                self.logger.log(DEBUG_OBSESSIVE,'Passed descent limit for %s from %s', pn, self.name)
                 raise PartHtmlError
             else:
                 # Look for the table of products.
@@ -302,12 +303,12 @@ class dist_mouser(distributor.distributor):
                 for l in product_links:
                     if l.text == match:
                         # Get the tree for the linked-to page and return that.
-                        self.logger.log(DEBUG_OBSESSIVE,'Selecting {} from product table for {} from {}'.format(l.text, pn, self.name))
+                        self.logger.log(DEBUG_OBSESSIVE,'Selecting %s from product table for %s from %s', l.text, pn, self.name)
                         return self.dist_get_part_html_tree(pn, extra_search_terms,
                                                   url=l.get('href', ''),
                                                   descend=descend-1)
 
         # I don't know what happened here, so give up.
-        self.logger.log(DEBUG_OBSESSIVE,'Unknown error for {} from {}'.format(pn, self.name))
-        self.logger.log(DEBUG_HTTP_RESPONSES,'Response was %s' % html)
+        self.logger.log(DEBUG_OBSESSIVE,'Unknown error for %s from %s', pn, self.name)
+        self.logger.log(DEBUG_HTTP_RESPONSES,'Response was %s', html)
         raise PartHtmlError
@@ -0,0 +1,111 @@
+# MIT license
+#
+# Copyright (C) 2018 by XESS Corporation / Hildo Guillardi Junior
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Persistent cache of the distributors web sessions.
+
+   Starting the session of a distributor costs some throttled requests: its
+   home page (for the cookies) and, to select the locale and currency, its
+   configuration pages. The state of the sessions (User-Agent, cookies and
+   the localized site definitions of `distributor_dict`) is kept by
+   distributor and locale/currency asked, and reused for `ttl` hours by the
+   next runs without any request (see `fake_browser.start_new_session()`).
+'''
+
+__author__ = 'XESS Corporation'
+__email__ = 'info@xess.com'
+
+import os
+import io
+import json
+import time
+import threading
+
+from ..global_vars import logger, DEBUG_OVERVIEW
+
+__all__ = ['session_cache', 'SESSION_CACHE_FILE', 'SESSION_TTL']
+
+SESSION_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.kicost', 'sessions.json')
+SESSION_CACHE_VERSION = 1  # Increased on incompatible changes of the file.
+SESSION_TTL = 12  # Hours that a session is reused.
+
+
+class session_cache(object):
+    '''Map of (distributor, locale/currency) to the state of its web session.'''
+
+    def __init__(self, filename=SESSION_CACHE_FILE, locale_currency=None, ttl=SESSION_TTL):
+        self.filename = filename
+        self.locale_currency = locale_currency or ''
+        self.ttl = ttl
+        self.lock = threading.Lock() # The distributors are initialized by threads.
+        self.changed = False
+        self.sessions = {}
+        try:
+            with io.open(filename, encoding='utf-8') as f:
+                data = json.load(f)
+            if data['version'] == SESSION_CACHE_VERSION:
+                self.sessions = {k: s for k, s in data['sessions'].items() if not self.expired(s)}
+        except (IOError, OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass # No cache yet (or a broken one), start a new one.
+
+    def expired(self, state):
+        return self.ttl is not None and time.time() - state['date'] > self.ttl * 3600
+
+    def key(self, dist):
+        return '\t'.join((dist, self.locale_currency))
+
+    def get(self, dist):
+        '''@brief State of the session of a distributor, for the locale/currency asked.
+           @return `dict()` with the session `date`, `site` definitions and the
+           `fake_browser.get_state()` or `None` if not cached or expired.
+        '''
+        with self.lock:
+            state = self.sessions.get(self.key(dist))
+            return None if state is None or self.expired(state) else state
+
+    def set(self, dist, site, browser_state, date=None):
+        '''Cache the session state of a distributor, `date` when it was created (default now).'''
+        state = dict(browser_state, site=site, date=date or time.time())
+        with self.lock:
+            self.sessions[self.key(dist)] = state
+            self.changed = True
+
+    def discard(self, dist):
+        with self.lock:
+            if self.sessions.pop(self.key(dist), None) is not None:
+                self.changed = True
+
+    def save(self):
+        '''Write the cache file, if it was changed.'''
+        with self.lock:
+            if not self.changed:
+                return
+            logger.log(DEBUG_OVERVIEW, 'Writing the %d sessions cached to %s...', len(self.sessions), self.filename)
+            try:
+                directory = os.path.dirname(self.filename)
+                if directory and not os.path.isdir(directory):
+                    os.makedirs(directory)
+                with io.open(self.filename, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps({'version': SESSION_CACHE_VERSION, 'sessions': self.sessions},
+                                       ensure_ascii=False, indent=0, sort_keys=True))
+                self.changed = False
+            except (IOError, OSError) as e:
+                logger.warning('Could not write the session cache %s: %s', self.filename, e)
@@ -83,7 +83,7 @@ class dist_tme(distributor.distributor):
         try:
             html = self.browser.ajax_request('https://www.tme.eu/en/_ajax/ProductInformationPage/_getStocks.html', data)
         except: # Couldn't get a good read from the website.
-            self.logger.log(DEBUG_OBSESSIVE,'No AJAX data for {} from {}'.format(pn, 'TME'))
+            self.logger.log(DEBUG_OBSESSIVE,'No AJAX data for %s from %s', pn, 'TME')
             return None, None
 
         try:
@@ -193,19 +193,19 @@ class dist_tme(distributor.distributor):
         try:
             html = self.browser.scrape_URL(url)
         except:
-            self.logger.log(DEBUG_OBSESSIVE,'No HTML page for {} from {}'.format(pn, self.name))
+            self.logger.log(DEBUG_OBSESSIVE,'No HTML page for %s from %s', pn, self.name)
             raise PartHtmlError
 
         # Abort if the part number isn't in the HTML somewhere.
         # (Only use the numbers and letters to compare PN to HTML.)
         if re.sub('[\W_]','',str.lower(pn)) not in re.sub('[\W_]','',str.lower(str(html))):
-            self.logger.log(DEBUG_OBSESSIVE,'No part number {} in HTML page from {} ({})'.format(pn, self.name, url))
+            self.logger.log(DEBUG_OBSESSIVE,'No part number %s in HTML page from %s (%s)', pn, self.name, url)
             raise PartHtmlError
 
         try:
             tree = BeautifulSoup(html, 'lxml')
         except Exception:
-            self.logger.log(DEBUG_OBSESSIVE,'No HTML tree for {} from {}'.format(pn, self.name))
+            self.logger.log(DEBUG_OBSESSIVE,'No HTML tree for %s from %s', pn, self.name)
             raise PartHtmlError
 
         # If the tree contains the tag for a product page, then just return it.
@@ -214,9 +214,9 @@ class dist_tme(distributor.distributor):
 
         # If the tree is for a list of products, then examine the links to try to find the part number.
         if tree.find('table', id="products") is not None:
-            self.logger.log(DEBUG_OBSESSIVE,'Found product table for {} from {}'.format(pn, self.name))
+            self.logger.log(DEBUG_OBSESSIVE,'Found product table for %s from %s', pn, self.name)
             if descend <= 0:
-                self.logger.log(DEBUG_OBSESSIVE,'Passed descent limit for {} from {}'.format(pn, self.name))
+                self.logger.log(DEBUG_OBSESSIVE,'Passed descent limit for %s from %s', pn, self.name)
                 raise PartHtmlError
             else:
                 # Look for the table of products.
@@ -243,7 +243,7 @@ class dist_tme(distributor.distributor):
                     try:
                         if (not l.get('href', '').startswith('./katalog')) and l.text == match:
                             # Get the tree for the linked-to page and return that.
-                            self.logger.log(DEBUG_OBSESSIVE,'Selecting {} from product table for {} from {}'.format(l.text, pn, self.name))
+                            self.logger.log(DEBUG_OBSESSIVE,'Selecting %s from product table for %s from %s', l.text, pn, self.name)
                             # TODO: The current implementation does up to four HTTP
                             # requests per part (search, part details page for TME P/N,
                             # XHR for pricing information, and XHR for stock
@@ -261,6 +261,6 @@ class dist_tme(distributor.distributor):
                         pass    # This happens if there is no 'href' in the link, so just skip it.
 
         # I don't know what happened here, so give up.
-        self.logger.log(DEBUG_OBSESSIVE,'Unknown error for {} from {}'.format(pn, self.name))
-        self.logger.log(DEBUG_HTTP_RESPONSES,'Response was %s' % html)
+        self.logger.log(DEBUG_OBSESSIVE,'Unknown error for %s from %s', pn, self.name)
+        self.logger.log(DEBUG_HTTP_RESPONSES,'Response was %s', html)
         raise PartHtmlError
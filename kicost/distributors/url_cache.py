@@ -0,0 +1,171 @@
+# MIT license
+#
+# Copyright (C) 2018 by XESS Corporation / Hildo Guillardi Junior
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Persistent cache of the part searches at the distributors.
+
+   The site search of a distributor usually lands on a table of products and
+   one more (throttled) request is needed to reach the product page. The URL
+   of the product page found is kept by distributor, locale, part number and
+   extra search terms, so the next runs request it directly. An URL that no
+   longer gives the page of the part is dropped and the part searched again
+   (see `distributor.lookup_part_html_tree()`).
+
+   The searches that did not find the part are also kept, for `miss_ttl`
+   hours, and not repeated. The count of searches and parts found with and
+   without the manufacturer name in the search terms orders the attempts of
+   the next lookups, the most successful first (see `search_plan()`).
+'''
+
+__author__ = 'XESS Corporation'
+__email__ = 'info@xess.com'
+
+import os
+import io
+import json
+import time
+import threading
+
+from .global_vars import distributor_dict
+from ..global_vars import logger, DEBUG_OVERVIEW
+
+__all__ = ['url_cache', 'URL_CACHE_FILE', 'MISS_TTL']
+
+URL_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.kicost', 'url_cache.json')
+URL_CACHE_VERSION = 1  # Increased on incompatible changes of the file.
+MISS_TTL = 12  # Hours that a part not found is not searched again.
+# Search terms that found less than `MIN_SEARCH_RATE` of the parts in
+# `MIN_SEARCH_TRIES` or more searches at a distributor are not tried anymore.
+MIN_SEARCH_TRIES = 20
+MIN_SEARCH_RATE = 0.02
+
+
+class url_cache(object):
+    '''Map of (distributor, locale, part number, extra search terms) to the product page URL.'''
+
+    def __init__(self, filename=URL_CACHE_FILE, miss_ttl=MISS_TTL):
+        self.filename = filename
+        self.miss_ttl = miss_ttl
+        self.lock = threading.Lock() # The distributors are scraped by threads.
+        self.changed = False
+        self.urls = {}
+        self.misses = {} # Time of the searches that did not find the part.
+        self.searches = {} # Distributor and search kind to [found, tried] counts.
+        try:
+            with io.open(filename, encoding='utf-8') as f:
+                data = json.load(f)
+            if data['version'] == URL_CACHE_VERSION:
+                self.urls = data['urls']
+                self.misses = {k: t for k, t in data.get('misses', {}).items() if not self.expired(t)}
+                self.searches = data.get('searches', {})
+        except (IOError, OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass # No cache yet (or a broken one), start a new one.
+
+    def expired(self, miss_time):
+        return self.miss_ttl is not None and time.time() - miss_time > self.miss_ttl * 3600
+
+    @staticmethod
+    def key(dist, pn, extra_search_terms=''):
+        '''Key of a part look up, the site locale selects the URLs of the distributor.'''
+        locale = distributor_dict[dist].get('site', {}).get('locale') or ''
+        return '\t'.join((dist, locale, pn, extra_search_terms or ''))
+
+    def get(self, dist, pn, extra_search_terms=''):
+        '''@brief URL of the product page of a part at a distributor.
+           @return URL `str()` or `None` if not cached.
+        '''
+        with self.lock:
+            return self.urls.get(self.key(dist, pn, extra_search_terms))
+
+    def set(self, dist, pn, extra_search_terms, url):
+        '''Cache the URL of the product page of a part at a distributor.'''
+        key = self.key(dist, pn, extra_search_terms)
+        with self.lock:
+            self.misses.pop(key, None)
+            if self.urls.get(key) != url:
+                self.urls[key] = url
+                self.changed = True
+
+    def discard(self, dist, pn, extra_search_terms=''):
+        '''Drop the URL of a part at a distributor, it is no longer valid.'''
+        with self.lock:
+            if self.urls.pop(self.key(dist, pn, extra_search_terms), None) is not None:
+                self.changed = True
+
+    def is_missing(self, dist, pn, extra_search_terms=''):
+        '''`True` if a recent search did not find the part at the distributor.'''
+        with self.lock:
+            miss_time = self.misses.get(self.key(dist, pn, extra_search_terms))
+            return miss_time is not None and not self.expired(miss_time)
+
+    def set_missing(self, dist, pn, extra_search_terms=''):
+        '''Keep a search that did not find the part at the distributor.'''
+        with self.lock:
+            self.misses[self.key(dist, pn, extra_search_terms)] = time.time()
+            self.changed = True
+
+    @staticmethod
+    def search_kind(extra_search_terms):
+        return 'manf' if extra_search_terms else 'pn'
+
+    def count_search(self, dist, extra_search_terms, found):
+        '''Count a site search at a distributor, by the kind of its search terms.'''
+        with self.lock:
+            counts = self.searches.setdefault(dist, {}).setdefault(self.search_kind(extra_search_terms), [0, 0])
+            counts[0] += 1 if found else 0
+            counts[1] += 1
+            self.changed = True
+
+    def search_plan(self, dist, manf=''):
+        '''@brief Extra search terms to look up a part at a distributor, in the order to try.
+           @param dist Distributor name `str()`.
+           @param manf Manufacturer name `str()` of the part.
+           @return `list()` of the search terms, the manufacturer name or `''`. The
+           most successful at the distributor first and without the ones that
+           (almost) never find the parts.
+        '''
+        terms = [manf, ''] if manf else ['']
+        with self.lock:
+            counts = {t: list(self.searches.get(dist, {}).get(self.search_kind(t), [0, 0])) for t in terms}
+        plan = [t for t in terms if counts[t][1] < MIN_SEARCH_TRIES
+                                    or float(counts[t][0]) / counts[t][1] >= MIN_SEARCH_RATE]
+        # The terms not tried yet have a 50% rate (and keep the manufacturer first).
+        return sorted(plan, key=lambda t: (counts[t][0] + 1.0) / (counts[t][1] + 2.0),
+                      reverse=True) or terms[:1]
+
+    def save(self):
+        '''Write the cache file, if it was changed.'''
+        with self.lock:
+            if not self.changed:
+                return
+            logger.log(DEBUG_OVERVIEW, 'Writing the %d product URLs and %d misses cached to %s...',
+                       len(self.urls), len(self.misses), self.filename)
+            try:
+                directory = os.path.dirname(self.filename)
+                if directory and not os.path.isdir(directory):
+                    os.makedirs(directory)
+                with io.open(self.filename, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps({'version': URL_CACHE_VERSION, 'urls': self.urls,
+                                        'misses': self.misses, 'searches': self.searches},
+                                       ensure_ascii=False, indent=0, sort_keys=True))
+                self.changed = False
+            except (IOError, OSError) as e:
+                logger.warning('Could not write the URL cache %s: %s', self.filename, e)
@@ -39,7 +39,7 @@ from ...global_vars import logger, DEBUG_OVERVIEW, DEBUG_DETAILED, DEBUG_OBSESSI
 from ...global_vars import SEPRTR
 from ...distributors.global_vars import distributor_dict
 from ..eda_tools import field_name_translations, remove_dnp_parts
-from ..eda_tools import PART_REF_REGEX_NOT_ALLOWED
+from ..references import PART_REF_REGEX_NOT_ALLOWED
 
 # Add to deal with the fileds of Altium and WEB tools.
 field_name_translations.update(
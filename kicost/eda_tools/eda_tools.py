@@ -28,10 +28,12 @@ __company__ = 'University of Campinas - Brazil'
 
 # Libraries.
 import re, os # Regular expression parser and matches.
+from fractions import Fraction # Exact arithmetic of the fractional part quantities.
 from ..global_vars import logger, DEBUG_OVERVIEW, DEBUG_DETAILED, DEBUG_OBSESSIVE # Debug configurations.
 from ..global_vars import SEPRTR
 from ..distributors.global_vars import distributor_dict
 from . import eda_tool_dict # EDA dictionary with the features.
+from .references import order_refs, split_refs, parse_ref, SUB_SEPRTR, PART_REF_REGEX # Designators handling.
 
 __all__ = ['file_eda_match', 'partgroup_qty', 'groups_sort', 'order_refs', 'subpartqty_split', 'group_parts']
 
@@ -39,29 +41,12 @@ __all__ = ['file_eda_match', 'partgroup_qty', 'groups_sort', 'order_refs', 'subp
 QTY_SEPRTR  = r'(?<!\\)\s*[:]\s*'  # Separator for the subpart quantity and the part number, remove the lateral spaces.
 PART_SEPRTR = r'(?<!\\)\s*[;,]\s*' # Separator for the part numbers in a list, remove the lateral spaces.
 ESC_FIND = r'\\\s*([;,:])\s*'      # Used to remove backslash from escaped qty & manf# separators.
-SUB_SEPRTR  = '#' # Subpart separator for a part reference.
 REPLICATE_MANF = '~' # Character used to replicate the last manufacture name (`manf` field) in multiparts.
 SGROUP_SEPRTR = '\n' # Separator of the semi identical parts groups (parts that have the filed ignored to group).
 # Reference string order to the spreadsheet. Use this to
 # group the elements in sequential rows.
 BOM_ORDER = 'u,q,d,t,y,x,c,r,s,j,p,cnn,con'
 
-# Characters removed from references when read the files.
-PART_REF_REGEX_NOT_ALLOWED = '[\+\(\)\*\{}]'.format(SEPRTR)
-# Regular expression for detecting part reference ids consisting of a
-# prefix of letters followed by a sequence of digits, such as 'LED10'
-# or a sequence of digits followed by a subpart number like 'CONN1#3'.
-# There can even be an interposer alphabetical and some special
-# characters so 'LED.10', 'LED_10', 'LED_BLUE-10', 'TEST&PIN+2',
-# 'TEST+SUPPLY' or 'R4.10' is also OK.
-# Also references with numbers at the end, just if the interlocutor,
-# part are allowed by some EDAs or manual edition in KiCad.
-# In the case of multiple project BOM files, the references are
-# modified by adding the project number identification followed
-# by `SEPRTR` definition.
-PART_REF_REGEX_SPECIAL_CHAR_REF = '\+\-\=\s\_\.\(\)\$\*\&' # Used in next definition only (because repeat).
-PART_REF_REGEX = re.compile('(?P<prefix>([a-z]*(?P<prj>\d+){p_sp})?(?P<ref>[a-z{sc}\d]*[a-z{sc}]))(?P<num>((?P<ref_num>\d+(\.\d+)?)({sp}(?P<subpart_num>\d+))?)?)'.format(p_sp=SEPRTR, sc=PART_REF_REGEX_SPECIAL_CHAR_REF, sp=SUB_SEPRTR), re.IGNORECASE)
-
 # Generate a dictionary to translate all the different ways people might want
 # to refer to part numbers, vendor numbers, manufacture name and such.
 field_name_translations = {
@@ -159,10 +144,127 @@ def organize_parts(components, fields_merge):
     return components
 
 
-# Temporary class for storing part group information.
+# Index of each distributor in the `dist_data` table of the part groups,
+# assigned the first time that some result of the distributor is stored.
+dist_ids = {}
+
+# Columns of the part group `dist_data` table.
+DIST_DATA_COLS = ('part_num', 'url', 'price_tiers', 'qty_avail', 'info_dist')
+
+
+def dist_id(dist):
+    '''@brief Get the index of a distributor in the part groups `dist_data` table.
+       @param dist Distributor name `str()`.
+       @return `int()` index.
+    '''
+    try:
+        return dist_ids[dist]
+    except KeyError:
+        return dist_ids.setdefault(dist, len(dist_ids))
+
+
+class DistColumn(object):
+    '''@brief Dictionary-like view of one column of a part group `dist_data`
+       table, keyed by the distributor name. e.g. `part.url['digikey']`.
+    '''
+    __slots__ = ('part', 'col')
+
+    def __init__(self, part, col):
+        self.part = part
+        self.col = col
+
+    def __getitem__(self, dist):
+        try:
+            row = self.part.dist_data[dist_ids[dist]]
+        except (KeyError, IndexError, TypeError):
+            row = None
+        if row is None:
+            raise KeyError(dist)
+        return row[self.col]
+
+    def __setitem__(self, dist, value):
+        row = list(self.part.dist_row(dist))
+        row[self.col] = value
+        self.part.dist_data[dist_ids[dist]] = tuple(row)
+
+    def __contains__(self, dist):
+        try:
+            self[dist]
+            return True
+        except KeyError:
+            return False
+
+    def get(self, dist, default=None):
+        try:
+            return self[dist]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return [d for d in sorted(dist_ids, key=dist_ids.get) if d in self]
+
+    def values(self):
+        return [self[d] for d in self.keys()]
+
+    def items(self):
+        return [(d, self[d]) for d in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
 class IdenticalComponents(object):
-    '''@brief Class to group components.'''
-    pass
+    '''@brief Group of identical components.
+
+       The distributors scraped data is stored in the `dist_data` table, one
+       `tuple()` row per distributor (indexed by `dist_id()`) with the
+       `DIST_DATA_COLS` columns. Each column is also accessible by its name
+       as a `dict()` keyed by the distributor name, e.g. `part.url[dist]`.
+       The `scrape_date` is the date of the data reused from a previous run
+       and `failed_dists` the distributors whose look up failed (a request
+       failed, so the part may be missing just by it).
+    '''
+    __slots__ = ('refs', 'manfcat_codes', 'fields', 'collapsed_refs', 'dist_data', 'scrape_date',
+                 'failed_dists')
+
+    def __init__(self):
+        self.dist_data = None # Created when the first distributor data is stored.
+        self.scrape_date = None # Scraped in this run.
+        self.failed_dists = set()
+
+    def dist_row(self, dist):
+        '''@brief Get the `dist_data` row of a distributor, creating it if needed.
+           @param dist Distributor name `str()`.
+           @return `tuple()` with the `DIST_DATA_COLS` values (`None` if not set).
+        '''
+        i = dist_id(dist)
+        if self.dist_data is None:
+            self.dist_data = []
+        if i >= len(self.dist_data):
+            self.dist_data.extend([None] * (i + 1 - len(self.dist_data)))
+        if self.dist_data[i] is None:
+            self.dist_data[i] = (None,) * len(DIST_DATA_COLS)
+        return self.dist_data[i]
+
+    def set_dist_data(self, dist, part_num, url, price_tiers, qty_avail, info_dist):
+        '''@brief Store the data scraped for this part group in a distributor.
+           @param dist Distributor name `str()`.
+        '''
+        self.dist_row(dist)
+        self.dist_data[dist_ids[dist]] = (part_num, url, price_tiers, qty_avail, info_dist)
+
+    part_num = property(lambda self: DistColumn(self, 0), doc='Distributor part number.')
+    url = property(lambda self: DistColumn(self, 1), doc='Distributor part web page.')
+    price_tiers = property(lambda self: DistColumn(self, 2), doc='Distributor price tiers `dict()`.')
+    qty_avail = property(lambda self: DistColumn(self, 3), doc='Distributor quantity available.')
+    info_dist = property(lambda self: DistColumn(self, 4), doc='Distributor extra information `dict()`.')
+
 
 def group_parts(components, fields_merge):
     '''@brief Group common parts after preprocessing from XML or CSV files.
@@ -340,17 +442,10 @@ def group_parts(components, fields_merge):
     logger.log(DEBUG_OVERVIEW, 'Propagating field values to identical components...')
     for grp in new_component_groups:
         grp_fields = {}
-        qty = []
         for ref in grp.refs:
             for key, val in list(components[ref].items()):
                 if key == 'manf#_qty':
-                    try:
-                        for i in range(len(val)):
-                            grp_fields['manf#_qty'][i] += '+' + val[i] # DUMMY way and need improvement to really do arithmetic and not string cat. #TODO
-                            val[i] = grp_fields['manf#_qty'][i] # Make the first values take also equal.
-                    except:
-                        grp_fields['manf#_qty'] = val
-                    continue
+                    continue # Summed below for the whole group.
                 if val is None: # Field with no value...
                     continue # so ignore it.
                 if grp_fields.get(key): # This field has been seen before.
@@ -358,6 +453,12 @@ def group_parts(components, fields_merge):
                         raise ValueError('Field value mismatch: ref={} field={} value=\'{}\', global=\'{}\' at group={}'.format(ref, key, val, grp_fields[key], grp.refs))
                 else: # First time this field has been seen in the group, so store it.
                     grp_fields[key] = val
+        # The group quantity is the sum of the quantity of each designator
+        # (a designator without 'manf#_qty' counts as one). In the multifiles
+        # BOM case the sum is done for each project.
+        qtys = [components[ref].get('manf#_qty') for ref in grp.refs]
+        if any(q is not None for q in qtys):
+            grp_fields['manf#_qty'] = sum_qty([1 if q is None else q for q in qtys])
         grp.fields = grp_fields
 
     # Now return the list of identical part groups.
@@ -415,56 +516,41 @@ def remove_dnp_parts(components, variant):
     return accepted_components
 
 
-def groups_sort(new_component_groups):
+def groups_sort(component_groups, order=BOM_ORDER):
     '''@brief Order the groups in a alphabetical way.
        
        Put the components groups in the spreadsheet rows in a specific order
-       using the reference string of the components. The order is defined
-       by BOM_ORDER.
-       @param components Part components in a `list()` of `dict()`, format given by the EDA modules.
-       @return Same as input.
+       using the reference string of the components. The designators order
+       is defined by `order`, the ones not listed go after in alphabetical
+       order. Inside each designator the groups with 'manf#' come first and
+       then the natural order of the references (R2 before R10). The sort
+       key is computed just once for each group.
+       @param component_groups `list()` of `IdenticalComponents`, given by `group_parts()`.
+       @param order Comma separated `str()` of designators (case insensitive), default BOM_ORDER.
+       @return `list()` of `IdenticalComponents` sorted.
     '''
 
     logger.log(DEBUG_OVERVIEW, 'Sorting the groups for better visualization...')
 
-    ref_identifiers = re.split('(?<![\W\*\/])\s*,\s*|\s*,\s*(?![\W\*\/])',
-                BOM_ORDER, flags=re.IGNORECASE)
-    component_groups_order_old = list( range(0,len(new_component_groups)) )
-    component_groups_order_new = list()
-    component_groups_refs = [new_component_groups[g].fields.get('reference') for g in component_groups_order_old]
-    logger.log(DEBUG_OBSESSIVE, 'All ref identifier: {}'.format(ref_identifiers) )
-    logger.log(DEBUG_OBSESSIVE, '{} groups of components.'.format(len(component_groups_order_old)) )
-    logger.log(DEBUG_OBSESSIVE, 'Identifiers founded {}.'.format(component_groups_refs) )
-    for ref_identifier in ref_identifiers:
-        component_groups_ref_match = [i for i in range(0,len(component_groups_refs)) if ref_identifier==component_groups_refs[i].lower()]
-        logger.log(DEBUG_OBSESSIVE, 'Identifier: {} in {}.'.format(ref_identifier, component_groups_ref_match) )
-        if len(component_groups_ref_match)>0:
-            # If found more than one group with the reference, use the 'manf#'
-            # as second order criteria.
-            if len(component_groups_ref_match)>1:
-                try:
-                    for item in component_groups_ref_match:
-                        component_groups_order_old.remove(item)
-                except ValueError:
-                    pass
-                # Examine 'manf#' and refs to get the order.
-                # Order by refs that have 'manf#' codes, that ones that don't have stay at the end of the group.
-                group_manf_list = [new_component_groups[h].fields.get('manf#') for h in component_groups_ref_match]
-                group_refs_list = [new_component_groups[h].refs for h in component_groups_ref_match]
-                sorted_groups = sorted(range(len(group_refs_list)), key=lambda k:(group_manf_list[k] is None,  group_refs_list[k]))
-                logger.log(DEBUG_OBSESSIVE, '{} > order: {}'.format( group_manf_list, sorted_groups) )
-                component_groups_ref_match = [component_groups_ref_match[i] for i in sorted_groups]
-                component_groups_order_new += component_groups_ref_match
-            else:
-                try:
-                    component_groups_order_old.remove(component_groups_ref_match[0])
-                except ValueError:
-                    pass
-                component_groups_order_new += component_groups_ref_match
-    # The new order is the found refs first and at the last the not referenced in BOM_ORDER.
-    component_groups_order_new += component_groups_order_old # Add the missing references groups.
-    new_component_groups = [new_component_groups[i] for i in component_groups_order_new]
-    return new_component_groups
+    ref_identifiers = [i.strip().lower() for i in (order or '').split(',') if i.strip()]
+    ref_rank = {}
+    for rank, ref_identifier in enumerate(ref_identifiers):
+        ref_rank.setdefault(ref_identifier, rank)
+    not_listed_rank = len(ref_identifiers)
+    logger.log(DEBUG_OBSESSIVE, 'All ref identifier: %s', ref_identifiers)
+
+    def ref_key(ref):
+        prefix, num, num_key, _ = parse_ref(ref)
+        # Designator without the project identification of multiple BOMs.
+        designator = prefix.split(SEPRTR)[-1].lower()
+        return (ref_rank.get(designator, not_listed_rank), designator, prefix, num_key, num)
+
+    def group_key(group):
+        # The group is ordered by its first reference.
+        first_ref_key = min([ref_key(ref) for ref in group.refs])
+        return first_ref_key[:2] + (group.fields.get('manf#') is None,) + first_ref_key[2:]
+
+    return sorted(component_groups, key=group_key)
 
 
 def subpartqty_split(components):
@@ -519,7 +605,7 @@ def subpartqty_split(components):
                 subparts_manf = ['']*subparts_qty
                 pass
 
-            logger.log(DEBUG_DETAILED, '{} >> {}'.format(part_ref, founded_fields) )
+            logger.log(DEBUG_DETAILED, '%s >> %s', part_ref, founded_fields)
 
             # Second, if more than one subpart, split the sub parts as
             # new components with the same description, footprint, and
@@ -588,40 +674,85 @@ def subpartqty_split(components):
 def partgroup_qty(component):
     '''@brief Take the components grouped quantity.
        
-       Calculate the string of the quantity of the group parsing the
-       reference (design) quantity and the sub quantity (in case that
-       was a sub part of a manufacture/distributor code).
-       In the case of the multifiles BOM (and future revision of the
-       code) just use the 'manf#_qty' field that in `group_parts()`
-       recorded the quantities used in each project.
+       Create the spreadsheet formula of the quantity of the group. The
+       total quantity of each board (already summed by `group_parts()`
+       from the reference quantity and the sub quantity, in case that
+       was a sub part of a manufacture/distributor code) is just
+       multiplied by the board quantity.
+       In the case of the multifiles BOM just use the 'manf#_qty' field
+       that in `group_parts()` recorded the quantities used in each project.
        
        @param components Part component `dict()`, format given by the EDA modules.
        @return Quantity of the manf# part used.
     '''
-    try:
-        qty = component.fields.get('manf#_qty')
+    qty = component.fields.get('manf#_qty')
 
-        logger.log(DEBUG_OBSESSIVE, 'Qty>> {}\t {}*{}'.format(component.refs, qty, component.fields.get('manf#')) )
+    logger.log(DEBUG_OBSESSIVE, 'Qty>> %s\t %s*%s', component.refs, qty, component.fields.get('manf#'))
 
-        if isinstance(qty, list):
-            # Multifiles BOM case, the quantities in the list represent
-            # each project read by the order. Do not `CEILING` because
-            # this is will be made in the total columns that sum all
-            # the quantities needed in all projects BOMs.
-            string = ['={{}}*({qp})'.format(qp=i) for i in qty]
+    if isinstance(qty, list):
+        # Multifiles BOM case, the quantities in the list represent
+        # each project read by the order. Do not `CEILING` because
+        # this is will be made in the total columns that sum all
+        # the quantities needed in all projects BOMs.
+        string = ['={{}}*{qp}'.format(qp=qty_formula(i)) for i in qty]
+    else:
+        if qty is None:
+            qty = len(component.refs)
+        if Fraction(qty).denominator != 1:
+            string = '=CEILING({{}}*{q},1)'.format(q=qty_formula(qty))
         else:
-            if qty != '1' and qty != None:
-                string = '=CEILING({{}}*({q})*{qty},1)'.format(
-                                q=qty,
-                                qty=len(component.refs))
-            else:
-                string = '={{}}*{qty}'.format(qty=len(component.refs))
-    except (KeyError, TypeError):
-        logger.log(DEBUG_OBSESSIVE, 'Qty>> {} \t {}'.format(component.refs, len(component.refs)) )
-        string = '={{}}*{qty}'.format(qty=len(component.refs))
+            string = '={{}}*{q}'.format(q=qty_formula(qty))
     return string
 
 
+def qty_value(qty):
+    '''@brief Convert a quantity string into an exact rational number.
+       
+       ' 4.5' -> Fraction(9, 2)
+       '4 / 5' -> Fraction(4, 5)
+       '7' -> Fraction(7, 1)
+       '' -> Fraction(1, 1) forgot the qty understood '1'
+       
+       @param qty Quantity `str()` as found by `manf_code_qtypart()`.
+       @return `Fraction()` of the quantity.
+    '''
+    qty = re.sub('\s', '', qty)
+    if not qty:
+        return Fraction(1)
+    try:
+        return Fraction(qty)
+    except (ValueError, ZeroDivisionError):
+        raise ValueError('Not recognized quantity <{}>. Advise: edit it in your BOM/Schematic.'.format(qty))
+
+
+def sum_qty(qtys):
+    '''@brief Sum a `list()` of quantities.
+       
+       The quantities may be numbers or, in the multifiles BOM case, a
+       `list()` of numbers (one for each project), that are summed
+       element by element.
+       @param qtys `list()` of the quantities.
+       @return Total quantity, a `list()` in the multifiles BOM case.
+    '''
+    if isinstance(qtys[0], list):
+        return [sum(q, Fraction(0)) for q in zip(*qtys)]
+    return sum(qtys, Fraction(0))
+
+
+def qty_formula(qty):
+    '''@brief Write a quantity in a short and exact spreadsheet formula form.
+       
+       Fraction(8, 1) -> '8'
+       Fraction(9, 2) -> '(9/2)'
+       @param qty Quantity number.
+       @return `str()` to be used inside a spreadsheet formula.
+    '''
+    qty = Fraction(qty)
+    if qty.denominator == 1:
+        return str(qty.numerator)
+    return '({}/{})'.format(qty.numerator, qty.denominator)
+
+
 def subpart_list(part):
     '''
     @brief Split the subpart by the `PART_SEPRTR`definition.
@@ -643,15 +774,15 @@ def manf_code_qtypart(subpart):
        multiplied by a constant.
        
        Setting QTY_SEPRTR as '\:', we have
-       ' 4.5 : ADUM3150BRSZ-RL7' -> ('4.5', 'ADUM3150BRSZ-RL7')
-       '4/5  : ADUM3150BRSZ-RL7' -> ('4/5', 'ADUM3150BRSZ-RL7')
-       '7:ADUM3150BRSZ-RL7' -> ('7', 'ADUM3150BRSZ-RL7')
-       'ADUM3150BRSZ-RL7 :   7' -> ('7', 'ADUM3150BRSZ-RL7')
-       'ADUM3150BRSZ-RL7' -> ('1', 'ADUM3150BRSZ-RL7')
-       'ADUM3150BRSZ-RL7:' -> ('1', 'ADUM3150BRSZ-RL7') forgot the qty understood '1'
+       ' 4.5 : ADUM3150BRSZ-RL7' -> (Fraction(9, 2), 'ADUM3150BRSZ-RL7')
+       '4/5  : ADUM3150BRSZ-RL7' -> (Fraction(4, 5), 'ADUM3150BRSZ-RL7')
+       '7:ADUM3150BRSZ-RL7' -> (Fraction(7, 1), 'ADUM3150BRSZ-RL7')
+       'ADUM3150BRSZ-RL7 :   7' -> (Fraction(7, 1), 'ADUM3150BRSZ-RL7')
+       'ADUM3150BRSZ-RL7' -> (Fraction(1, 1), 'ADUM3150BRSZ-RL7')
+       'ADUM3150BRSZ-RL7:' -> (Fraction(1, 1), 'ADUM3150BRSZ-RL7') forgot the qty understood '1'
        
        @param Part that way have different than ONE quantity. Intended as one element of the list of `subpart_list()`.
-       @return (qty, manf#) Quantity and the manufacture code.
+       @return (qty, manf#) Quantity, as an exact `Fraction()` (see `qty_value()`), and the manufacture code.
     '''
     subpart = re.sub(ESC_FIND, r'\1', subpart) # Remove any escape backslashes preceding PART_SEPRTR.
     strings = re.split(QTY_SEPRTR, subpart)
@@ -684,155 +815,5 @@ def manf_code_qtypart(subpart):
     else:
         qty = '1'
         part = ''.join(strings)
-    logger.log(DEBUG_OBSESSIVE, 'part/qty>> {}\t\tpart>>{}\tqty>>'.format(subpart, part, qty) )
-    return qty, part
-
-
-def order_refs(refs, collapse=True):
-    '''@brief Collapse list of part references into a sorted, comma-separated list of hyphenated ranges. This is intended as opposite of `split_refs()`
-       @param refs Designator/references `list()`.
-       @return References in a organized view way.
-    '''
-
-    def convert_to_ranges(nums):
-        # Collapse a list of numbers into sorted, comma-separated, hyphenated ranges.
-        # e.g.: 3,4,7,8,9,10,11,13,14 => 3,4,7-11,13,14
-
-        def get_refnum(refnum):
-            return int(re.match('\d+', refnum).group(0))
-
-        def to_int(n):
-            try:
-                return int(n)
-            except ValueError:
-                return n
-
-        nums.sort(key=get_refnum)  # Sort all the numbers.
-        nums = [to_int(n) for n in nums]  # Convert strings to `int` if possible.
-        num_ranges = []  # No ranges found yet since we just started.
-        range_start = 0  # First possible range is at the start of the list of numbers.
-
-        # Go through the list of numbers looking for 3 or more sequential numbers.
-        while range_start < len(nums):
-            num_range = nums[range_start]  # Current range starts off as a single number.
-            next_range_start = range_start + 1  # The next possible start of a range.
-            # Part references with subparts are never included in ref ranges.
-            if not isinstance(num_range, int):
-                num_ranges.append(num_range)
-                range_start = next_range_start
-                continue
-            # Look for sequences of three or more sequential numbers.
-            for range_end in range(range_start + 2, len(nums)):
-                if not isinstance(nums[range_end], int):
-                    break  # Ref with subpart, so can't be in a ref range.
-                if range_end - range_start != nums[range_end] - nums[range_start]:
-                    break  # Non-sequential numbers found, so break out of loop.
-                # Otherwise, extend the current range.
-                num_range = [nums[range_start], nums[range_end]]
-                # 3 or more sequential numbers found, so next possible range must start after this one.
-                next_range_start = range_end + 1
-            # Append the range (or single number) just found to the list of range.
-            num_ranges.append(num_range)
-            # Point to the start of the next possible range and keep looking.
-            range_start = next_range_start
-
-        return num_ranges
-
-    prefix_nums = {}  # Contains a list of numbers for each distinct prefix.
-    for ref in refs:
-        # Partition each part reference into its beginning part prefix and ending number.
-        match = re.search(PART_REF_REGEX, ref)
-        if match:
-            prefix = match.group('prefix')
-            num = match.group('num')
-        else:
-            # The not `match` happens when the user schematic designer use
-            # not recognized characters by the `PART_REF_REGEX` definition
-            # into the components references.
-            raise ValueError('Not recognized characters used in <' + ref + '> reference. Advise: edit it in your BOM/Schematic.')
-
-        # Append the number to the list of numbers for this prefix, or create a list
-        # with a single number if this is the first time a particular prefix was encountered.
-        prefix_nums.setdefault(prefix, []).append(num)
-
-    # Convert the list of numbers for each ref prefix into ranges.
-    if collapse:
-        for prefix in list(prefix_nums.keys()):
-            prefix_nums[prefix] = convert_to_ranges(prefix_nums[prefix])
-    else:
-        for prefix in list(prefix_nums.keys()):
-            def get_refnum(refnum):
-                return int(re.match('\d+', refnum).group(0))
-            prefix_nums[prefix].sort(key=get_refnum)
-
-    # Combine the prefixes and number ranges back into part references.
-    collapsed_refs = []
-    for prefix, nums in list(prefix_nums.items()):
-        for num in nums:
-            if isinstance(num, list):
-                # Convert a range list into a collapsed part reference:
-                # e.g., 'R10-R15' from 'R':[10,15].
-                collapsed_refs.append('{0}{1}-{0}{2}'.format(prefix, num[0], num[-1]))
-            else:
-                # Convert a single number into a simple part reference: e.g., 'R10'.
-                collapsed_refs.append('{}{}'.format(prefix, num))
-
-    return collapsed_refs # Return the collapsed par references.
-
-
-def split_refs(text):
-    '''@brief Split string grouped references into a unique designator. This is intended as opposite of `order_refs(?, collapse=True)`
-       
-       'C17/18/19/20' --> ['C17','C18','C19','C20']
-       'C17\18\19\20' --> ['C17','C18','C19','C20']
-       'D33-D36' --> ['D33','D34','D35','D36']
-       'D33-36' --> ['D33','D34','D35','D36']
-       Also ignore some characters as '.' or ':' used in some cases of references.
-       
-       @param text Designator/references worn by a group of parts.
-       @return Designator/references `list()` split.
-    '''
-    partial_ref = re.split(' *[,; ] *', text) # Split ignoring the spaces.
-    refs = []
-    for ref in partial_ref:
-        # Remove invalid characters. Changed `PART_REF_REGEX_SPECIAL_CHAR_REF` definition and allowed special characters.
-        #ref = re.sub('\+$', 'p', ref) # Finishing "+".
-        ref = re.sub(PART_REF_REGEX_NOT_ALLOWED, '', ref) # Generic special characters not allowed. To work around #ISSUE #89.
-        #ref = re.sub('\-+', '-', ref) # Double "-".
-        #ref = re.sub('^\-', '', ref) # Starting "-".
-        #ref = re.sub('\-$', 'n', ref) # Finishing "-".
-        if re.search('^\w+\d', ref):
-            if re.search('-', ref):
-                designator_name = re.findall('^\D+', ref)[0]
-                split_nums = re.split('-', ref)
-                designator_name += ''.join( re.findall('^d*\W', split_nums[0] ) )
-                split_nums = [re.sub(designator_name,'',split_nums[i]) for i in range(len(split_nums))]
-                
-                # Some EDAs may use some separator in the reference numeric parts, as
-                # Altium that use "." (or even other) e.g. "R2.1,R2.2" to the same "R2"
-                # replicated between schematics / rooms.
-                base_split_nums = ''.join( re.findall('^\d+\D', split_nums[0]) )
-                split_nums = [''.join( re.findall('\D*(\d+)$', n) ) for n in split_nums]
-                
-                split = list( range( int(split_nums[0]), int(split_nums[1])+1 ) )
-                #split = [designator_name+str(split[i]) for i in range(len(split)) ]
-                split = [designator_name +base_split_nums+str(split[i]) for i in range(len(split)) ]
-                
-                refs += split
-            elif re.search('[/\\\]', ref):
-                designator_name = re.findall('^\D+',ref)[0]
-                split_nums = [re.sub('^'+designator_name, '', i) for i in re.split('[/\\\]',ref)]
-                refs += [designator_name+i for i in split_nums]
-            else:
-                refs += [ref.strip()]
-        else:
-            # The designator name is not for a group of components and 
-            # "\", "/" or "-" is part of the name. This characters have
-            # to be removed.
-            ref = re.sub('[\-\/\\\]', '', ref.strip())
-            if not re.search(PART_REF_REGEX, ref).group('num'):
-                # Add a '0' number at the end to be compatible with KiCad/KiCost
-                # ref strings. This may be missing in the hand made BoM.
-                ref += '0'
-            refs += [ref]
-    return refs
+    logger.log(DEBUG_OBSESSIVE, 'part/qty>> %s\t\tpart>>%s\tqty>>%s', subpart, part, qty)
+    return qty_value(qty), part
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+# MIT license
+#
+# Copyright (C) 2018 by XESS Corporation / Hildo Guillardi Júnior
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+# Author information.
+__author__ = 'Hildo Guillardi Junior'
+__webpage__ = 'https://github.com/hildogjr/'
+__company__ = 'University of Campinas - Brazil'
+
+# Libraries.
+import re # Regular expression parser and matches.
+from ..global_vars import SEPRTR
+
+__all__ = ['order_refs', 'split_refs', 'parse_ref']
+
+SUB_SEPRTR  = '#' # Subpart separator for a part reference.
+
+# Characters removed from references when read the files.
+PART_REF_REGEX_NOT_ALLOWED = '[\+\(\)\*\{}]'.format(SEPRTR)
+# Regular expression for detecting part reference ids consisting of a
+# prefix of letters followed by a sequence of digits, such as 'LED10'
+# or a sequence of digits followed by a subpart number like 'CONN1#3'.
+# There can even be an interposer alphabetical and some special
+# characters so 'LED.10', 'LED_10', 'LED_BLUE-10', 'TEST&PIN+2',
+# 'TEST+SUPPLY' or 'R4.10' is also OK.
+# Also references with numbers at the end, just if the interlocutor,
+# part are allowed by some EDAs or manual edition in KiCad.
+# In the case of multiple project BOM files, the references are
+# modified by adding the project number identification followed
+# by `SEPRTR` definition.
+PART_REF_REGEX_SPECIAL_CHAR_REF = '\+\-\=\s\_\.\(\)\$\*\&' # Used in next definition only (because repeat).
+PART_REF_REGEX = re.compile('(?P<prefix>([a-z]*(?P<prj>\d+){p_sp})?(?P<ref>[a-z{sc}\d]*[a-z{sc}]))(?P<num>((?P<ref_num>\d+(\.\d+)?)({sp}(?P<subpart_num>\d+))?)?)'.format(p_sp=SEPRTR, sc=PART_REF_REGEX_SPECIAL_CHAR_REF, sp=SUB_SEPRTR), re.IGNORECASE)
+
+# Patterns used by `split_refs()`, compiled once here because they are
+# applied to each one of the references read from the BOM files.
+SPLIT_REFS_SEPRTR = re.compile(' *[,; ] *')
+REF_NOT_ALLOWED = re.compile(PART_REF_REGEX_NOT_ALLOWED)
+REF_GROUPED = re.compile('^\w+\d')
+REF_DESIGNATOR = re.compile('^\D+')
+REF_DESIGNATOR_EXTRA = re.compile('^d*\W')
+REF_BASE_NUM = re.compile('^\d+\D')
+REF_LAST_NUM = re.compile('\D*(\d+)$')
+REF_LIST_SEPRTR = re.compile('[/\\\]')
+REF_RANGE_CHARS = re.compile('[\-\/\\\]')
+REF_LEADING_NUM = re.compile('\d+')
+
+# Cache of the parsed references, shared by all the calls of `order_refs()`
+# because the same references are ordered many times during one run (on
+# the parts grouping, scraping messages and the spreadsheet creation).
+# It is cleared when it reaches `PARSED_REFS_CACHE_MAX` entries.
+PARSED_REFS_CACHE_MAX = 100000
+parsed_refs_cache = {}
+
+
+def parse_ref(ref):
+    '''@brief Partition a part reference into its prefix and number.
+
+       'R10' -> ('R', '10', 10, 10)
+       'CONN1#3' -> ('CONN', '1#3', 1, '1#3')
+       'prj1:C4' -> ('prj1:C', '4', 4, 4)
+       The results are cached, so each reference is parsed just once.
+
+       @param ref Designator/reference `str()`.
+       @return (prefix, num, sort_key, value) Where `num` is the number
+       `str()` of the reference, `sort_key` the `int()` of its leading
+       digits used to order the references and `value` the `int()` of
+       the number (or the `str()` itself if it have subpart or decimal
+       separators, these ones are never collapsed in ranges).
+    '''
+    try:
+        return parsed_refs_cache[ref]
+    except KeyError:
+        pass
+    match = PART_REF_REGEX.search(ref)
+    if not match:
+        # The not `match` happens when the user schematic designer use
+        # not recognized characters by the `PART_REF_REGEX` definition
+        # into the components references.
+        raise ValueError('Not recognized characters used in <' + ref + '> reference. Advise: edit it in your BOM/Schematic.')
+    prefix = match.group('prefix')
+    num = match.group('num')
+    leading_num = REF_LEADING_NUM.match(num)
+    sort_key = int(leading_num.group(0)) if leading_num else -1
+    try:
+        value = int(num)
+    except ValueError:
+        value = num
+    if len(parsed_refs_cache) >= PARSED_REFS_CACHE_MAX:
+        parsed_refs_cache.clear()
+    parsed_refs_cache[ref] = parsed = (prefix, num, sort_key, value)
+    return parsed
+
+
+def collapse_ranges(values):
+    '''@brief Collapse a sorted list of numbers into hyphenated ranges.
+
+       e.g.: 3,4,7,8,9,10,11,13,14 => 3,4,[7,11],13,14
+       Runs of 3 or more sequential numbers are collapsed, the references
+       numbers with subparts (that are not `int()`) are never included in
+       a range. This is done in just one pass over the list.
+
+       @param values Sorted `list()` of the `int()` or `str()` numbers.
+       @return `list()` of numbers and `[first, last]` ranges.
+    '''
+    num_ranges = []
+    range_start = 0
+    num_values = len(values)
+    while range_start < num_values:
+        first = values[range_start]
+        range_end = range_start
+        if isinstance(first, int):
+            # Extend the range while the next number is the sequence.
+            while range_end + 1 < num_values \
+                    and isinstance(values[range_end + 1], int) \
+                    and values[range_end + 1] == values[range_end] + 1:
+                range_end += 1
+        if range_end - range_start >= 2:
+            num_ranges.append([first, values[range_end]])
+        else:
+            num_ranges.extend(values[range_start:range_end + 1])
+        range_start = range_end + 1
+    return num_ranges
+
+
+def order_refs(refs, collapse=True):
+    '''@brief Collapse list of part references into a sorted, comma-separated list of hyphenated ranges. This is intended as opposite of `split_refs()`
+       @param refs Designator/references `list()`.
+       @param collapse Collapse or not the sequential references in ranges.
+       @return References in a organized view way.
+    '''
+
+    # Partition each part reference into its beginning part prefix and
+    # ending number. Append the number to the list of numbers for this
+    # prefix, or create a list with a single number if this is the first
+    # time a particular prefix was encountered.
+    prefix_nums = {}  # Contains a list of numbers for each distinct prefix.
+    prefix_order = []  # Prefixes by the first time they were encountered.
+    for ref in refs:
+        parsed = parse_ref(ref)
+        try:
+            prefix_nums[parsed[0]].append(parsed)
+        except KeyError:
+            prefix_nums[parsed[0]] = [parsed]
+            prefix_order.append(parsed[0])
+
+    # Sort the numbers of each ref prefix and, if asked, convert them
+    # into ranges. Then combine the prefixes and number ranges back into
+    # part references.
+    collapsed_refs = []
+    for prefix in prefix_order:
+        nums = sorted(prefix_nums[prefix], key=lambda parsed: parsed[2])
+        if not collapse:
+            collapsed_refs.extend([prefix + parsed[1] for parsed in nums])
+            continue
+        for num in collapse_ranges([parsed[3] for parsed in nums]):
+            if isinstance(num, list):
+                # Convert a range list into a collapsed part reference:
+                # e.g., 'R10-R15' from 'R':[10,15].
+                collapsed_refs.append('{0}{1}-{0}{2}'.format(prefix, num[0], num[-1]))
+            else:
+                # Convert a single number into a simple part reference: e.g., 'R10'.
+                collapsed_refs.append('{}{}'.format(prefix, num))
+
+    return collapsed_refs # Return the collapsed par references.
+
+
+def split_refs(text):
+    '''@brief Split string grouped references into a unique designator. This is intended as opposite of `order_refs(?, collapse=True)`
+
+       'C17/18/19/20' --> ['C17','C18','C19','C20']
+       'C17\18\19\20' --> ['C17','C18','C19','C20']
+       'D33-D36' --> ['D33','D34','D35','D36']
+       'D33-36' --> ['D33','D34','D35','D36']
+       Also ignore some characters as '.' or ':' used in some cases of references.
+
+       @param text Designator/references worn by a group of parts.
+       @return Designator/references `list()` split.
+    '''
+    partial_ref = SPLIT_REFS_SEPRTR.split(text) # Split ignoring the spaces.
+    refs = []
+    for ref in partial_ref:
+        # Remove invalid characters. Changed `PART_REF_REGEX_SPECIAL_CHAR_REF` definition and allowed special characters.
+        ref = REF_NOT_ALLOWED.sub('', ref) # Generic special characters not allowed. To work around #ISSUE #89.
+        if REF_GROUPED.search(ref):
+            if '-' in ref:
+                designator_name = REF_DESIGNATOR.findall(ref)[0]
+                split_nums = ref.split('-')
+                designator_name += ''.join( REF_DESIGNATOR_EXTRA.findall(split_nums[0]) )
+                split_nums = [n.replace(designator_name, '') for n in split_nums]
+
+                # Some EDAs may use some separator in the reference numeric parts, as
+                # Altium that use "." (or even other) e.g. "R2.1,R2.2" to the same "R2"
+                # replicated between schematics / rooms.
+                base_split_nums = ''.join( REF_BASE_NUM.findall(split_nums[0]) )
+                split_nums = [''.join( REF_LAST_NUM.findall(n) ) for n in split_nums]
+
+                refs += [designator_name + base_split_nums + str(i)
+                            for i in range( int(split_nums[0]), int(split_nums[1])+1 )]
+            elif REF_LIST_SEPRTR.search(ref):
+                designator_name = REF_DESIGNATOR.findall(ref)[0]
+                split_nums = [n[len(designator_name):] if n.startswith(designator_name) else n
+                                for n in REF_LIST_SEPRTR.split(ref)]
+                refs += [designator_name+i for i in split_nums]
+            else:
+                refs += [ref.strip()]
+        else:
+            # The designator name is not for a group of components and
+            # "\", "/" or "-" is part of the name. This characters have
+            # to be removed.
+            ref = REF_RANGE_CHARS.sub('', ref.strip())
+            if not PART_REF_REGEX.search(ref).group('num'):
+                # Add a '0' number at the end to be compatible with KiCad/KiCost
+                # ref strings. This may be missing in the hand made BoM.
+                ref += '0'
+            refs += [ref]
+    return refs
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# MIT license
+#
+# Copyright (C) 2018 by XESS Corporation / Hildo Guillardi Júnior
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Machine-readable outputs of the part groups and their distributors pricing.
+
+   Alternatives to the XLSX spreadsheet without formulas or formatting, the
+   writers are registered in `export_format_dict` by format name:
+   - 'json': One JSON document with the projects information and the parts.
+   - 'jsonl': JSON-lines, one part group by line.
+   - 'csv': One row by part group, distributor and price break.
+   - 'parquet': The same rows of the CSV in a Parquet table (needs `pyarrow`).
+   In the JSON outputs each part group has its distributors data nested, in
+   the tabular ones the part data is repeated in each row.
+'''
+
+# Libraries.
+import os
+import io
+import csv
+import json
+from fractions import Fraction
+
+from .global_vars import logger, DEBUG_OVERVIEW
+from .distributors.global_vars import distributor_dict
+from .eda_tools.eda_tools import order_refs
+
+__all__ = ['export_parts', 'export_format', 'export_format_dict']
+
+# Part fields exported, the user fields are added after them.
+EXPORT_FIELDS = ['value', 'desc', 'footprint', 'manf', 'manf#']
+# Columns of the distributor data of the tabular outputs.
+EXPORT_DIST_COLUMNS = ['dist', 'dist_part_num', 'url', 'qty_avail', 'purch', 'break_qty', 'unit_price']
+
+
+def qty_number(qty):
+    '''Quantity as `int()` or, if fractional, `float()`.'''
+    qty = Fraction(qty)
+    return qty.numerator if qty.denominator == 1 else float(qty)
+
+
+def part_records(parts, user_fields, collapse_refs=True, purchases=None):
+    '''@brief Create the exported records of the part groups.
+       @param parts `list()` of part groups, with the distributors data scraped.
+       @param user_fields `list()` of the extra fields to export.
+       @param collapse_refs `bool()` Collapse the references in ranges.
+       @param purchases `list()` of the (distributor, quantity, cost) purchased
+       of each part or `None`, see `optimizer.purchase_plan()`.
+       @return `list()` of the part `dict()` records.
+    '''
+    web_dists = sorted([d for d in distributor_dict if distributor_dict[d]['scrape'] != 'local'])
+    local_dists = sorted([d for d in distributor_dict if distributor_dict[d]['scrape'] == 'local'
+                                                          and d != 'local_template'])
+    dists = web_dists + local_dists
+    fields = EXPORT_FIELDS + [f.lower() for f in user_fields if f.lower() not in EXPORT_FIELDS]
+
+    records = []
+    for i_part, part in enumerate(parts):
+        qty = part.fields.get('manf#_qty')
+        if qty is None:
+            qty = len(part.refs)
+        record = {
+            'refs': ','.join(order_refs(part.refs, collapse=collapse_refs)),
+            'qty': qty_number(sum(qty, Fraction(0)) if isinstance(qty, list) else qty),
+        }
+        if isinstance(qty, list):
+            record['qty_prj'] = [qty_number(q) for q in qty]
+        for field in fields:
+            record[field] = part.fields.get(field)
+        purchase = purchases[i_part] if purchases else None
+        record['dists'] = {}
+        for dist in dists:
+            if not part.part_num.get(dist):
+                continue
+            record['dists'][dist] = {
+                'part_num': part.part_num[dist],
+                'url': part.url[dist],
+                'qty_avail': part.qty_avail[dist],
+                'purch': purchase[1] if purchase and purchase[0] == dist else None,
+                # The quantity-zero break is added by the spreadsheet, skip it.
+                'price_tiers': sorted([q, p] for q, p in (part.price_tiers[dist] or {}).items() if q > 0),
+            }
+        records.append(record)
+    return records
+
+
+def flat_rows(records):
+    '''@brief Rows of the tabular outputs, one by part, distributor and price break.
+       @param records `list()` given by `part_records()`.
+       @return Iterator of the row `dict()`.
+    '''
+    for record in records:
+        part_data = {k: v for k, v in record.items() if k not in ('dists', 'qty_prj')}
+        if not record['dists']:
+            row = dict(part_data)
+            row.update({c: None for c in EXPORT_DIST_COLUMNS})
+            yield row
+            continue
+        for dist, dist_data in record['dists'].items():
+            for break_qty, unit_price in dist_data['price_tiers'] or [[None, None]]:
+                row = dict(part_data)
+                row.update({
+                    'dist': dist,
+                    'dist_part_num': dist_data['part_num'],
+                    'url': dist_data['url'],
+                    'qty_avail': dist_data['qty_avail'],
+                    'purch': dist_data['purch'],
+                    'break_qty': break_qty,
+                    'unit_price': unit_price,
+                })
+                yield row
+
+
+def row_columns(records):
+    '''Columns of the tabular outputs, in order.'''
+    part_columns = [k for k in records[0] if k not in ('dists', 'qty_prj')] if records else []
+    return part_columns + EXPORT_DIST_COLUMNS
+
+
+def write_json(filename, records, prj_info):
+    with io.open(filename, 'w', encoding='utf-8') as output:
+        output.write(json.dumps({'prj_info': prj_info, 'parts': records}, ensure_ascii=False))
+
+
+def write_jsonl(filename, records, prj_info):
+    with io.open(filename, 'w', encoding='utf-8') as output:
+        for record in records:
+            output.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+
+def write_csv(filename, records, prj_info):
+    with io.open(filename, 'w', encoding='utf-8', newline='') as output:
+        writer = csv.DictWriter(output, fieldnames=row_columns(records), lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(flat_rows(records))
+
+
+def write_parquet(filename, records, prj_info):
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        logger.critical('The Parquet output needs PyArrow, install it by `pip install pyarrow`.')
+        raise
+    columns = row_columns(records)
+    data = {c: [] for c in columns}
+    for row in flat_rows(records):
+        for c in columns:
+            data[c].append(row[c])
+    # The quantities may be fractional, keep all of them as float.
+    data['qty'] = [float(q) for q in data['qty']]
+    pyarrow.parquet.write_table(pyarrow.Table.from_pydict(data), filename)
+
+
+# Output formats, its files extensions and writer function.
+export_format_dict = {
+    'json': {'extensions': ['.json'], 'writer': write_json},
+    'jsonl': {'extensions': ['.jsonl', '.ndjson'], 'writer': write_jsonl},
+    'csv': {'extensions': ['.csv'], 'writer': write_csv},
+    'parquet': {'extensions': ['.parquet'], 'writer': write_parquet},
+}
+
+
+def export_format(filename):
+    '''@brief Output format of a file name, by its extension.
+       @return Format name `str()` of `export_format_dict` or `None`.
+    '''
+    ext = os.path.splitext(filename)[1].lower()
+    for fmt, definition in export_format_dict.items():
+        if ext in definition['extensions']:
+            return fmt
+    return None
+
+
+def export_parts(out_format, filename, parts, prj_info, user_fields,
+                 collapse_refs=True, purchases=None):
+    '''@brief Write the part groups and their distributors data in a machine-readable format.
+       @param out_format Format name `str()` of `export_format_dict`.
+       @param filename Output file name `str()`.
+       @param parts `list()` of part groups, with the distributors data scraped.
+       @param prj_info `list()` of the projects information `dict()`.
+       @param user_fields `list()` of the extra fields to export.
+       @param collapse_refs `bool()` Collapse the references in ranges.
+       @param purchases `list()` of the purchase of each part, see `part_records()`.
+    '''
+    logger.log(DEBUG_OVERVIEW, 'Creating the \'%s\' %s file...', filename, out_format)
+    records = part_records(parts, user_fields, collapse_refs, purchases)
+    export_format_dict[out_format]['writer'](filename, records, prj_info)
@@ -36,6 +36,26 @@ DEBUG_HTTP_HEADERS = logging.DEBUG-3
 DEBUG_HTTP_RESPONSES = logging.DEBUG-4
 # Minimum possible log level is logging.DEBUG-9 !
 
+class LazyLog(object):
+    '''@brief Defer an expensive logging argument until the message is emitted.
+
+       The `logging` module only calls `str()` on the arguments of a message
+       that passes the level check, so wrapping the computation here costs
+       just this object creation when the level is disabled, e.g.:
+       `logger.log(DEBUG_OBSESSIVE, 'Refs %s', LazyLog(order_refs, refs))`.
+    '''
+    __slots__ = ('func', 'args', 'kwargs')
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        return str(self.func(*self.args, **self.kwargs))
+
+    __repr__ = __str__
+
 SEPRTR = ':'  # Delimiter between library:component, distributor:field, etc.
 
 currency = CurrencyConverter()
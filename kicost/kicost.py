@@ -27,11 +27,14 @@ from future import standard_library
 standard_library.install_aliases()
 import future
 
-import sys, os
+import sys, os, re
+import copy
 import pprint
 import tqdm
 from time import time
+from fractions import Fraction # Exact part quantities.
 from multiprocessing.pool import ThreadPool
+from queue import Queue
 
 # Stops UnicodeDecodeError exceptions.
 try:
@@ -45,33 +48,47 @@ except NameError:
 # Also requires installation of Qt4.8 (not 5!) and pyside.
 #from ghost import Ghost
 
-__all__ = ['kicost','output_filename']  # Only export this routine for use by the outside world.
+__all__ = ['kicost','output_filename','batch_filenames']  # Only export this routine for use by the outside world.
 
 from .global_vars import *
 
 # Import information about various distributors.
 from .distributors import *
 from .distributors.global_vars import distributor_dict
+from .distributors.distributor import distributor as distributor_base
+from .distributors.url_cache import url_cache, URL_CACHE_FILE, MISS_TTL
+from .distributors.fake_browser import fake_browser, BREAKER_RATIO
+from .distributors.session_cache import session_cache, SESSION_CACHE_FILE
 
 # Import information for various EDA tools.
 from .eda_tools import eda_modules
-from .eda_tools.eda_tools import subpartqty_split, group_parts
+from .eda_tools.eda_tools import subpartqty_split, group_parts, groups_sort, BOM_ORDER
 
 from .spreadsheet import * # Creation of the final XLSX spreadsheet.
+from .snapshot import write_snapshot, read_snapshot, reuse_scraped_data, group_key, Checkpoint, DEFAULT_TTL # Scraped data storage.
+from .exporters import export_parts, export_format, export_format_dict # Machine-readable outputs.
+from .priority import scrape_order, serve_stale_data, DEFAULT_PRIORITY # Order of the parts scraping.
 
 def kicost(in_file, eda_tool_name, out_filename,
         user_fields, ignore_fields, group_fields, variant,
         dist_list=list(distributor_dict.keys()),
         num_processes=4, scrape_retries=5, throttling_delay=5.0,
-        collapse_refs=True,
-        local_currency='USD'):
+        collapse_refs=True, bom_order=BOM_ORDER,
+        local_currency='USD', constant_memory=False, static_order=False,
+        price_table=False, price_comments=True,
+        board_qty=DEFAULT_BUILD_QTY, optimize=False, fill_purch=False,
+        sweep_qtys=None, snapshot=None, from_snapshot=None, out_format=None,
+        multi_variant=None, incremental=None, ttl=DEFAULT_TTL,
+        url_cache_file=URL_CACHE_FILE, miss_ttl=MISS_TTL, breaker_ratio=BREAKER_RATIO,
+        session_cache_file=SESSION_CACHE_FILE, batch=False,
+        priority=DEFAULT_PRIORITY, time_budget=None, checkpoint=None, resume=False):
     ''' @brief Run KiCost.
     
     Take a schematic input file and create an output file with a cost spreadsheet in xlsx format.
     
     @param in_file `list(str())` List of the names of the input BOM files.
     @param eda_tool_name `list(str())` of the EDA modules to be used to open the `in_file`list.
-    @param out_filename `str()` XLSX output file name.
+    @param out_filename `str()` XLSX (or `out_format`) output file name.
     @param user_fields `list()` of the user fields to be included on the spreadsheet global part.
     @param ignore_fields `list()` of the fields to be ignored on the read EDA modules.
     @param group_fields `list()` of the fields to be grouped/merged on the function group parts that
@@ -86,7 +103,274 @@ def kicost(in_file, eda_tool_name, out_filename,
     distributor's website.
     @param collapse_refs `bool()` Collapse or not the designator references in the spreadsheet.
     Default `True`.
+    @param bom_order `str()` Comma separated designators order of the parts groups in the
+    spreadsheet. Default `BOM_ORDER`.
     @param local_currency `str()` Local/country in ISO3166:2 and currency in ISO4217. Default 'USD'.
+    @param constant_memory `bool()` Write the spreadsheet rows directly to the file, using less
+    memory for big BOMs. Default `False`.
+    @param static_order `bool()` Choose the part of each purchase order line when creating the
+    spreadsheet instead of using array formulas, faster to recalculate big BOMs. Default `False`.
+    @param price_table `bool()` Store the price breaks in a hidden worksheet referenced by the unit
+    price cells, instead of inlining them in each formula. Default `False`.
+    @param price_comments `bool()` Add the price breaks as comment of the unit price cells. Default `True`.
+    @param board_qty `int()` Quantity of boards to build (of each project). Default `DEFAULT_BUILD_QTY`.
+    @param optimize `bool()` Compute the cheapest purchase of the parts for `board_qty` boards
+    (needs NumPy). Default `False`.
+    @param fill_purch `bool()` Fill the cheapest purchase in the spreadsheet `purch` columns,
+    implies `optimize`. Default `False`.
+    @param sweep_qtys `list(int())` Board quantities to compute the cost of the cheapest purchase,
+    added in the spreadsheet and in a CSV file (`out_filename` with `_sweep.csv`). Default `None`.
+    @param snapshot `str()` File name to write the snapshot of the part groups and their
+    scraped data (see `snapshot.py`). Default `None`.
+    @param from_snapshot `str()` Snapshot file name to create the spreadsheet from, instead of
+    reading the BOM files and scraping the distributors. Default `None`.
+    @param out_format `str()` Output format, 'xlsx' or one of `exporters.export_format_dict`
+    (without the spreadsheet formulas and formatting). Default `None`, by the `out_filename`
+    extension or 'xlsx'.
+    @param multi_variant `str()` Cost each one of the `variant` list (applied to all the BOM
+    files), reading and scraping the parts of all of them at once: 'sheets' to create one
+    spreadsheet with a worksheet by variant or 'files' to create one output file by variant
+    (`out_filename` with the variant name, as the `snapshot` and `from_snapshot` files).
+    Default `None`, `variant` is the list of the variant of each BOM file.
+    @param incremental `str()` Snapshot file name of a previous run, the part groups found in it
+    (by their manufacturer, codes and distributor specific fields) reuse its data instead of
+    being scraped, and then it is written with the new part groups. Default `None`.
+    @param ttl `float()` Hours that the data of the `incremental` snapshot is reused, `None` to
+    not expire. Default `DEFAULT_TTL`.
+    @param url_cache_file `str()` File of the product page URLs found for the part numbers,
+    requested directly by the next runs instead of searching the parts (see
+    `distributors/url_cache.py`), `None` to not use it. Default `URL_CACHE_FILE`.
+    @param miss_ttl `float()` Hours that the parts not found in the `url_cache_file` are not
+    searched again, `None` to not expire. Default `MISS_TTL`.
+    @param breaker_ratio `float()` Ratio of failed requests to a distributor site that trips its
+    circuit breaker, skipping the next requests but a periodic probe (see `fake_browser.py`),
+    `None` or 0 to not skip. Default `BREAKER_RATIO`.
+    @param session_cache_file `str()` File of the distributors web sessions (cookies and localized
+    sites), reused by the next runs for `SESSION_TTL` hours instead of starting new ones (see
+    `distributors/session_cache.py`), `None` to not use it. Default `SESSION_CACHE_FILE`.
+    @param batch `bool()` Cost each BOM file of `in_file` apart, in one output file by BOM
+    (see `batch_filenames()`, `out_filename` is the directory of the outputs or `None` for
+    the directory of each BOM, and the `snapshot` and `from_snapshot` files have the BOM
+    name), reading the BOM files and writing the outputs in parallel and scraping the parts
+    of all of them at once. Default `False`.
+    @param priority `list()` of the `priority.PRIORITY_KEYS` ordering the parts to scrape, the
+    most important first. Default `DEFAULT_PRIORITY`.
+    @param time_budget `float()` Seconds to scrape the parts, the ones left get the data of the
+    `incremental` snapshot (even if older than `ttl`) or no data (see `priority.py`), `None`
+    to scrape all of them. Default `None`.
+    @param checkpoint `str()` File name to append the data of each part as soon as it is scraped
+    at each distributor, removed when all the parts are scraped (see `snapshot.Checkpoint`).
+    Default `None`.
+    @param resume `bool()` Read the `checkpoint` of a run that did not finish and scrape just
+    the parts and distributors missing in it. Default `False`.
+    @return `list()` of the cheapest purchase of each part group (see `optimizer.purchase_plan()`)
+    if `optimize` or `fill_purch`, else `None`. In the `multi_variant` mode, the `list()` of
+    them for each variant and, in the `batch` mode, for each BOM file.
+    '''
+
+    if multi_variant and isinstance(variant, list) and len(variant) > 1:
+        # The part groups and projects information of each variant.
+        if from_snapshot:
+            variants_parts, variants_prj_info = [], []
+            for i, v in enumerate(variant):
+                p, info = read_snapshot(variant_filename(from_snapshot, v, i))
+                variants_parts.append(groups_sort(p, bom_order))
+                variants_prj_info.append(info)
+        else:
+            previous_parts = read_previous_parts([variant_filename(incremental, v, i)
+                for i, v in enumerate(variant)]) if incremental else None
+            variants_parts, variants_prj_info, variant = scrape_part_groups(in_file,
+                eda_tool_name, user_fields, ignore_fields, group_fields, variant,
+                dist_list, num_processes, scrape_retries, throttling_delay, bom_order,
+                local_currency, multi_variant=True, previous_parts=previous_parts, ttl=ttl,
+                url_cache_file=url_cache_file, miss_ttl=miss_ttl, breaker_ratio=breaker_ratio,
+                session_cache_file=session_cache_file, priority=priority,
+                time_budget=time_budget, checkpoint=checkpoint, resume=resume)
+            for filename in (snapshot, incremental):
+                if filename:
+                    for i, (v, p, info) in enumerate(zip(variant, variants_parts, variants_prj_info)):
+                        write_snapshot(variant_filename(filename, v, i), p, info)
+        outputs = [{'variant': v, 'parts': p, 'prj_info': info, 'title': 'Variant ' + v,
+                    'filename': variant_filename(out_filename, v, i)}
+                   for i, (v, p, info) in enumerate(zip(variant, variants_parts, variants_prj_info))]
+    elif batch:
+        # The part groups and projects information of each BOM file.
+        if not isinstance(in_file, list):
+            in_file = [in_file]
+        names = [os.path.splitext(os.path.basename(f))[0] for f in batch_filenames(in_file)]
+        if from_snapshot:
+            boms_parts, boms_prj_info = [], []
+            for i, name in enumerate(names):
+                p, info = read_snapshot(variant_filename(from_snapshot, name, i))
+                boms_parts.append(groups_sort(p, bom_order))
+                boms_prj_info.append(info)
+            if not isinstance(variant, list):
+                variant = [variant] * len(in_file)
+        else:
+            previous_parts = read_previous_parts([variant_filename(incremental, name, i)
+                for i, name in enumerate(names)]) if incremental else None
+            boms_parts, boms_prj_info, variant = scrape_part_groups(in_file,
+                eda_tool_name, user_fields, ignore_fields, group_fields, variant,
+                dist_list, num_processes, scrape_retries, throttling_delay, bom_order,
+                local_currency, batch=True, previous_parts=previous_parts, ttl=ttl,
+                url_cache_file=url_cache_file, miss_ttl=miss_ttl, breaker_ratio=breaker_ratio,
+                session_cache_file=session_cache_file, priority=priority,
+                time_budget=time_budget, checkpoint=checkpoint, resume=resume)
+            for filename in (snapshot, incremental):
+                if filename:
+                    for i, (name, p, info) in enumerate(zip(names, boms_parts, boms_prj_info)):
+                        write_snapshot(variant_filename(filename, name, i), p, info)
+        if out_format is None:
+            out_format = 'xlsx'
+        out_ext = '.xlsx' if out_format == 'xlsx' else export_format_dict[out_format]['extensions'][0]
+        outputs = [{'variant': v, 'parts': p, 'prj_info': info, 'title': 'BOM ' + name,
+                    'filename': filename}
+                   for name, v, p, info, filename in zip(names, variant, boms_parts, boms_prj_info,
+                       batch_filenames(in_file, out_filename, out_ext))]
+    else:
+        if from_snapshot:
+            # Create the spreadsheet of the part groups and scraped data of a previous run.
+            parts, prj_info = read_snapshot(from_snapshot)
+            parts = groups_sort(parts, bom_order)
+            if not isinstance(variant, list):
+                variant = [variant] * len(prj_info)
+        else:
+            previous_parts = read_previous_parts([incremental]) if incremental else None
+            parts, prj_info, variant = scrape_part_groups(in_file, eda_tool_name,
+                user_fields, ignore_fields, group_fields, variant, dist_list,
+                num_processes, scrape_retries, throttling_delay, bom_order,
+                local_currency, previous_parts=previous_parts, ttl=ttl,
+                url_cache_file=url_cache_file, miss_ttl=miss_ttl, breaker_ratio=breaker_ratio,
+                session_cache_file=session_cache_file, priority=priority,
+                time_budget=time_budget, checkpoint=checkpoint, resume=resume)
+            for filename in (snapshot, incremental):
+                if filename:
+                    write_snapshot(filename, parts, prj_info)
+        outputs = [{'variant': '-'.join(variant) if len(variant)>1 else variant[0],
+                    'parts': parts, 'prj_info': prj_info, 'filename': out_filename}]
+
+    # Compute the cheapest purchase of the parts, before the spreadsheet
+    # creation that adds the quantity-zero price breaks.
+    if optimize or fill_purch or sweep_qtys:
+        try:
+            from .optimizer import purchase_plan, purchase_report, cost_sweep
+        except ImportError:
+            logger.critical('The purchase optimizer needs NumPy, install it by `pip install numpy`.')
+            raise
+    for output in outputs:
+        if optimize or fill_purch:
+            output['purchases'] = purchase_plan(output['parts'], board_qty)
+            if optimize:
+                if len(outputs) > 1:
+                    print('{}:'.format(output['title']))
+                print(purchase_report(output['parts'], output['purchases']))
+        if sweep_qtys:
+            output['cost_sweep'] = cost_sweep(output['parts'], sweep_qtys)
+            write_cost_sweep_csv(os.path.splitext(output['filename'])[0] + '_sweep.csv',
+                                 output['cost_sweep'])
+
+    if out_format is None:
+        out_format = export_format(out_filename) or 'xlsx'
+    if out_format == 'xlsx' and multi_variant != 'files' and not batch:
+        # Create the part pricing spreadsheet, with one worksheet by variant.
+        create_variants_spreadsheet([dict(o, purchases=o.get('purchases') if fill_purch else None)
+                                     for o in outputs], out_filename, collapse_refs, user_fields,
+                                    constant_memory, static_order, price_table, price_comments,
+                                    board_qty)
+    else:
+        def write_output(output):
+            if out_format != 'xlsx':
+                # Write just the part groups and their pricing, without formatting.
+                export_parts(out_format, output['filename'], output['parts'], output['prj_info'],
+                             user_fields, collapse_refs,
+                             output.get('purchases') if fill_purch else None)
+            else:
+                # Create the part pricing spreadsheet.
+                create_spreadsheet(output['parts'], output['prj_info'], output['filename'],
+                                  collapse_refs, user_fields, output['variant'],
+                                  constant_memory, static_order, price_table, price_comments,
+                                  board_qty, output.get('purchases') if fill_purch else None,
+                                  output.get('cost_sweep'))
+        if batch and len(outputs) > 1:
+            # The outputs of the BOM files do not share any data, write them at once.
+            pool = ThreadPool(min(num_processes, len(outputs)) or 1)
+            pool.map(write_output, outputs)
+            pool.close()
+            pool.join()
+        else:
+            for output in outputs:
+                write_output(output)
+
+    # Print component groups for debugging purposes.
+    if logger.isEnabledFor(DEBUG_DETAILED):
+        for part in [p for output in outputs for p in output['parts']]:
+            for f in dir(part):
+                if f.startswith('__'):
+                    continue
+                elif f.startswith('html_trees'):
+                    continue
+                elif callable(getattr(part, f, None)):
+                    continue
+                else:
+                    print('{} = '.format(f), end=' ')
+                    try:
+                        pprint.pprint(getattr(part, f))
+                    except TypeError:
+                        # Python 2.7 pprint has some problem ordering None and strings.
+                        print(getattr(part, f))
+                    except AttributeError:
+                        pass
+            print()
+
+    if len(outputs) > 1:
+        return [output.get('purchases') for output in outputs]
+    return outputs[0].get('purchases')
+
+
+def read_previous_parts(filenames):
+    ''' @brief Read the part groups of the snapshots of a previous run, the ones that exist.
+    @param filenames `list()` of the snapshot file names.
+    @return `list()` of the part groups.
+    '''
+    previous_parts = []
+    for filename in filenames:
+        if os.path.isfile(filename):
+            previous_parts += read_snapshot(filename, set_distributors=False)[0]
+        else:
+            logger.log(DEBUG_OVERVIEW, 'No previous snapshot %s, scraping all the parts.', filename)
+    return previous_parts
+
+
+def variant_filename(filename, variant, i_variant):
+    ''' @brief File name of one variant, `filename` with the variant name.
+    @param filename `str()` File name.
+    @param variant `str()` Variant (regular expression).
+    @param i_variant `int()` Index of the variant, used if its name has no valid characters.
+    @return `str()` file name.
+    '''
+    name = re.sub(r'[^\w\-]+', '_', variant).strip('_') or str(i_variant)
+    base, ext = os.path.splitext(filename)
+    return '{}.{}{}'.format(base, name, ext)
+
+
+def scrape_part_groups(in_file, eda_tool_name, user_fields, ignore_fields,
+        group_fields, variant, dist_list, num_processes, scrape_retries,
+        throttling_delay, bom_order, local_currency, multi_variant=False,
+        previous_parts=None, ttl=DEFAULT_TTL, url_cache_file=URL_CACHE_FILE,
+        miss_ttl=MISS_TTL, breaker_ratio=BREAKER_RATIO, session_cache_file=SESSION_CACHE_FILE,
+        batch=False, priority=DEFAULT_PRIORITY, time_budget=None, checkpoint=None,
+        resume=False):
+    ''' @brief Read the BOM files, group the identical parts and scrape their distributors data.
+
+    The parameters are the ones of `kicost()`.
+    @return (parts, prj_info, variant) `list()` of the part groups, the projects information
+    and the variant of each BOM file. If `multi_variant`, `variant` is the `list()` of the
+    variants to read all the BOM files with, and the part groups and projects information
+    returned are `list()` of them for each variant. If `batch`, they are the `list()` of
+    them for each BOM file, read apart. The data of the `previous_parts` groups
+    (of a previous run, see `snapshot.reuse_scraped_data()`) scraped up to `ttl` hours
+    ago is reused. The parts are scraped in the `priority` order (see `priority.py`) up to
+    `time_budget` seconds, keeping the data of each one in the `checkpoint` file.
     '''
 
     logger.log(DEBUG_OVERVIEW, 'Exchange rate: 1 EUR = %.2f USD' % currency.convert(1, 'EUR', 'USD'))
@@ -104,69 +388,34 @@ def kicost(in_file, eda_tool_name, out_filename,
         for d in list(distributor_dict.keys()):
             distributor_dict.pop(d, None)
 
-    # Deal with some code exception (only one EDA tool or variant
-    # informed in the multiple BOM files input).
-    if not isinstance(in_file,list):
-        in_file = [in_file]
-    if not isinstance(variant,list):
-        variant = [variant] * len(in_file)
-    elif len(variant) != len(in_file):
-        variant = [variant[0]] * len(in_file) #Assume the first as default.
-    if not isinstance(eda_tool_name,list):
-        eda_tool_name = [eda_tool_name] * len(in_file)
-    elif len(eda_tool_name) != len(in_file):
-        eda_tool_name = [eda_tool_name[0]] * len(in_file) #Assume the first as default.
-
-    # Get groups of identical parts.
-    parts = dict()
-    prj_info = list()
-    for i_prj in range(len(in_file)):
-        eda_tool_module = eda_modules[eda_tool_name[i_prj]]
-        p, info = eda_tool_module.get_part_groups(in_file[i_prj], ignore_fields, variant[i_prj])
-        p = subpartqty_split(p)
-        # In the case of multiple BOM files, add the project prefix identifier
-        # to each reference/designator. Use the field 'manf#_qty' to control
-        # each quantity goes to each project creating a `list()` with length
-        # of number of BOM files. This vector will be used in the `group_parts()`
-        # to create groups with elements of same 'manf#' that came for different
-        # projects.
-        if len(in_file)>1:
-            logger.log(DEBUG_OVERVIEW, 'Multi BOMs detected, attaching project identification to references...')
-            qty_base = ['0'] * len(in_file) # Base zero quantity vector.
-            for p_ref in list(p.keys()):
-                try:
-                    qty_base[i_prj] = p[p_ref]['manf#_qty']
-                except:
-                    qty_base[i_prj] = '1'
-                p[p_ref]['manf#_qty'] = qty_base.copy()
-                p[ 'prj' + str(i_prj) + SEPRTR + p_ref] = p.pop(p_ref)
-        parts.update( p.copy() )
-        prj_info.append( info.copy() )
-
-    # Group part out of the module to be possible to merge different
-    # project lists, ignore some field to merge given in the `group_fields`.
-    FIELDS_SPREADSHEET = ['refs', 'value', 'desc', 'footprint', 'manf', 'manf#']
-    FIELDS_MANFCAT = ([d + '#' for d in distributor_dict] + ['manf#'])
-    FIELDS_MANFQTY = ([d + '#_qty' for d in distributor_dict] + ['manf#_qty'])
-    FIELDS_IGNORE = FIELDS_SPREADSHEET + FIELDS_MANFCAT + FIELDS_MANFQTY + user_fields + ['pricing']
-    for ref, fields in list(parts.items()):
-        for f in fields:
-            # Merge all extra fields that read on the files that will
-            # not be displayed (Needed to check `user_fields`).
-            if f not in FIELDS_IGNORE and SEPRTR not in f and not f in group_fields: # Not include repetitive filed names or fields with the separator `:` defined on `SEPRTR`.
-                group_fields += [f]
-    # Some fields to be merged on specific EDA are enrolled bellow.
-    if 'kicad' in eda_tool_name:
-        group_fields += ['libpart'] # This field may be a mess on multiple sheet designs.
-    if len(set(eda_tool_name))>2:
-        # If more than one EDA software was used, ignore the 'footprint'
-        # field, because they could have different libraries names.
-        group_fields += ['footprint']
-    group_fields += ['desc', 'var'] # Always ignore 'desc' ('description')
-                                    # and 'var' ('variant') fields, merging
-                                    # the components in groups.
-    group_fields = set(group_fields)
-    parts = group_parts(parts, group_fields)
+    if multi_variant or batch:
+        # Read and group the parts of each variant (or BOM file), as done for
+        # just one of them, and scrape the identical groups of all of them just once.
+        if batch:
+            # The EDA tool and variant of each BOM file, or the first for all of them.
+            tools = eda_tool_name if isinstance(eda_tool_name, list) else [eda_tool_name]
+            variants = variant if isinstance(variant, list) else [variant]
+            reads = [(f, tools[i if len(tools) == len(in_file) else 0],
+                      variants[i if len(variants) == len(in_file) else 0])
+                     for i, f in enumerate(in_file)]
+        else:
+            reads = [(in_file, eda_tool_name, v) for v in variant]
+        def mt_read_part_groups(args):
+            f, tool, v = args
+            return read_part_groups(f, tool, user_fields, ignore_fields, list(group_fields),
+                                    v, bom_order)
+        pool = ThreadPool(min(num_processes, len(reads)) or 1)
+        results = pool.map(mt_read_part_groups, reads)
+        pool.close()
+        pool.join()
+        variants_parts = [p for p, _, _ in results]
+        variants_prj_info = [info for _, info, _ in results]
+        if batch:
+            variant = [v[0] for _, _, v in results]
+        parts, part_ids = unique_part_groups(variants_parts)
+    else:
+        parts, prj_info, variant = read_part_groups(in_file, eda_tool_name,
+            user_fields, ignore_fields, group_fields, variant, bom_order)
 
     # If do not have the manufacture code 'manf#' and just distributors codes,
     # check if is asked to scrap a distributor that do not have any code in the
@@ -196,8 +445,13 @@ def kicost(in_file, eda_tool_name, out_filename,
     logger.log(DEBUG_OBSESSIVE, "Initialising scraper with %d threads" % num_processes)
     logger.log(DEBUG_OBSESSIVE, "throttling_delay=%d" % throttling_delay)
 
+    # Scrape just the part groups without data of a previous run.
+    all_parts = parts
+    if previous_parts:
+        parts = reuse_scraped_data(parts, previous_parts, ttl)
+
     # Get the distributor product page for each part and scrape the part data.
-    if dist_list:
+    if dist_list and parts:
 
         scraping_progress = tqdm.tqdm(desc='Progress', \
             total=len(parts)*len(distributor_dict), unit='part', miniters=1)
@@ -226,6 +480,19 @@ def kicost(in_file, eda_tool_name, out_filename,
         logger.addHandler(logTqdmHandler)
         logger.removeHandler(logDefaultHandler)
 
+        # Scrape the most important parts first and, at the time budget, no more web lookups.
+        order = scrape_order(parts, priority, previous_parts)
+        deadline = None if time_budget is None else time() + time_budget
+        late = {} # Indexes of the parts not scraped in time, by distributor.
+
+        # Request the product pages found in the previous runs instead of searching the parts.
+        if url_cache_file:
+            distributor_base.url_cache = url_cache(url_cache_file, miss_ttl)
+        fake_browser.breaker_ratio = breaker_ratio
+        # Reuse the web sessions of the previous runs instead of starting new ones.
+        if session_cache_file:
+            fake_browser.sessions = session_cache(session_cache_file, local_currency)
+
         # Create thread pool to init multiple distributors simultaneously.
         pool = ThreadPool(num_processes)
 
@@ -246,7 +513,11 @@ def kicost(in_file, eda_tool_name, out_filename,
                     % (d, type(ex).__name__))
                 return (d, None)
 
-            if local_currency:
+            browser = getattr(instance, 'browser', None)
+            if browser is not None and browser.restored:
+                # Session of a previous run, already configured to the same locale and currency.
+                distributor_dict[d]['site'].update(browser.restored['site'])
+            elif local_currency:
                 logger.log(DEBUG_OVERVIEW, '# Configuring the distributors locale and currency...')
                 instance.define_locale_currency(local_currency)
             return (d, instance)
@@ -270,29 +541,48 @@ def kicost(in_file, eda_tool_name, out_filename,
 
         logger.log(DEBUG_OVERVIEW, '# Scraping part data for each component group...')
 
-        # Init part info dictionaries
-        for part in parts:
-            part.part_num = {}
-            part.url = {}
-            part.price_tiers = {}
-            part.qty_avail = {}
-            part.info_dist = {}
-
         num_processes = min(num_processes, len(distributor_dict))
 
+        # The parts scraped by a previous run that did not finish are not scraped again.
+        saved = Checkpoint(checkpoint, local_currency, resume) if checkpoint else None
+        todo = {}
+        for d in distributor_dict:
+            todo[d] = order
+            if saved and saved.rows:
+                todo[d] = []
+                for i in order:
+                    row = saved.get(d, parts[i])
+                    if row is None:
+                        todo[d].append(i)
+                    else:
+                        parts[i].set_dist_data(d, *row)
+                scraping_progress.update(len(order) - len(todo[d]))
+
+        def scrape_part(inst, i):
+            '''Scrape a part, return its result and if a request failed.'''
+            browser = getattr(inst, 'browser', None)
+            failed_requests = browser.failed_requests if browser else 0
+            result = inst.scrape_part(i, parts[i])
+            return result, browser is not None and browser.failed_requests != failed_requests
+
+        def store_result(result, failed):
+            id, dist, url, part_num, price_tiers, qty_avail, info_dist = result
+            parts[id].set_dist_data(dist, part_num, url, price_tiers, qty_avail, info_dist)
+            if failed:
+                # The part may be missing just by the failure, not kept as scraped.
+                parts[id].failed_dists.add(dist)
+            elif saved and distributor_dict[dist]['scrape'] != 'local':
+                saved.write(dist, parts[id], (part_num, url, price_tiers, qty_avail, info_dist))
+
         if num_processes <= 1:
             # Scrape data, one part at a time using single processing.
             for d in distributor_dict:
                 logger.log(DEBUG_OVERVIEW, "Scraping "+ distributor_dict[d]['instance'].name)
-                for i in range(len(parts)):
-                    id, dist, url, part_num, price_tiers, qty_avail, info_dist = \
-                        scrape_result = distributor_dict[d]['instance'].scrape_part(i, parts[i])
-
-                    parts[id].part_num[dist] = part_num
-                    parts[id].url[dist] = url
-                    parts[id].price_tiers[dist] = price_tiers
-                    parts[id].qty_avail[dist] = qty_avail
-                    parts[id].info_dist[dist] = info_dist # Extra distributor web page.
+                for i in todo[d]:
+                    if deadline is not None and distributor_dict[d]['scrape'] != 'local' and time() > deadline:
+                        late.setdefault(d, []).append(i)
+                    else:
+                        store_result(*scrape_part(distributor_dict[d]['instance'], i))
                     scraping_progress.update(1)
         else:
             # Scrape data, multiple parts at a time using multiprocessing.
@@ -302,38 +592,70 @@ def kicost(in_file, eda_tool_name, out_filename,
             # and avoid all kinds of pickle issues.
             pool = ThreadPool(num_processes)
 
+            # The threads queue the result of each part as soon as it is scraped (`None`
+            # for the ones left at the time budget and, at the end, for the distributor
+            # finished) and this thread stores them and writes the checkpoint meanwhile.
+            results_queue = Queue()
+
             # Package part data for passing to each process.
             # pool.async_apply needs at least two arguments per function so add dummy argument
             # (otherwise it fails with "arguments after * must be an iterable, not ...")
-            arg_sets = [(distributor_dict[d]['instance'], scraping_progress) for d in distributor_dict]
+            arg_sets = [(distributor_dict[d]['instance'], results_queue) for d in distributor_dict]
 
-            def mt_scrape_part(inst, progress):
+            def mt_scrape_part(inst, results_queue):
                 logger.log(DEBUG_OVERVIEW, "Scraping "+ inst.name)
-                retval = list()
-                for i in range(len(parts)):
-                    retval.append(inst.scrape_part(i, parts[i]))
-                    progress.update(1)
-                return retval
+                try:
+                    timed = deadline is not None and distributor_dict[inst.name]['scrape'] != 'local'
+                    for i in todo[inst.name]:
+                        if timed and time() > deadline:
+                            late.setdefault(inst.name, []).append(i)
+                            results_queue.put((None, False))
+                        else:
+                            results_queue.put(scrape_part(inst, i))
+                finally:
+                    results_queue.put(None)
 
             # Start the web scraping processes, one for each part.
             logger.log(DEBUG_OBSESSIVE, 'Starting {} parallel threads to scrap parts...'.format(num_processes))
             results = [pool.apply_async(mt_scrape_part, args) for args in arg_sets]
 
-            # Wait for all the processes to have results, then kill-off all the scraping processes.
+            # Consume the results while the other parts are scraped.
+            finished = 0
+            while finished < len(arg_sets):
+                item = results_queue.get()
+                if item is None:
+                    finished += 1
+                    continue
+                if item[0] is not None:
+                    store_result(*item)
+                scraping_progress.update(1)
+
+            # Kill-off all the scraping processes, raising their errors.
             pool.close()
             pool.join()
+            for res_proc in results:
+                res_proc.get()
             logger.log(DEBUG_OVERVIEW, 'All parallel threads finished with success.')
 
-            # Get the data from each process result structure.
-            for res_proc in results:
-                res_dist = res_proc.get()
-                for res_part in res_dist:
-                    id, dist, url, part_num, price_tiers, qty_avail, info_dist = res_part
-                    parts[id].part_num[dist] = part_num
-                    parts[id].url[dist] = url
-                    parts[id].price_tiers[dist] = price_tiers
-                    parts[id].qty_avail[dist] = qty_avail
-                    parts[id].info_dist[dist] = info_dist # Extra distributor web page.
+        if saved:
+            # Kept with the parts left at the time budget, to scrape them by resuming.
+            saved.close(remove=not late)
+        report_scrape_stats()
+        if late:
+            # The parts left get the data of the previous run, if any, marked as not scraped now.
+            served = serve_stale_data(parts, late, previous_parts)
+            for d in late:
+                message = ('{} not scraped for {} parts in the time budget, {} of them with the data '
+                           'of a previous run.').format(distributor_dict[d]['label'], len(late[d]), served[d])
+                distributor_dict[d]['failure'] = ' '.join(
+                    m for m in (distributor_dict[d].get('failure'), message) if m)
+                logger.warning(message)
+        if fake_browser.sessions:
+            save_sessions(fake_browser.sessions)
+            fake_browser.sessions = None
+        if distributor_base.url_cache:
+            distributor_base.url_cache.save()
+            distributor_base.url_cache = None
 
         # Return the print channel of the logging.
         logger.addHandler(logDefaultHandler)
@@ -343,28 +665,179 @@ def kicost(in_file, eda_tool_name, out_filename,
         # error when the program terminates.
         del scraping_progress
 
-    # Create the part pricing spreadsheet.
-    create_spreadsheet(parts, prj_info, out_filename, collapse_refs,
-                      user_fields, '-'.join(variant) if len(variant)>1 else variant[0])
+    parts = all_parts
+    if multi_variant or batch:
+        # Share the scraped data with the identical groups of the variants. The
+        # BOM files get a copy, because their outputs are written at once and
+        # the spreadsheet adds its price breaks.
+        for p, ids in zip(variants_parts, part_ids):
+            for part, i in zip(p, ids):
+                part.dist_data = copy.deepcopy(parts[i].dist_data) if batch else parts[i].dist_data
+                part.scrape_date = parts[i].scrape_date
+                part.failed_dists = parts[i].failed_dists
+        return variants_parts, variants_prj_info, variant
+    return parts, prj_info, variant
+
+
+def report_scrape_stats():
+    ''' @brief Log the requests to each distributor site and note the ones that failed.
+
+    The distributors whose circuit breaker tripped get a `failure` message in `distributor_dict`,
+    shown in the spreadsheet.
+    '''
+    for d in distributor_dict:
+        browser = getattr(distributor_dict[d].get('instance'), 'browser', None)
+        distributor_dict[d].pop('failure', None)
+        if browser is None:
+            continue # Local distributor.
+        logger.log(DEBUG_OVERVIEW, '%s: %d requests, %d failed and %d skipped; %d HTTP requests over %d connections.',
+                   d, browser.requests, browser.failed_requests, browser.skipped_requests,
+                   *browser.connection_stats())
+        if browser.breaker_trips:
+            distributor_dict[d]['failure'] = ('{} failed {} of {} requests, {} of them skipped '
+                'while failing. Some parts may be missing.').format(distributor_dict[d]['label'],
+                browser.failed_requests, browser.requests, browser.skipped_requests)
+            logger.warning(distributor_dict[d]['failure'])
+
+
+def save_sessions(sessions):
+    ''' @brief Cache the web sessions of the distributors for the next runs.
+
+    The sessions restored keep the date they were started, to expire on time. The session of a
+    distributor whose site was failing (see `report_scrape_stats()`) is not reused.
+    @param sessions `session_cache()` of the run.
+    '''
+    for d in distributor_dict:
+        browser = getattr(distributor_dict[d].get('instance'), 'browser', None)
+        if browser is None:
+            continue # Local distributor.
+        if browser.breaker_trips:
+            sessions.discard(d)
+        else:
+            sessions.set(d, distributor_dict[d]['site'], browser.get_state(),
+                         browser.restored['date'] if browser.restored else None)
+    sessions.save()
 
-    # Print component groups for debugging purposes.
-    if logger.isEnabledFor(DEBUG_DETAILED):
-        for part in parts:
-            for f in dir(part):
-                if f.startswith('__'):
-                    continue
-                elif f.startswith('html_trees'):
-                    continue
-                else:
-                    print('{} = '.format(f), end=' ')
-                    try:
-                        pprint.pprint(part.__dict__[f])
-                    except TypeError:
-                        # Python 2.7 pprint has some problem ordering None and strings.
-                        print(part.__dict__[f])
-                    except KeyError:
-                        pass
-            print()
+
+def read_part_groups(in_file, eda_tool_name, user_fields, ignore_fields,
+        group_fields, variant, bom_order):
+    ''' @brief Read the BOM files and group the identical parts.
+
+    The parameters are the ones of `kicost()`.
+    @return (parts, prj_info, variant) `list()` of the part groups sorted by `bom_order`,
+    the projects information and the variant of each BOM file.
+    '''
+
+    # Deal with some code exception (only one EDA tool or variant
+    # informed in the multiple BOM files input).
+    if not isinstance(in_file,list):
+        in_file = [in_file]
+    if not isinstance(variant,list):
+        variant = [variant] * len(in_file)
+    elif len(variant) != len(in_file):
+        variant = [variant[0]] * len(in_file) #Assume the first as default.
+    if not isinstance(eda_tool_name,list):
+        eda_tool_name = [eda_tool_name] * len(in_file)
+    elif len(eda_tool_name) != len(in_file):
+        eda_tool_name = [eda_tool_name[0]] * len(in_file) #Assume the first as default.
+
+    # Get groups of identical parts.
+    parts = dict()
+    prj_info = list()
+    for i_prj in range(len(in_file)):
+        eda_tool_module = eda_modules[eda_tool_name[i_prj]]
+        p, info = eda_tool_module.get_part_groups(in_file[i_prj], ignore_fields, variant[i_prj])
+        p = subpartqty_split(p)
+        # In the case of multiple BOM files, add the project prefix identifier
+        # to each reference/designator. Use the field 'manf#_qty' to control
+        # each quantity goes to each project creating a `list()` with length
+        # of number of BOM files. This vector will be used in the `group_parts()`
+        # to create groups with elements of same 'manf#' that came for different
+        # projects.
+        if len(in_file)>1:
+            logger.log(DEBUG_OVERVIEW, 'Multi BOMs detected, attaching project identification to references...')
+            qty_base = [Fraction(0)] * len(in_file) # Base zero quantity vector.
+            for p_ref in list(p.keys()):
+                try:
+                    qty_base[i_prj] = p[p_ref]['manf#_qty']
+                except KeyError:
+                    qty_base[i_prj] = Fraction(1)
+                p[p_ref]['manf#_qty'] = qty_base.copy()
+                p[ 'prj' + str(i_prj) + SEPRTR + p_ref] = p.pop(p_ref)
+        parts.update( p.copy() )
+        prj_info.append( info.copy() )
+
+    # Group part out of the module to be possible to merge different
+    # project lists, ignore some field to merge given in the `group_fields`.
+    FIELDS_SPREADSHEET = ['refs', 'value', 'desc', 'footprint', 'manf', 'manf#']
+    FIELDS_MANFCAT = ([d + '#' for d in distributor_dict] + ['manf#'])
+    FIELDS_MANFQTY = ([d + '#_qty' for d in distributor_dict] + ['manf#_qty'])
+    FIELDS_IGNORE = FIELDS_SPREADSHEET + FIELDS_MANFCAT + FIELDS_MANFQTY + user_fields + ['pricing']
+    for ref, fields in list(parts.items()):
+        for f in fields:
+            # Merge all extra fields that read on the files that will
+            # not be displayed (Needed to check `user_fields`).
+            if f not in FIELDS_IGNORE and SEPRTR not in f and not f in group_fields: # Not include repetitive filed names or fields with the separator `:` defined on `SEPRTR`.
+                group_fields += [f]
+    # Some fields to be merged on specific EDA are enrolled bellow.
+    if 'kicad' in eda_tool_name:
+        group_fields += ['libpart'] # This field may be a mess on multiple sheet designs.
+    if len(set(eda_tool_name))>2:
+        # If more than one EDA software was used, ignore the 'footprint'
+        # field, because they could have different libraries names.
+        group_fields += ['footprint']
+    group_fields += ['desc', 'var'] # Always ignore 'desc' ('description')
+                                    # and 'var' ('variant') fields, merging
+                                    # the components in groups.
+    group_fields = set(group_fields)
+    parts = group_parts(parts, group_fields)
+    parts = groups_sort(parts, bom_order)
+
+    return parts, prj_info, variant
+
+
+def unique_part_groups(variants_parts):
+    ''' @brief Join the part groups of many variants, without repetition.
+
+    The groups of different variants with the same fields (but the quantity)
+    are the same part, so they are scraped just once.
+    @param variants_parts `list()` with the `list()` of part groups of each variant.
+    @return (parts, part_ids) `list()` of the unique part groups and, for each
+    variant, the `list()` of the index of each of its groups in the unique ones.
+    '''
+    parts, part_ids, keys = [], [], {}
+    for variant_parts in variants_parts:
+        ids = []
+        for part in variant_parts:
+            key = group_key(part)
+            if key not in keys:
+                keys[key] = len(parts)
+                parts.append(part)
+            ids.append(keys[key])
+        part_ids.append(ids)
+    logger.log(DEBUG_OVERVIEW, '%d unique part groups in the %d variants.', len(parts), len(variants_parts))
+    return parts, part_ids
+
+
+def batch_filenames(files_input, dir_output=None, ext='.xlsx'):
+    ''' @brief Output file names of the BOM files costed apart (batch mode).
+
+    The name of each BOM file, with `ext`, in the `dir_output` folder or in
+    the folder of the BOM. The BOM files with the same name (of different
+    folders) get their index in `files_input` appended.
+    @param files_input `list()` of the input file names.
+    @param dir_output `str()` output folder, `None` for the folder of each BOM file.
+    @param ext `str()` output file extension.
+    @return `list()` of the file names.
+    '''
+    names = [os.path.splitext(os.path.basename(f))[0] for f in files_input]
+    file_outputs = []
+    for i, (input_name, name) in enumerate(zip(files_input, names)):
+        if names.count(name) > 1:
+            name += '_' + str(i)
+        file_outputs.append(os.path.join(os.path.dirname(input_name) if dir_output is None
+                                         else dir_output, name + ext))
+    return file_outputs
 
 
 
@@ -418,6 +418,10 @@ class formKiCost(wx.Frame):
         self.m_checkBox_overwrite.SetToolTip(wx.ToolTip(u"Allow overwriting of an existing spreadsheet."))
         bSizer11.Add(self.m_checkBox_overwrite, 0, wx.ALL, 5)
 
+        self.m_checkBox_incremental = wx.CheckBox(self.m_panel2, wx.ID_ANY, u"Incremental", wx.DefaultPosition, wx.DefaultSize, 0)
+        self.m_checkBox_incremental.SetToolTip(wx.ToolTip(u"Scrape just the parts changed since the last run, keeping its data in a '_snapshot.jsonl' file with the spreadsheet."))
+        bSizer11.Add(self.m_checkBox_incremental, 0, wx.ALL, 5)
+
 
         m_staticText = wx.StaticText(self.m_panel2, wx.ID_ANY, u"History keep:", wx.DefaultPosition, wx.DefaultSize, 0)
         m_staticText.Wrap(-1)
@@ -738,6 +742,10 @@ class formKiCost(wx.Frame):
         args.retries = self.m_spinCtrl_retries.GetValue() # Retry time in the scraps.
         args.throttling_delay = self.m_spinCtrlDouble_throttling.GetValue() # Delay between consecutive scrapes.
         args.collapse_refs = self.m_checkBox_collapseRefs.GetValue() # Collapse refs in the spreadsheet.
+        if self.m_checkBox_incremental.GetValue(): # Reuse the data scraped in the last run.
+            args.incremental = os.path.splitext(spreadsheet_file)[0] + '_snapshot.jsonl'
+        else:
+            args.incremental = None
 
         if self.m_listBox_edatool.GetStringSelection():
             for k,v in eda_tool_dict.items():
@@ -770,7 +778,7 @@ class formKiCost(wx.Frame):
                 group_fields=args.group_fields, variant=args.variant,
                 dist_list=args.include, num_processes=num_processes,
                 scrape_retries=args.retries, throttling_delay=args.throttling_delay,
-                local_currency=args.locale)
+                local_currency=args.locale, incremental=args.incremental)
         except Exception as e:
             logger.log(DEBUG_OVERVIEW, e)
             self.m_button_run.Enable()
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+# MIT license
+#
+# Copyright (C) 2018 by XESS Corporation / Hildo Guillardi Júnior
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Cheapest purchase plan of the part groups among the scraped distributors.
+
+   The same pricing of the spreadsheet formulas is used: the unit price of
+   a purchase quantity is the one of the highest price break not above it
+   (the lowest break price for quantities under it), and each part group is
+   bought from just one distributor with enough quantity available (or not
+   stocked, `None` or 0 available, shown as "NonStk" in the spreadsheet). Buying more than needed is chosen when a
+   higher price break makes it cheaper.
+   All the parts, distributors, price breaks and board quantities are
+   computed at once by NumPy arrays (an optional KiCost dependence).
+'''
+
+# Libraries.
+from fractions import Fraction
+import numpy as np
+
+from .global_vars import logger, DEBUG_OVERVIEW, DEBUG_OBSESSIVE
+from .distributors.global_vars import distributor_dict
+from .eda_tools.eda_tools import order_refs, dist_ids
+
+__all__ = ['optimize_purchase', 'purchase_plan', 'purchase_report', 'cost_sweep']
+
+# Maximum number of elements of the (board qty, part, distributor, price break)
+# arrays computed at once, the board quantities are split to not exceed it.
+MAX_ARRAY_SIZE = 2**22
+
+
+def part_qty(part):
+    '''@brief Quantity of a part group used in one board.
+       @param part Part group, `IdenticalComponents()`.
+       @return `Fraction()` of the quantity, the sum of the projects
+       quantities in the multifiles BOM case.
+    '''
+    qty = part.fields.get('manf#_qty')
+    if isinstance(qty, list):
+        return sum((Fraction(q) for q in qty), Fraction(0))
+    if qty is None:
+        return Fraction(len(part.refs))
+    return Fraction(qty)
+
+
+def price_arrays(parts, dists):
+    '''@brief Pack the price breaks and available quantities into arrays.
+
+       The distributors without a catalog number or price breaks of a part
+       have infinite break quantities and prices (they are never chosen) and
+       the not stocked parts infinite available quantity.
+
+       @param parts `list()` of part groups.
+       @param dists `list()` of the distributors names.
+       @return (qtys, prices, avail) `float` arrays of shapes (part,
+       distributor, break), (part, distributor, break) and (part,
+       distributor) with the breaks sorted by quantity.
+    '''
+    # Read the `dist_data` table of the part groups directly, collecting the
+    # indexes and values of all the breaks to fill the arrays at once.
+    ids = [dist_ids.get(dist) for dist in dists]
+    i_part, i_dist, i_break, break_qtys, break_prices = [], [], [], [], []
+    avail_index, avail_qtys = [], []
+    for i, part in enumerate(parts):
+        rows = part.dist_data or ()
+        for j, d in enumerate(ids):
+            try:
+                part_num, url, price_tiers, qty_avail, info_dist = rows[d]
+            except (IndexError, TypeError):
+                continue  # No data of this distributor.
+            if not part_num or not price_tiers:
+                continue
+            # The quantity-zero break is added by the spreadsheet, skip it.
+            qtys = sorted(q for q in price_tiers if q > 0)
+            i_part.extend([i] * len(qtys))
+            i_dist.extend([j] * len(qtys))
+            i_break.extend(range(len(qtys)))
+            break_qtys.extend(qtys)
+            break_prices.extend([price_tiers[q] for q in qtys])
+            if qty_avail:
+                avail_index.append((i, j))
+                avail_qtys.append(qty_avail)
+
+    num_breaks = max(i_break) + 1 if i_break else 1
+    qtys = np.full((len(parts), len(dists), num_breaks), np.inf)
+    prices = np.full((len(parts), len(dists), num_breaks), np.inf)
+    avail = np.full((len(parts), len(dists)), np.inf)
+    qtys[i_part, i_dist, i_break] = break_qtys
+    prices[i_part, i_dist, i_break] = break_prices
+    if avail_index:
+        avail[tuple(zip(*avail_index))] = avail_qtys
+    return qtys, prices, avail
+
+
+def optimize_purchase(parts, board_qtys=100, dists=None):
+    '''@brief Compute the cheapest purchase of each part group for some board quantities.
+
+       @param parts `list()` of part groups, with the distributors data scraped.
+       @param board_qtys `int()` or `list()` of the quantities of boards to build.
+       @param dists `list()` of the distributors names to buy from. Default, all of
+       `distributor_dict`.
+       @return `dict()` with the `dists` and `board_qtys` used and the arrays
+       (board qty, part) of the `needed` quantity, `dist` index to buy from (-1
+       if no distributor can supply it), `qty` to purchase and its `cost`
+       (`nan` if not purchased); and (board qty) arrays of the `total` cost
+       and number of `missing` parts not purchased.
+    '''
+    if dists is None:
+        dists = [d for d in distributor_dict if d != 'local_template']
+    board_qtys = np.atleast_1d(np.asarray(board_qtys, dtype=np.int64))
+    num_parts, num_dists = len(parts), len(dists)
+
+    # Needed quantity of each part, the `CEILING()` of the spreadsheet computed
+    # with the exact fraction of each part by board.
+    part_qtys = [part_qty(part) for part in parts]
+    num = np.array([q.numerator for q in part_qtys], dtype=np.int64)
+    den = np.array([q.denominator for q in part_qtys], dtype=np.int64)
+    needed = -(-board_qtys[:, None] * num[None, :] // den[None, :])
+
+    qtys, prices, avail = price_arrays(parts, dists)
+    num_breaks = qtys.shape[2]
+
+    dist = np.full(needed.shape, -1, dtype=np.int64)
+    qty = np.zeros(needed.shape, dtype=np.int64)
+    cost = np.full(needed.shape, np.nan)
+    if num_parts and num_dists:
+        chunk = max(1, MAX_ARRAY_SIZE // (num_parts * num_dists * num_breaks))
+        for start in range(0, len(board_qtys), chunk):
+            n = needed[start:start+chunk, :, None, None].astype(float)
+            # Unit price of exactly the needed quantity, by the price break
+            # that contains it (or the lowest one).
+            i_break = np.maximum((qtys[None] <= n).sum(axis=-1) - 1, 0)
+            needed_price = np.take_along_axis(
+                np.broadcast_to(prices, n.shape[:2] + prices.shape[1:]),
+                i_break[..., None], axis=-1)
+            # Candidates purchases: the needed quantity or the quantity of a
+            # higher price break, if it is available at the distributor.
+            buy = np.where(qtys[None] > n, qtys[None], n)
+            with np.errstate(invalid='ignore'):
+                buy_cost = np.where(qtys[None] > n, qtys[None] * prices[None], n * needed_price)
+            buy_cost = np.where(buy <= avail[None, :, :, None], buy_cost, np.inf)
+            # Cheapest candidate among all distributors and breaks (the first one
+            # on ties, so the smaller quantity and the first distributor).
+            buy_cost = buy_cost.reshape(buy_cost.shape[:2] + (-1,))
+            best = np.argmin(buy_cost, axis=-1)
+            best_cost = np.take_along_axis(buy_cost, best[..., None], axis=-1)[..., 0]
+            best_buy = np.take_along_axis(buy.reshape(buy.shape[:2] + (-1,)),
+                                          best[..., None], axis=-1)[..., 0]
+            found = np.isfinite(best_cost) & (needed[start:start+chunk] > 0)
+            dist[start:start+chunk] = np.where(found, best // num_breaks, -1)
+            qty[start:start+chunk] = np.where(found, best_buy, 0)
+            cost[start:start+chunk] = np.where(found, best_cost, np.nan)
+
+    plan = {
+        'dists': dists,
+        'board_qtys': board_qtys,
+        'needed': needed,
+        'dist': dist,
+        'qty': qty,
+        'cost': cost,
+        'total': np.nansum(cost, axis=1),
+        'missing': ((dist < 0) & (needed > 0)).sum(axis=1),
+    }
+    logger.log(DEBUG_OBSESSIVE, 'Purchase plan totals: %s', plan['total'])
+    return plan
+
+
+def purchase_plan(parts, board_qty=100, dists=None):
+    '''@brief Cheapest purchase of each part group for one board quantity.
+
+       @param parts `list()` of part groups, with the distributors data scraped.
+       @param board_qty `int()` Quantity of boards to build.
+       @param dists `list()` of the distributors names to buy from (see `optimize_purchase()`).
+       @return `list()` with, for each part group, the `tuple()` of the distributor
+       name, quantity to purchase and its cost or `None` if no distributor can
+       supply it.
+    '''
+    plan = optimize_purchase(parts, [board_qty], dists)
+    purchases = []
+    for i, part in enumerate(parts):
+        d = plan['dist'][0, i]
+        if d < 0:
+            if plan['needed'][0, i] > 0:
+                logger.log(DEBUG_OBSESSIVE, 'No distributor can supply %s of %s.',
+                           plan['needed'][0, i], part.refs)
+            purchases.append(None)
+        else:
+            purchases.append((plan['dists'][d], int(plan['qty'][0, i]), float(plan['cost'][0, i])))
+    if plan['missing'][0]:
+        logger.warning('No distributor can supply %d of the %d parts.', plan['missing'][0], len(parts))
+    logger.log(DEBUG_OVERVIEW, 'Cheapest purchase of %s boards: $%.2f.', board_qty, plan['total'][0])
+    return purchases
+
+
+def purchase_report(parts, purchases):
+    '''@brief Text table of a purchase plan.
+       @param parts `list()` of part groups.
+       @param purchases `list()` given by `purchase_plan()` for these parts.
+       @return `str()` with one line by part group and the total cost.
+    '''
+    lines = ['{:20} {:24} {:16} {:>8} {:>12}'.format('Refs', 'Manf#', 'Distributor', 'Qty', 'Cost')]
+    total = 0.0
+    for part, purchase in zip(parts, purchases):
+        refs = ','.join(order_refs(part.refs))
+        if purchase is None:
+            dist, qty, cost = '-', '', ''
+        else:
+            dist, qty, cost = purchase
+            total += cost
+            cost = '${:.2f}'.format(cost)
+        lines.append('{:20} {:24} {:16} {:>8} {:>12}'.format(
+                     refs[:20], str(part.fields.get('manf#', ''))[:24], dist, qty, cost))
+    lines.append('{:20} {:24} {:16} {:>8} {:>12}'.format('Total', '', '', '', '${:.2f}'.format(total)))
+    return '\n'.join(lines)
+
+
+def cost_sweep(parts, board_qtys, dists=None):
+    '''@brief Cost of the cheapest purchase of the parts for many board quantities.
+       @param parts `list()` of part groups, with the distributors data scraped.
+       @param board_qtys `list()` of the quantities of boards to build.
+       @param dists `list()` of the distributors names to buy from (see `optimize_purchase()`).
+       @return `list()` of the (board qty, total cost, unit cost, parts not found)
+       `tuple()` for each board quantity.
+    '''
+    plan = optimize_purchase(parts, board_qtys, dists)
+    return [(int(b), float(total), float(total) / b if b else 0.0, int(missing))
+            for b, total, missing in zip(plan['board_qtys'], plan['total'], plan['missing'])]
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# MIT license
+#
+# Copyright (C) 2018 by XESS Corporation / Hildo Guillardi Júnior
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+'''Order of the part groups to scrape at the distributors.
+
+   The distributors are scraped part by part and the parts are taken by
+   priority, so a run stopped by its time budget (or interrupted) has the
+   data of the most important parts. The priority is a `list()` of the
+   `PRIORITY_KEYS`, each one ordering the parts tied by the previous ones:
+
+   - 'uncached': the parts without data of a previous run first.
+   - 'cost': the highest quantity times last known (smallest break) price
+     first, the parts without a previous price at the end.
+   - 'ics': the integrated circuits first and the passives last.
+
+   The parts left when the time budget is over get the data of a previous
+   run, even if older than its time to live (see `serve_stale_data()`).
+'''
+
+# Libraries.
+import re
+from fractions import Fraction
+
+from .global_vars import logger, DEBUG_OVERVIEW, SEPRTR
+from .snapshot import group_key
+
+__all__ = ['scrape_order', 'serve_stale_data', 'PRIORITY_KEYS', 'DEFAULT_PRIORITY']
+
+PRIORITY_KEYS = ('uncached', 'cost', 'ics')
+DEFAULT_PRIORITY = ['uncached', 'cost', 'ics']
+IC_PREFIXES = ('U', 'IC')  # References of the integrated circuits.
+PASSIVE_PREFIXES = ('R', 'C', 'L', 'FB', 'RN', 'CN')  # References of the passives.
+
+
+def group_qty(part):
+    '''Quantity of a part group in one board, the sum of the projects quantities.'''
+    qty = part.fields.get('manf#_qty')
+    if isinstance(qty, list):
+        return sum((Fraction(q) for q in qty), Fraction(0))
+    return Fraction(1) if qty is None else Fraction(qty)
+
+
+def last_price(part):
+    '''@brief Last known unit price of a part group.
+       @return Lowest price of the smallest break among the distributors or `None`.
+    '''
+    prices = [tiers[min(tiers)] for tiers in part.price_tiers.values() if tiers]
+    return min(prices) if prices else None
+
+
+def ref_class(part):
+    '''0 for the integrated circuits, 2 for the passives and 1 for the other parts.'''
+    prefix = re.match(r'[A-Za-z]*', part.refs[0].split(SEPRTR)[-1]).group(0).upper() if part.refs else ''
+    if prefix in IC_PREFIXES:
+        return 0
+    return 2 if prefix in PASSIVE_PREFIXES else 1
+
+
+def previous_groups(previous_parts):
+    '''Part groups of a previous run by their `group_key()`, of any date.'''
+    return {group_key(p): p for p in previous_parts or [] if p.dist_data}
+
+
+def scrape_order(parts, priority=DEFAULT_PRIORITY, previous_parts=None):
+    '''@brief Order to scrape the part groups.
+       @param parts `list()` of the part groups to scrape.
+       @param priority `list()` of the `PRIORITY_KEYS`, the parts tied
+       keep the BOM order. `None` or empty for the BOM order.
+       @param previous_parts `list()` of the part groups of a previous
+       run, as read by `read_snapshot()`, with their last known prices.
+       @return `list()` of the indexes of `parts`.
+    '''
+    previous = previous_groups(previous_parts)
+    def sort_key(i):
+        previous_part = previous.get(group_key(parts[i]))
+        key = []
+        for k in priority or []:
+            if k == 'uncached':
+                key.append(0 if previous_part is None else 1)
+            elif k == 'cost':
+                price = last_price(previous_part) if previous_part is not None else None
+                key.append(-price * group_qty(parts[i]) if price is not None else 1)
+            elif k == 'ics':
+                key.append(ref_class(parts[i]))
+            else:
+                raise ValueError('Unknown scrape priority "{}", use one of {}.'.format(k, ', '.join(PRIORITY_KEYS)))
+        return key + [i]
+    return sorted(range(len(parts)), key=sort_key)
+
+
+def serve_stale_data(parts, late, previous_parts):
+    '''@brief Give the data of a previous run to the parts not scraped in time.
+       @param parts `list()` of the part groups to scrape.
+       @param late `dict()` of the distributor name to the `list()` of the
+       indexes of the `parts` not scraped.
+       @param previous_parts `list()` of the part groups of a previous run.
+       @return `dict()` of the distributor name to the count of parts that
+       got the previous data. Their `scrape_date` is the previous one, so
+       they are scraped again by the next incremental runs.
+    '''
+    previous = previous_groups(previous_parts)
+    served = {}
+    for dist, ids in late.items():
+        served[dist] = 0
+        for i in ids:
+            previous_part = previous.get(group_key(parts[i]))
+            if previous_part is None or dist not in previous_part.part_num or dist in previous_part.failed_dists:
+                continue
+            parts[i].set_dist_data(dist, *previous_part.dist_row(dist))
+            if parts[i].scrape_date is None or previous_part.scrape_date < parts[i].scrape_date:
+                parts[i].scrape_date = previous_part.scrape_date
+            served[dist] += 1
+        logger.log(DEBUG_OVERVIEW, '%s: %d parts not scraped in the time budget, %d with the data of a previous run.',
+                   dist, len(ids), served[dist])
+    return served
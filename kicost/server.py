@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+# MIT license
+#
+# Copyright (C) 2018 by XESS Corporation / Hildo Guillardi Júnior
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''KiCost service: a local HTTP/JSON API to run KiCost jobs (`kicost --serve`).
+
+   The service keeps the modules, currency rates, distributors browsers
+   (throttling, circuit breaker and connections, see `fake_browser.live`)
+   and the sessions and URL caches warm between the jobs, that are run one
+   by one in the order received. API:
+   - `POST /jobs` with a JSON job: `boms` list of `{"name": ..., "content": ...}`
+     BOM files, optional `eda_tool`, `format` ('xlsx' or one of
+     `exporters.export_format_dict`), `snapshot` (`true` to keep the
+     snapshot of the job) and `options` (the `JOB_OPTIONS` of `kicost()`).
+     Answers `202` with the job information, as the `GET` below.
+   - `GET /jobs/ID`: the job `status` ('queued', 'running', 'done' or
+     'failed'), `error` and times.
+   - `GET /jobs/ID/output` and `GET /jobs/ID/snapshot`: the files of a job done.
+   - `DELETE /jobs/ID`: forget a job (not running) and its files.
+   - `GET /status`: the service state.
+   The finished jobs are forgotten after `JOB_TTL` seconds, or when there
+   are more than `MAX_FINISHED_JOBS` (the oldest ones).
+'''
+
+# Libraries.
+import os
+import io
+import copy
+import json
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+from queue import Queue
+from socketserver import ThreadingMixIn
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from . import __version__
+from .global_vars import logger, DEBUG_OVERVIEW, DEBUG_DETAILED
+from .kicost import kicost
+from .distributors.global_vars import distributor_dict
+from .distributors.fake_browser import fake_browser
+from .exporters import export_format_dict
+
+__all__ = ['serve', 'make_server', 'DEFAULT_ADDRESS', 'JOB_OPTIONS']
+
+DEFAULT_ADDRESS = '127.0.0.1:8765'
+# Retention of the finished jobs and their files.
+MAX_FINISHED_JOBS = 100
+JOB_TTL = 24 * 3600 # Seconds.
+# `kicost()` arguments that the jobs may set.
+JOB_OPTIONS = ('user_fields', 'ignore_fields', 'group_fields', 'variant', 'dist_list',
+               'num_processes', 'scrape_retries', 'throttling_delay', 'collapse_refs',
+               'bom_order', 'local_currency', 'static_order', 'price_table', 'price_comments',
+               'board_qty', 'optimize', 'fill_purch', 'multi_variant', 'breaker_ratio',
+               'priority', 'time_budget')
+CONTENT_TYPES = {
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.json': 'application/json',
+    '.jsonl': 'application/x-ndjson',
+    '.csv': 'text/csv',
+}
+
+
+class Job(object):
+    '''A KiCost run asked to the service.'''
+
+    def __init__(self, arguments, job_dir):
+        self.id = uuid.uuid4().hex
+        self.arguments = arguments
+        self.dir = job_dir
+        self.status = 'queued'
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    def info(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+def job_arguments(request, defaults, job_dir):
+    '''@brief `kicost()` arguments of a job request, its BOM files are written to `job_dir`.
+       @param request `dict()` of the job, see the module documentation.
+       @param defaults `dict()` of the `kicost()` arguments of the service.
+       @param job_dir Directory `str()` of the job files.
+       @return `dict()` of the `kicost()` arguments.
+       @raise ValueError If the request is not valid.
+    '''
+    if not isinstance(request, dict):
+        raise ValueError('The job is not a JSON object.')
+    boms = request.get('boms')
+    if not boms or not isinstance(boms, list):
+        raise ValueError('No "boms" in the job.')
+    options = request.get('options') or {}
+    if not isinstance(options, dict):
+        raise ValueError('The "options" are not a JSON object.')
+    unknown = sorted(set(options) - set(JOB_OPTIONS))
+    if unknown:
+        raise ValueError('Unknown options: {}.'.format(', '.join(unknown)))
+    if options.get('multi_variant') not in (None, 'sheets'):
+        raise ValueError('Just the "sheets" `multi_variant` is supported.')
+    out_format = request.get('format') or 'xlsx'
+    if out_format == 'xlsx':
+        out_ext = '.xlsx'
+    elif out_format in export_format_dict:
+        out_ext = export_format_dict[out_format]['extensions'][0]
+    else:
+        raise ValueError('Unknown format "{}".'.format(out_format))
+
+    in_file = []
+    for i, bom in enumerate(boms):
+        try:
+            name = os.path.basename(bom.get('name') or 'bom{}.xml'.format(i))
+            path = os.path.join(job_dir, name)
+            if os.path.exists(path):
+                # Same name of other folder, append its index as `batch_filenames()`.
+                root, ext = os.path.splitext(path)
+                path = '{}_{}{}'.format(root, i, ext)
+            with io.open(path, 'w', encoding='utf-8') as f:
+                f.write(bom['content'])
+        except (AttributeError, KeyError, TypeError):
+            raise ValueError('The BOM {} has no "content".'.format(i))
+        in_file.append(path)
+    eda_tool = request.get('eda_tool') or \
+        ('csv' if all(f.lower().endswith('.csv') for f in in_file) else 'kicad')
+
+    arguments = {'user_fields': [], 'ignore_fields': [], 'group_fields': [], 'variant': ' '}
+    arguments.update(defaults)
+    arguments.update(options)
+    arguments.update(
+        in_file=in_file,
+        eda_tool_name=eda_tool,
+        out_filename=os.path.join(job_dir, os.path.splitext(os.path.basename(in_file[0]))[0] + out_ext),
+        out_format=out_format,
+        snapshot=os.path.join(job_dir, 'snapshot.jsonl') if request.get('snapshot') else None,
+    )
+    return arguments
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server_version = 'KiCost/' + __version__
+
+    def send_json(self, code, obj):
+        body = json.dumps(obj).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_file(self, filename):
+        with open(filename, 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES.get(os.path.splitext(filename)[1].lower(),
+                                                           'application/octet-stream'))
+        self.send_header('Content-Disposition', 'attachment; filename="{}"'.format(os.path.basename(filename)))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def path_parts(self):
+        return [p for p in self.path.split('?')[0].split('/') if p]
+
+    def do_GET(self):
+        parts = self.path_parts()
+        if parts == ['status']:
+            return self.send_json(200, self.server.status())
+        job = self.server.jobs.get(parts[1]) if len(parts) >= 2 and parts[0] == 'jobs' else None
+        if job is None:
+            return self.send_json(404, {'error': 'Not found.'})
+        if len(parts) == 2:
+            return self.send_json(200, job.info())
+        if len(parts) == 3 and parts[2] in ('output', 'snapshot'):
+            if job.status != 'done':
+                return self.send_json(409, {'error': 'The job is {}.'.format(job.status)})
+            filename = job.arguments['out_filename' if parts[2] == 'output' else 'snapshot']
+            if not filename or not os.path.isfile(filename):
+                return self.send_json(404, {'error': 'The job has no {}.'.format(parts[2])})
+            return self.send_file(filename)
+        self.send_json(404, {'error': 'Not found.'})
+
+    def do_POST(self):
+        if self.path_parts() != ['jobs']:
+            return self.send_json(404, {'error': 'Not found.'})
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            job = self.server.add_job(request)
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)})
+        self.send_json(202, job.info())
+
+    def do_DELETE(self):
+        parts = self.path_parts()
+        job = self.server.jobs.get(parts[1]) if len(parts) == 2 and parts[0] == 'jobs' else None
+        if job is None:
+            return self.send_json(404, {'error': 'Not found.'})
+        if job.status in ('queued', 'running'):
+            return self.send_json(409, {'error': 'The job is {}.'.format(job.status)})
+        self.server.remove_job(job)
+        self.send_json(200, job.info())
+
+    def log_message(self, format, *args):
+        logger.log(DEBUG_DETAILED, '%s %s', self.address_string(), format % args)
+
+
+class KiCostServer(ThreadingMixIn, HTTPServer):
+    '''HTTP server of the KiCost jobs, run one by one by a worker thread.'''
+    daemon_threads = True
+    max_finished_jobs = MAX_FINISHED_JOBS
+    job_ttl = JOB_TTL
+
+    def __init__(self, address, defaults):
+        HTTPServer.__init__(self, address, RequestHandler)
+        self.defaults = defaults
+        self.jobs = {}
+        self.queue = Queue()
+        self.running = None
+        # Each job starts with all the distributors, `kicost()` removes the ones not used.
+        self.distributors = copy.deepcopy({d: {k: v for k, v in distributor_dict[d].items() if k != 'instance'}
+                                           for d in distributor_dict})
+        self.worker = threading.Thread(target=self.run_jobs)
+        self.worker.daemon = True
+        self.worker.start()
+
+    def add_job(self, request):
+        self.expire_jobs()
+        job_dir = tempfile.mkdtemp(prefix='kicost_')
+        try:
+            job = Job(job_arguments(request, self.defaults, job_dir), job_dir)
+        except ValueError:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        self.jobs[job.id] = job
+        self.queue.put(job)
+        logger.log(DEBUG_OVERVIEW, 'Job %s queued.', job.id)
+        return job
+
+    def remove_job(self, job):
+        shutil.rmtree(job.dir, ignore_errors=True)
+        self.jobs.pop(job.id, None)
+
+    def expire_jobs(self):
+        '''Remove the finished jobs older than `job_ttl` or beyond the `max_finished_jobs` newest.'''
+        finished = sorted((j for j in list(self.jobs.values()) if j.finished is not None),
+                          key=lambda j: j.finished, reverse=True)
+        oldest = time.time() - self.job_ttl
+        for i, job in enumerate(finished):
+            if i >= self.max_finished_jobs or job.finished < oldest:
+                logger.log(DEBUG_DETAILED, 'Job %s expired.', job.id)
+                self.remove_job(job)
+
+    def status(self):
+        return {
+            'kicost': __version__,
+            'running': self.running,
+            'queued': sum(1 for j in self.jobs.values() if j.status == 'queued'),
+            'jobs': len(self.jobs),
+        }
+
+    def run_jobs(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            self.running = job.id
+            job.status = 'running'
+            job.started = time.time()
+            try:
+                kicost(**job.arguments)
+                job.status = 'done'
+            except (Exception, SystemExit) as e:
+                logger.error('Job %s failed: %s', job.id, e)
+                job.status = 'failed'
+                job.error = str(e) or type(e).__name__
+            finally:
+                distributor_dict.clear()
+                distributor_dict.update(copy.deepcopy(self.distributors))
+            job.finished = time.time()
+            self.running = None
+            logger.log(DEBUG_OVERVIEW, 'Job %s %s in %.1f s.', job.id, job.status, job.finished - job.started)
+            self.expire_jobs()
+
+    def server_close(self):
+        self.queue.put(None)
+        HTTPServer.server_close(self)
+        for job in list(self.jobs.values()):
+            self.remove_job(job)
+
+
+def make_server(address=DEFAULT_ADDRESS, defaults=None):
+    '''@brief Create the KiCost service, start it by `serve_forever()`.
+       @param address `str()` 'HOST:PORT' or 'PORT' to listen (on the local host).
+       @param defaults `dict()` of the `kicost()` arguments of the jobs, as the
+       caches and scraping options.
+       @return `KiCostServer()`.
+    '''
+    host, _, port = address.rpartition(':')
+    fake_browser.live = {} # Keep the distributors browsers between the jobs.
+    return KiCostServer((host or '127.0.0.1', int(port)), defaults or {})
+
+
+def serve(address=DEFAULT_ADDRESS, defaults=None):
+    '''@brief Run the KiCost service until interrupted, see `make_server()`.'''
+    server = make_server(address, defaults)
+    print('KiCost service listening on http://{}:{}/ ...'.format(*server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
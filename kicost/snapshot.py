@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+# MIT license
+#
+# Copyright (C) 2018 by XESS Corporation / Hildo Guillardi Júnior
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Snapshot of the grouped parts and the distributors scraped data.
+
+   The snapshot is a JSON-lines file: the first line is the header, with the
+   format `version`, the projects information and the distributors definitions
+   (as in `distributor_dict`, without the scraper instances), each one of the
+   next lines is a part group with its references, fields and, by distributor,
+   the `DIST_DATA_COLS` scraped and the `date` they were scraped. It allows to
+   create the spreadsheet again without reading the BOMs and scraping the
+   distributors, or to scrape again just the part groups changed since it was
+   written (see `reuse_scraped_data()`).
+
+   While scraping, the data of each part group scraped at each distributor
+   is appended to a checkpoint file, also JSON-lines (see `Checkpoint`), so
+   a run killed or crashed can resume without scraping it again.
+'''
+
+# Libraries.
+import io
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+from fractions import Fraction
+
+from . import __version__
+from .global_vars import logger, DEBUG_OVERVIEW, DEBUG_OBSESSIVE
+from .distributors.global_vars import distributor_dict
+from .eda_tools.eda_tools import IdenticalComponents, DIST_DATA_COLS
+
+__all__ = ['write_snapshot', 'read_snapshot', 'reuse_scraped_data', 'Checkpoint', 'DEFAULT_TTL']
+
+SNAPSHOT_FORMAT = 'kicost-snapshot'
+SNAPSHOT_VERSION = 1  # Increased on incompatible changes of the format.
+CHECKPOINT_FORMAT = 'kicost-checkpoint'
+CHECKPOINT_VERSION = 1  # Increased on incompatible changes of the format.
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+DEFAULT_TTL = 24  # Hours that the scraped data is reused, see `reuse_scraped_data()`.
+
+
+def encode_value(value):
+    '''JSON encoding of the values that are not JSON types, the `Fraction()` quantities.'''
+    if isinstance(value, Fraction):
+        return {'__fraction__': [value.numerator, value.denominator]}
+    raise TypeError('{!r} is not serializable in the snapshot.'.format(value))
+
+
+def decode_value(obj):
+    '''Decode the values encoded by `encode_value()`.'''
+    if '__fraction__' in obj:
+        return Fraction(*obj['__fraction__'])
+    return obj
+
+
+def dumps(obj):
+    '''Compact JSON line of a snapshot object.'''
+    return json.dumps(obj, default=encode_value, ensure_ascii=False, separators=(',', ':'))
+
+
+def encode_dist_row(row):
+    '''`dict()` of the `DIST_DATA_COLS` of a distributor data row, to be written as JSON.'''
+    data = dict(zip(DIST_DATA_COLS, row))
+    # JSON keys are strings, so keep the price tiers as pairs.
+    data['price_tiers'] = sorted((data['price_tiers'] or {}).items())
+    return data
+
+
+def decode_dist_row(data):
+    '''Distributor data row of a `dict()` written by `encode_dist_row()`.'''
+    data['price_tiers'] = {q: p for q, p in data['price_tiers']}
+    return [data[c] for c in DIST_DATA_COLS]
+
+
+def write_snapshot(filename, parts, prj_info):
+    '''@brief Write the part groups and their scraped data to a snapshot file.
+       @param filename Snapshot file name `str()`.
+       @param parts `list()` of part groups, `IdenticalComponents()`.
+       @param prj_info `list()` of the projects information `dict()`.
+    '''
+    logger.log(DEBUG_OVERVIEW, 'Writing the snapshot %s...', filename)
+    dists = {d: {k: v for k, v in distributor_dict[d].items() if k != 'instance'}
+             for d in distributor_dict}
+    date = datetime.now().strftime(DATE_FORMAT)
+    with io.open(filename, 'w', encoding='utf-8') as snapshot:
+        snapshot.write(dumps({
+            'format': SNAPSHOT_FORMAT,
+            'version': SNAPSHOT_VERSION,
+            'kicost': __version__,
+            'date': date,
+            'prj_info': prj_info,
+            'distributors': dists,
+        }) + '\n')
+        for part in parts:
+            dist_data = {}
+            for d in dists:
+                if d in part.part_num:
+                    dist_data[d] = encode_dist_row((part.part_num[d], part.url[d],
+                        part.price_tiers[d], part.qty_avail[d], part.info_dist[d]))
+            data = {
+                'refs': part.refs,
+                'fields': part.fields,
+                'dist_data': dist_data,
+                'date': part.scrape_date or date,
+            }
+            if part.failed_dists:
+                # Their look up failed, so scrape them again in the next run.
+                data['failed'] = sorted(part.failed_dists)
+            snapshot.write(dumps(data) + '\n')
+
+
+def read_snapshot(filename, set_distributors=True):
+    '''@brief Read the part groups and their scraped data from a snapshot file.
+
+       @param filename Snapshot file name `str()`.
+       @param set_distributors `bool()` Replace the `distributor_dict` by the
+       distributors of the snapshot.
+       @return (parts, prj_info) `list()` of the part groups and of the projects
+       information `dict()`.
+    '''
+    logger.log(DEBUG_OVERVIEW, 'Reading the snapshot %s...', filename)
+    with io.open(filename, encoding='utf-8') as snapshot:
+        try:
+            header = json.loads(snapshot.readline(), object_hook=decode_value)
+            if header.get('format') != SNAPSHOT_FORMAT:
+                raise ValueError
+        except (ValueError, AttributeError):
+            raise ValueError('{} is not a KiCost snapshot file.'.format(filename))
+        if header['version'] > SNAPSHOT_VERSION:
+            raise ValueError('Snapshot {} version {} is not supported by KiCost {}, update it.'.format(
+                             filename, header['version'], __version__))
+
+        if set_distributors:
+            distributor_dict.clear()
+            distributor_dict.update(header['distributors'])
+
+        parts = []
+        for line in snapshot:
+            if not line.strip():
+                continue
+            data = json.loads(line, object_hook=decode_value)
+            part = IdenticalComponents()
+            part.refs = data['refs']
+            part.fields = data['fields']
+            part.scrape_date = data.get('date', header['date'])
+            for d, dist_data in data['dist_data'].items():
+                part.set_dist_data(d, *decode_dist_row(dist_data))
+            part.failed_dists = set(data.get('failed', []))
+            parts.append(part)
+    return parts, header['prj_info']
+
+
+def group_key(part):
+    '''Key of the fields of a part group, but its quantity, that is not scraped.'''
+    return tuple(sorted((f, repr(v)) for f, v in part.fields.items() if f != 'manf#_qty'))
+
+
+def reuse_scraped_data(parts, previous_parts, ttl=DEFAULT_TTL):
+    '''@brief Reuse the scraped data of the part groups of a previous run.
+
+       The data of a previous group with the same fields (so the same
+       manufacturer code, distributors catalog numbers and distributor
+       specific fields) is reused if it was scraped for all the current web
+       distributors up to `ttl` hours ago, and none of its look ups failed.
+       The references and quantities may have changed.
+
+       @param parts `list()` of the part groups to scrape.
+       @param previous_parts `list()` of the part groups of the previous run,
+       as read by `read_snapshot()`.
+       @param ttl Hours that the scraped data is valid, `None` to not expire.
+       @return `list()` of the part groups that still need to be scraped.
+    '''
+    web_dists = [d for d in distributor_dict
+                 if distributor_dict[d]['scrape'] != 'local' and d != 'local_template']
+    oldest = None if ttl is None else datetime.now() - timedelta(hours=ttl)
+    previous = {}
+    for part in previous_parts:
+        if oldest and datetime.strptime(part.scrape_date, DATE_FORMAT) < oldest:
+            continue # Stale data.
+        if all(d in part.part_num and d not in part.failed_dists for d in web_dists):
+            previous[group_key(part)] = part
+
+    to_scrape = []
+    for part in parts:
+        previous_part = previous.get(group_key(part))
+        if previous_part is None:
+            to_scrape.append(part)
+            continue
+        logger.log(DEBUG_OBSESSIVE, 'Reusing the data of %s scraped at %s.', part.refs, previous_part.scrape_date)
+        part.dist_data = list(previous_part.dist_data) if previous_part.dist_data else None
+        part.scrape_date = previous_part.scrape_date
+    logger.log(DEBUG_OVERVIEW, 'Reusing the scraped data of %d of the %d part groups.',
+               len(parts) - len(to_scrape), len(parts))
+    return to_scrape
+
+
+class Checkpoint(object):
+    '''@brief Scraped data of the part groups, written as soon as each one is scraped.
+
+       Each line of the file is the data of a part group (by its
+       `group_key()`) at a distributor, after a header with the currency
+       asked. The file of a run that did not finish is read by `resume`,
+       its part groups are not scraped again at the same distributors.
+    '''
+
+    def __init__(self, filename, currency, resume=False):
+        self.filename = filename
+        self.lock = threading.Lock() # Safe to write from the scraping threads.
+        self.rows = {}
+        lines = self.read(currency) if resume and os.path.isfile(filename) else []
+        # Written again without the line that a killed run may have left partial.
+        self.file = io.open(filename, 'w', encoding='utf-8')
+        self.file.write(dumps({'format': CHECKPOINT_FORMAT, 'version': CHECKPOINT_VERSION,
+                               'currency': currency}) + '\n')
+        self.file.writelines(lines)
+        self.file.flush()
+
+    def read(self, currency):
+        '''Read the rows of the checkpoint file, return its valid lines.'''
+        lines = []
+        with io.open(self.filename, encoding='utf-8') as checkpoint:
+            try:
+                header = json.loads(checkpoint.readline())
+                if header.get('format') != CHECKPOINT_FORMAT or header['version'] != CHECKPOINT_VERSION:
+                    raise ValueError
+            except (ValueError, AttributeError, KeyError):
+                logger.warning('%s is not a KiCost checkpoint file, scraping all the parts.', self.filename)
+                return lines
+            if header.get('currency') != currency:
+                logger.warning('The checkpoint %s was scraped in %s, scraping all the parts.',
+                               self.filename, header.get('currency'))
+                return lines
+            for line in checkpoint:
+                try:
+                    data = json.loads(line, object_hook=decode_value)
+                    key = tuple(tuple(f) for f in data['key'])
+                    self.rows[(data['dist'], key)] = decode_dist_row(data['data'])
+                    lines.append(line.rstrip('\n') + '\n')
+                except (ValueError, KeyError, TypeError):
+                    break # Last line written partially when the run was killed.
+        logger.log(DEBUG_OVERVIEW, 'Resuming %d part groups scraped at the distributors from %s.',
+                   len(self.rows), self.filename)
+        return lines
+
+    def get(self, dist, part):
+        '''@brief Data of a part group scraped at a distributor.
+           @return `list()` with the `DIST_DATA_COLS` values or `None` if not scraped.
+        '''
+        return self.rows.get((dist, group_key(part)))
+
+    def write(self, dist, part, row):
+        '''Append the data row of a part group just scraped at a distributor.'''
+        line = dumps({'dist': dist, 'key': group_key(part), 'data': encode_dist_row(row)}) + '\n'
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+
+    def close(self, remove=False):
+        '''Close the file, `remove` it when the scraping is finished.'''
+        self.file.close()
+        if remove:
+            os.remove(self.filename)
@@ -28,6 +28,8 @@ __company__ = 'University of Campinas - Brazil'
 
 # Python libraries.
 import os
+import io
+import csv
 from datetime import datetime
 import re # Regular expression parser.
 import xlsxwriter # XLSX file interpreter.
@@ -37,9 +39,9 @@ from . import __version__ # Version control by @xesscorp and collaborator.
 from .global_vars import SEPRTR
 from .global_vars import logger, DEBUG_OVERVIEW, DEBUG_DETAILED, DEBUG_OBSESSIVE
 from .distributors.global_vars import distributor_dict # Distributors names and definitions to use in the spreadsheet.
-from .eda_tools.eda_tools import partgroup_qty, order_refs, PART_REF_REGEX
+from .eda_tools.eda_tools import partgroup_qty, order_refs
 
-__all__ = ['create_spreadsheet']
+__all__ = ['create_spreadsheet', 'create_variants_spreadsheet', 'write_cost_sweep_csv', 'DEFAULT_BUILD_QTY']
 
 # Regular expression to the link for one datasheet.
 DATASHEET_LINK_REGEX = re.compile('^(http(s)?:\/\/)?(www.)?[0-9a-z\.]+\/[0-9a-z\.\/\%\-\_]+(.pdf)?$', re.IGNORECASE)
@@ -47,35 +49,102 @@ DATASHEET_LINK_REGEX = re.compile('^(http(s)?:\/\/)?(www.)?[0-9a-z\.]+\/[0-9a-z\
 # Extra information characteristics of the components gotten in the page that will be displayed as comment in the 'cat#' column.
 EXTRA_INFO_DISPLAY = ['value', 'tolerance', 'footprint', 'power', 'current', 'voltage', 'frequency', 'temp_coeff', 'manf', 'size']
 
-
-def create_spreadsheet(parts, prj_info, spreadsheet_filename, collapse_refs, user_fields, variant):
-    '''Create a spreadsheet using the info for the parts (including their HTML trees).'''
+DEFAULT_BUILD_QTY = 100  # Default value for number of boards to build.
+
+# Name of the hidden worksheet holding the price breaks table (see `add_price_tiers()`).
+PRICE_TABLE_NAME = 'PriceBreaks'
+# Name of the worksheet with the costs for many board quantities (see `add_sweep_to_workbook()`).
+COST_SWEEP_NAME = 'CostSweep'
+# Columns of the costs for many board quantities.
+COST_SWEEP_COLUMNS = ['Board Qty', 'Total Cost', 'Unit Cost', 'Parts Not Found']
+
+# Columns for the various types of distributor-specific part data.
+DIST_COLUMNS = {
+    'avail': {
+        'col': 0,
+        # column offset within this distributor range of the worksheet.
+        'level': 1,  # Outline level (or hierarchy level) for this column.
+        'label': 'Avail',  # Column header label.
+        'width': None,  # Column width (default in this case).
+        'comment': '''Available quantity of each part at the distributor.
+Red -> No quantity available.
+Orange -> Too little quantity available.'''
+    },
+    'purch': {
+        'col': 1,
+        'level': 2,
+        'label': 'Purch',
+        'width': None,
+        'comment': 'Purchase quantity of each part from this distributor.\nRed -> Purchasing more than the available quantity.'
+    },
+    'unit_price': {
+        'col': 2,
+        'level': 2,
+        'label': 'Unit$',
+        'width': None,
+        'comment': 'Unit price of each part from this distributor.\nGreen -> lowest price.'
+    },
+    'ext_price': {
+        'col': 3,
+        'level': 0,
+        'label': 'Ext$',
+        'width': 15,  # Displays up to $9,999,999.99 without "###".
+        'comment': '(Unit Price) x (Purchase Qty) of each part from this distributor.\nRed -> Next price break is cheaper.\nGreen -> Cheapest supplier.'
+    },
+    'part_num': {
+        'col': 4,
+        'level': 2,
+        'label': 'Cat#',
+        'width': 15,
+        'comment': 'Distributor-assigned catalog number for each part and link to it\'s web page (ctrl-click). Extra distributor data is shown as comment.'
+    },
+}
+
+
+def create_spreadsheet(parts, prj_info, spreadsheet_filename, collapse_refs, user_fields, variant,
+                       constant_memory=False, static_order=False,
+                       price_table=False, price_comments=True,
+                       board_qty=DEFAULT_BUILD_QTY, purchases=None, cost_sweep=None):
+    '''Create a spreadsheet using the info for the parts (including their HTML trees).
+
+    The worksheet is written row by row, so `constant_memory` can be used to
+    flush each row to the file (instead of holding all the cells in memory).
+    `static_order` chooses the part of each purchase order line when creating
+    the spreadsheet, instead of using array formulas.
+    `price_table` stores the price breaks of all the parts in a hidden worksheet
+    referenced by the unit price cells, instead of inlining them in each formula.
+    `price_comments` adds the price breaks as comment of the unit price cells.
+    `board_qty` is the initial quantity of boards to build (of each project) and
+    `purchases` a `list()` with the (distributor, quantity) purchased of each
+    part (or `None`), e.g. by `optimizer.purchase_plan()`, filled in the `purch`
+    columns. The `cost_sweep` rows, by `optimizer.cost_sweep()`, are added in a
+    worksheet with a chart.'''
+
+    create_variants_spreadsheet([{'variant': variant, 'parts': parts, 'prj_info': prj_info,
+                                  'purchases': purchases, 'cost_sweep': cost_sweep}],
+                                spreadsheet_filename, collapse_refs, user_fields,
+                                constant_memory, static_order, price_table, price_comments,
+                                board_qty)
+
+
+def create_variants_spreadsheet(variants, spreadsheet_filename, collapse_refs, user_fields,
+                                constant_memory=False, static_order=False,
+                                price_table=False, price_comments=True,
+                                board_qty=DEFAULT_BUILD_QTY):
+    '''Create a spreadsheet with one pricing worksheet for each variant.
+
+    `variants` is a `list()` of `dict()` with the `variant` name, its `parts`
+    and `prj_info` and, optionally, its `purchases` and `cost_sweep` (as in
+    `create_spreadsheet()`). With more than one variant, the names defined in
+    each pricing worksheet (`BoardQty`, `TotalCost`, ...) are local to it.'''
     
     logger.log(DEBUG_OVERVIEW, 'Creating the \'{}\' spreadsheet...'.format(
                                     os.path.basename(spreadsheet_filename)) )
-    
-    MAX_LEN_WORKSHEET_NAME = 31 # Microsoft Excel allows a 31 characters longer
-                                # string for the worksheet name, Google
-                                #Spreadsheet 100 and LibreOffice Calc have no limit.
-    DEFAULT_BUILD_QTY = 100  # Default value for number of boards to build.
-    WORKSHEET_NAME = os.path.splitext(os.path.basename(spreadsheet_filename))[0] # Default name for pricing worksheet.
-    
-    if len(variant) > 0:
-        # Append an indication of the variant to the worksheet title.
-        # Remove any special characters that might be illegal in a 
-        # worksheet name since the variant might be a regular expression.
-        # Fix the maximum worksheet name, priorize the variant string cutting
-        # the board project.
-        variant = re.sub('[\[\]\\\/\|\?\*\:\(\)]','_',
-                            variant[:(MAX_LEN_WORKSHEET_NAME)])
-        WORKSHEET_NAME += '.'
-        WORKSHEET_NAME = WORKSHEET_NAME[:(MAX_LEN_WORKSHEET_NAME-len(variant))]
-        WORKSHEET_NAME += variant
-    else:
-        WORKSHEET_NAME = WORKSHEET_NAME[:MAX_LEN_WORKSHEET_NAME]
+    name = os.path.splitext(os.path.basename(spreadsheet_filename))[0] # Default name for pricing worksheet.
     
     # Create spreadsheet file.
-    with xlsxwriter.Workbook(spreadsheet_filename) as workbook:
+    with xlsxwriter.Workbook(spreadsheet_filename,
+                             {'constant_memory': constant_memory}) as workbook:
     
         # Create the various format styles used by various spreadsheet items.
         wrk_formats = {
@@ -159,87 +228,158 @@ def create_spreadsheet(parts, prj_info, spreadsheet_filename, collapse_refs, use
         for d in distributor_dict:
             wrk_formats[d] = workbook.add_format(distributor_dict[d]['wrk_hdr_format'])
 
-        # Create the worksheet that holds the pricing information.
-        wks = workbook.add_worksheet(WORKSHEET_NAME)
-
-        # Set the row & column for entering the part information in the sheet.
-        START_COL = 0
-        BOARD_QTY_ROW = 0
-        UNIT_COST_ROW = BOARD_QTY_ROW + 1
-        TOTAL_COST_ROW = BOARD_QTY_ROW + 2
-        START_ROW = 1+3*len(prj_info)
-        LABEL_ROW = START_ROW + 1
-        COL_HDR_ROW = LABEL_ROW + 1
-        FIRST_PART_ROW = COL_HDR_ROW + 1
-        LAST_PART_ROW = COL_HDR_ROW + len(parts) - 1
-        next_row = 0
-
-        # Load the global part information (not distributor-specific) into the sheet.
-        # next_col = the column immediately to the right of the global data.
-        # qty_col = the column where the quantity needed of each part is stored.
-        next_col, refs_col, qty_col = add_globals_to_worksheet(
-            wks, wrk_formats, START_ROW, START_COL, TOTAL_COST_ROW,
-            parts, user_fields, collapse_refs)
-        # Create a defined range for the global data.
-        workbook.define_name(
-            'global_part_data', '={wks_name}!{data_range}'.format(
-                wks_name= "'" + WORKSHEET_NAME + "'",
-                data_range=xl_range_abs(START_ROW, START_COL, LAST_PART_ROW,
-                                        next_col - 1)))
+        # Create the worksheets that hold the pricing information.
+        worksheets = [workbook.add_worksheet(worksheet_name(name, v['variant'])) for v in variants]
+
+        # Create the hidden worksheet with the price breaks of all the parts, it is
+        # filled (in the same order of the pricing rows) by the distributors blocks
+        # of all the pricing worksheets.
+        if price_table:
+            price_wks = workbook.add_worksheet(PRICE_TABLE_NAME)
+            price_wks.hide()
+            for col, label in enumerate(['Distributor', 'Cat#', 'Qty', 'Unit$']):
+                price_wks.write_string(0, col, label, wrk_formats['header'])
+            price_table = {'wks': price_wks, 'row': 1}
+        else:
+            price_table = None
+
+        for wks, v in zip(worksheets, variants):
+            add_pricing_worksheet(workbook, wks, wrk_formats, v['parts'], v['prj_info'],
+                                  collapse_refs, user_fields, static_order, price_table,
+                                  price_comments, board_qty, v.get('purchases'),
+                                  local_names=len(variants) > 1)
+
+        for v in variants:
+            if v.get('cost_sweep'):
+                add_sweep_to_workbook(workbook, wrk_formats, v['cost_sweep'],
+                    worksheet_name(COST_SWEEP_NAME, v['variant']) if len(variants) > 1 else COST_SWEEP_NAME)
 
+
+def worksheet_name(name, variant):
+    '''Worksheet name, `name` with an indication of the `variant`.'''
+    
+    MAX_LEN_WORKSHEET_NAME = 31 # Microsoft Excel allows a 31 characters longer
+                                # string for the worksheet name, Google
+                                #Spreadsheet 100 and LibreOffice Calc have no limit.
+    
+    if len(variant) > 0:
+        # Append an indication of the variant to the worksheet title.
+        # Remove any special characters that might be illegal in a 
+        # worksheet name since the variant might be a regular expression.
+        # Fix the maximum worksheet name, priorize the variant string cutting
+        # the board project.
+        variant = re.sub('[\[\]\\\/\|\?\*\:\(\)]','_',
+                            variant[:(MAX_LEN_WORKSHEET_NAME)])
+        name += '.'
+        name = name[:(MAX_LEN_WORKSHEET_NAME-len(variant))]
+        name += variant
+    else:
+        name = name[:MAX_LEN_WORKSHEET_NAME]
+    return name
+
+
+def add_pricing_worksheet(workbook, wks, wrk_formats, parts, prj_info, collapse_refs,
+                          user_fields, static_order, price_table, price_comments,
+                          board_qty, purchases, local_names=False):
+    '''Add the pricing information of the `parts` to the worksheet `wks`.
+
+    The names defined (as `BoardQty` and `TotalCost`) are global to the workbook
+    or, if `local_names`, local to the worksheet.'''
+
+    WORKSHEET_NAME = wks.name
+    # Prefix of the defined names.
+    scope = "'{}'!".format(WORKSHEET_NAME) if local_names else ''
+
+    # Set the row & column for entering the part information in the sheet.
+    START_COL = 0
+    BOARD_QTY_ROW = 0
+    UNIT_COST_ROW = BOARD_QTY_ROW + 1
+    TOTAL_COST_ROW = BOARD_QTY_ROW + 2
+    START_ROW = 1+3*len(prj_info)
+    LABEL_ROW = START_ROW + 1
+    COL_HDR_ROW = LABEL_ROW + 1
+    FIRST_PART_ROW = COL_HDR_ROW + 1
+    LAST_PART_ROW = COL_HDR_ROW + len(parts) - 1
+
+    # Get the columns of the global part information (not distributor-specific).
+    # next_col = the column immediately to the right of the global data.
+    # qty_col = the column where the quantity needed of each part is stored.
+    global_columns = get_globals_columns(parts, user_fields)
+    next_col = START_COL + len(global_columns)
+    refs_col = START_COL + global_columns['refs']['col']
+    qty_col = START_COL + global_columns['qty']['col']
+    # Create a defined range for the global data.
+    workbook.define_name(
+        scope + 'global_part_data', '={wks_name}!{data_range}'.format(
+            wks_name= "'" + WORKSHEET_NAME + "'",
+            data_range=xl_range_abs(START_ROW, START_COL, LAST_PART_ROW,
+                                    next_col - 1)))
+
+    # Freeze view of the global information and the column headers, but
+    # allow the distributor-specific part info to scroll.
+    wks.freeze_panes(COL_HDR_ROW, next_col)
+
+    def add_info_to_worksheet(next_row, info_col):
+        '''Add the projects information, board quantities and costs to the spreadsheet.'''
         for i_prj in range(len(prj_info)):
             # Add project information to track the project (in a printed version
             # of the BOM) and the date because of price variations.
             i_prj_str = (str(i_prj) if len(prj_info)>1 else '')
+            yield next_row
             wks.write(next_row, START_COL,
                       'Prj{}:'.format(i_prj_str),
                       wrk_formats['proj_info_field'])
             wks.write(next_row, START_COL+1,
                       prj_info[i_prj]['title'], wrk_formats['proj_info'])
-            wks.write(next_row+1, START_COL, 'Co.:',
-                      wrk_formats['proj_info_field'])
-            wks.write(next_row+1, START_COL+1,
-                      prj_info[i_prj]['company'], wrk_formats['proj_info'])
-            wks.write(next_row+2, START_COL,
-                      'Prj date:', wrk_formats['proj_info_field'])
-            wks.write(next_row+2, START_COL+1,
-                      prj_info[i_prj]['date'], wrk_formats['proj_info'])
 
             # Create the cell where the quantity of boards to assemble is entered.
             # Place the board qty cells near the right side of the global info.
-            wks.write(next_row, next_col - 2, 'Board Qty{}:'.format(i_prj_str),
+            wks.write(next_row, info_col - 2, 'Board Qty{}:'.format(i_prj_str),
                       wrk_formats['board_qty'])
-            wks.write(next_row, next_col - 1, DEFAULT_BUILD_QTY,
+            wks.write(next_row, info_col - 1, board_qty,
                       wrk_formats['board_qty'])  # Set initial board quantity.
             # Define the named cell where the total board quantity can be found.
-            workbook.define_name('BoardQty{}'.format(i_prj_str),
+            workbook.define_name(scope + 'BoardQty{}'.format(i_prj_str),
                 '={wks_name}!{cell_ref}'.format(
                     wks_name="'" + WORKSHEET_NAME + "'",
-                    cell_ref=xl_rowcol_to_cell(next_row, next_col - 1,
+                    cell_ref=xl_rowcol_to_cell(next_row, info_col - 1,
                                            row_abs=True,
                                            col_abs=True)))
-            
+
+            yield next_row + 1
+            wks.write(next_row+1, START_COL, 'Co.:',
+                      wrk_formats['proj_info_field'])
+            wks.write(next_row+1, START_COL+1,
+                      prj_info[i_prj]['company'], wrk_formats['proj_info'])
+
+            # Create the cell to show unit cost of (each project) board parts.
+            wks.write(next_row+1, info_col - 2, 'Unit Cost{}:'.format(i_prj_str),
+                      wrk_formats['unit_cost_label'])
+            wks.write(next_row+1, info_col - 1,
+                      "=TotalCost{}/BoardQty{}".format(i_prj_str, i_prj_str),
+                      wrk_formats['unit_cost_currency'])
+
+            yield next_row + 2
+            wks.write(next_row+2, START_COL,
+                      'Prj date:', wrk_formats['proj_info_field'])
+            wks.write(next_row+2, START_COL+1,
+                      prj_info[i_prj]['date'], wrk_formats['proj_info'])
+
             # Create the cell to show total cost of board parts for each distributor.
-            wks.write(next_row + 2, next_col - 2, 'Total Cost{}:'.format(i_prj_str),
+            wks.write(next_row + 2, info_col - 2, 'Total Cost{}:'.format(i_prj_str),
                       wrk_formats['total_cost_label'])
             # Define the named cell where the total cost can be found.
-            workbook.define_name('TotalCost{}'.format(i_prj_str),
+            workbook.define_name(scope + 'TotalCost{}'.format(i_prj_str),
                             '={wks_name}!{cell_ref}'.format(
                                 wks_name="'" + WORKSHEET_NAME + "'",
                                 cell_ref=xl_rowcol_to_cell(next_row + 2*(1+i_prj),
-                                                           next_col - 1,
+                                                           info_col - 1,
                                        row_abs=True, col_abs=True)) )
 
-            # Create the cell to show unit cost of (each project) board parts.
-            wks.write(next_row+1, next_col - 2, 'Unit Cost{}:'.format(i_prj_str),
-                      wrk_formats['unit_cost_label'])
-            wks.write(next_row+1, next_col - 1,
-                      "=TotalCost{}/BoardQty{}".format(i_prj_str, i_prj_str),
-                      wrk_formats['unit_cost_currency'])
-
             next_row += 3
 
         # Add general information of the scrap to track price modifications.
+        yield next_row
         wks.write(next_row, START_COL,
                   '$ date:', wrk_formats['proj_info_field'])
         wks.write(next_row, START_COL+1,
@@ -247,52 +387,80 @@ def create_spreadsheet(parts, prj_info, spreadsheet_filename, collapse_refs, use
         # Add the total cost of all projects together.
         if len(prj_info)>1:
             # Create the row to show total cost of board parts for each distributor.
-            wks.write(next_row, next_col - 2, 'Total Prjs Cost:',
+            wks.write(next_row, info_col - 2, 'Total Prjs Cost:',
                       wrk_formats['total_cost_label'])
             # Define the named cell where the total cost can be found.
-            workbook.define_name('TotalCost', '={wks_name}!{cell_ref}'.format(
+            workbook.define_name(scope + 'TotalCost', '={wks_name}!{cell_ref}'.format(
                             wks_name="'" + WORKSHEET_NAME + "'",
-                            cell_ref=xl_rowcol_to_cell(next_row, next_col - 1,
+                            cell_ref=xl_rowcol_to_cell(next_row, info_col - 1,
                                        row_abs=True,
                                        col_abs=True)))
-        next_row += 1
-
-        # Freeze view of the global information and the column headers, but
-        # allow the distributor-specific part info to scroll.
-        wks.freeze_panes(COL_HDR_ROW, next_col)
-
-        # Make a list of alphabetically-ordered distributors with web distributors before locals.
-        logger.log(DEBUG_OVERVIEW, 'Sorting the distributors...')
-        web_dists = sorted([d for d in distributor_dict if distributor_dict[d]['scrape'] != 'local'])
-        local_dists = sorted([d for d in distributor_dict if distributor_dict[d]['scrape'] == 'local'])
-        dist_list = web_dists + local_dists
-
-        # Load the part information from each distributor into the sheet.
-        logger.log(DEBUG_OVERVIEW, 'Writing the distributors parts informations...')
-        for dist in dist_list:
-            dist_start_col = next_col
-            next_col = add_dist_to_worksheet(wks, wrk_formats, START_ROW,
-                                             dist_start_col, UNIT_COST_ROW, TOTAL_COST_ROW,
-                                             refs_col, qty_col, dist, parts)
-            # Create a defined range for each set of distributor part data.
-            workbook.define_name(
-                '{}_part_data'.format(dist), '={wks_name}!{data_range}'.format(
-                    wks_name="'" + WORKSHEET_NAME + "'",
-                    data_range=xl_range_abs(START_ROW, dist_start_col,
-                                            LAST_PART_ROW, next_col - 1)))
 
         # Add the KiCost package information at the end of the spreadsheet to debug
         # information at the forum and "advertising".
+        yield START_ROW+len(parts)+3
         wks.write(START_ROW+len(parts)+3, START_COL,
             'Distributors scraped by KiCost\N{REGISTERED SIGN} v.' + __version__,
                 wrk_formats['proj_info'])
 
-
-def add_globals_to_worksheet(wks, wrk_formats, start_row, start_col,
-                             total_cost_row, parts, user_fields, collapse_refs):
-    '''Add global part data to the spreadsheet.'''
-
-    logger.log(DEBUG_OVERVIEW, 'Writing the global parts informations...')
+    # The projects information and the global part information blocks.
+    worksheet_blocks = [
+        add_info_to_worksheet(0, next_col),
+        add_globals_to_worksheet(wks, wrk_formats, global_columns, START_ROW,
+                                 START_COL, TOTAL_COST_ROW, parts, collapse_refs),
+    ]
+
+    # Make a list of alphabetically-ordered distributors with web distributors before locals.
+    logger.log(DEBUG_OVERVIEW, 'Sorting the distributors...')
+    web_dists = sorted([d for d in distributor_dict if distributor_dict[d]['scrape'] != 'local'])
+    local_dists = sorted([d for d in distributor_dict if distributor_dict[d]['scrape'] == 'local'])
+    dist_list = web_dists + local_dists
+
+    # Add the part information block of each distributor.
+    for dist in dist_list:
+        dist_start_col = next_col
+        next_col += len(DIST_COLUMNS)
+        worksheet_blocks.append(
+            add_dist_to_worksheet(wks, wrk_formats, START_ROW,
+                                  dist_start_col, UNIT_COST_ROW, TOTAL_COST_ROW,
+                                  refs_col, qty_col, dist, parts, static_order,
+                                  price_table, price_comments, purchases))
+        # Create a defined range for each set of distributor part data.
+        workbook.define_name(
+            scope + '{}_part_data'.format(dist), '={wks_name}!{data_range}'.format(
+                wks_name="'" + WORKSHEET_NAME + "'",
+                data_range=xl_range_abs(START_ROW, dist_start_col,
+                                        LAST_PART_ROW, next_col - 1)))
+
+    # Write all the blocks of the worksheet, one row at a time.
+    logger.log(DEBUG_OVERVIEW, 'Writing the parts informations...')
+    write_rows(worksheet_blocks)
+
+
+def write_rows(blocks):
+    '''@brief Write the worksheet blocks in row-major order.
+
+       Each block is a generator that yields the number of the row that it
+       will write next (in increasing order) and writes the cells of that
+       row when resumed. All the blocks write each row before any of them go
+       to the next one, as needed by the xlsxwriter `constant_memory` mode.
+       @param blocks `list()` of the blocks generators, written left to right.
+    '''
+    pending = []
+    for block in blocks:
+        for row in block:
+            pending.append([row, block])
+            break
+    while pending:
+        row = min([p[0] for p in pending])
+        for p in pending:
+            while p[0] == row:
+                p[0] = next(p[1], None) # `None` when the block is finished.
+        pending = [p for p in pending if p[0] is not None]
+
+
+def get_globals_columns(parts, user_fields):
+    '''Get the columns of the global part data of the spreadsheet.'''
 
     # Columns for the various types of global part data.
     columns = {
@@ -432,16 +600,64 @@ Yellow -> Enough parts available, but haven't purchased enough.''',
                 'static': True,
             }
 
+    return columns
+
+
+def add_globals_to_worksheet(wks, wrk_formats, columns, start_row, start_col,
+                             total_cost_row, parts, collapse_refs):
+    '''Add global part data to the spreadsheet.
+
+    This is a worksheet block generator, it yields each row before write it (see `write_rows()`).'''
+
+    logger.log(DEBUG_OVERVIEW, 'Writing the global parts informations...')
+
     num_cols = len(list(columns.keys()))
+    num_parts = len(parts)
+    PART_INFO_FIRST_ROW = start_row + 2  # Starting row of part info.
+    PART_INFO_LAST_ROW = PART_INFO_FIRST_ROW + num_parts - 1  # Last row of part info.
+    # For check the number of BOM files read, see the length of p[?]['manf#_qty'],
+    # if it is a `list()` instance, if don't, the lenth is always `1`.
+    num_prj = max([len(part.fields.get('manf#_qty',[])) if isinstance(part.fields.get('manf#_qty',[]),list) else 1 for part in parts])
+
+    # Sum the extended prices for all the parts to get the total minimum cost.
+    # If have read multiple BOM file calculate it by `SUMPRODUCT()` of the
+    # board project quantity components 'qty_prj*' by unitary price 'Unit$'.
+    total_cost_col = start_col + columns['ext_price']['col']
+    if num_prj>1:
+        unit_price_col = start_col + columns['unit_price']['col']
+        unit_price_range = xl_range(PART_INFO_FIRST_ROW, unit_price_col,
+                                    PART_INFO_LAST_ROW, unit_price_col)
+        # Add each project board total.
+        for i_prj in range(num_prj):
+            qty_col = start_col + columns['qty_prj{}'.format(i_prj)]['col']
+            yield total_cost_row + 3*i_prj
+            wks.write(total_cost_row + 3*i_prj, total_cost_col,
+                      '=SUMPRODUCT({qty_range},{unit_price_range})'.format(
+                            unit_price_range=unit_price_range,
+                            qty_range=xl_range(PART_INFO_FIRST_ROW, qty_col,
+                                PART_INFO_LAST_ROW, qty_col)),
+                      wrk_formats['total_cost_currency'])
+        # Add total of the spreadsheet, this can be equal or bigger than
+        # than the sum of the above totals, because, in the case of partial
+        # or fractional quantity of one part or subpart, the total quantity
+        # column 'qty' will be the ceil of the sum of the other ones.
+        total_cost_row = start_row -1 # Change the position of the total price cell.
+    yield total_cost_row
+    wks.write(total_cost_row, total_cost_col, '=SUM({sum_range})'.format(
+              sum_range=xl_range(PART_INFO_FIRST_ROW, total_cost_col,
+                           PART_INFO_LAST_ROW, total_cost_col)),
+              wrk_formats['total_cost_currency'])
 
     row = start_row  # Start building global section at this row.
 
     # Add label for global section.
+    yield row
     wks.merge_range(row, start_col, row, start_col + num_cols - 1,
                     "Global Part Info", wrk_formats['global'])
     row += 1  # Go to next row.
 
     # Add column headers.
+    yield row
     for k in list(columns.keys()):
         col = start_col + columns[k]['col']
         wks.write_string(row, col, columns[k]['label'], wrk_formats['header'])
@@ -450,25 +666,45 @@ Yellow -> Enough parts available, but haven't purchased enough.''',
                        {'level': columns[k]['level']})
     row += 1  # Go to next row.
 
-    num_parts = len(parts)
-    PART_INFO_FIRST_ROW = row  # Starting row of part info.
-    PART_INFO_LAST_ROW = PART_INFO_FIRST_ROW + num_parts - 1  # Last row of part info.
-
     # Add data for each part to the spreadsheet.
     # Order the references and collapse, if asked:
     # e.g. J3, J2, J1, J6 => J1, J2, J3 J6. # `collapse=False`
     # e.g. J3, J2, J1, J6 => J1-J3, J6.. # `collapse=True`
+    # The parts come already sorted by `groups_sort()`.
     for part in parts:
         part.collapsed_refs = ','.join( order_refs(part.refs, collapse=collapse_refs) )
 
-    # Then, order the part references with priority ref prefix, ref num, and subpart num.
-    def get_ref_key(part):
-        match = re.match(PART_REF_REGEX, part.collapsed_refs)
-        return [match.group('prefix'), match.group('ref_num'), match.group('subpart_num')]
-    parts.sort(key=get_ref_key)
+    # Gather the cell references for calculating minimum unit price and part availability.
+    # These ones are the same for all the rows, they use the `ROW()` of the formula.
+    dist_unit_prices = []
+    dist_qty_avail = []
+    dist_qty_purchased = []
+    dist_code_avail = []
+    for dist in list(distributor_dict.keys()):
+
+        # Get the name of the data range for this distributor.
+        dist_data_rng = '{}_part_data'.format(dist)
+
+        # Get the contents of the unit price cell for this part (row) and distributor (column+offset).
+        dist_unit_prices.append(
+            'INDIRECT(ADDRESS(ROW(),COLUMN({})+2))'.format(dist_data_rng))
+
+        # Get the contents of the quantity purchased cell for this part and distributor
+        # unless the unit price is not a number in which case return 0.
+        dist_qty_purchased.append(
+            'IF(ISNUMBER(INDIRECT(ADDRESS(ROW(),COLUMN({0})+2))),INDIRECT(ADDRESS(ROW(),COLUMN({0})+1)),0)'.format(dist_data_rng))
+
+        # Get the contents of the quantity available cell of this part from this distributor.
+        dist_qty_avail.append(
+            'INDIRECT(ADDRESS(ROW(),COLUMN({})+0))'.format(dist_data_rng))
+
+        # Get the contents of the manufacture and distributors codes.
+        dist_code_avail.append(
+            'ISBLANK(INDIRECT(ADDRESS(ROW(),COLUMN({})+4)))'.format(dist_data_rng))
 
     # Add the global part data to the spreadsheet.
     for part in parts:
+        yield row
 
         # Enter part references.
         wks.write_string(row, start_col + columns['refs']['col'], part.collapsed_refs, wrk_formats['part_format'])
@@ -526,48 +762,6 @@ Yellow -> Enough parts available, but haven't purchased enough.''',
         except KeyError:
             pass
 
-        # Gather the cell references for calculating minimum unit price and part availability.
-        dist_unit_prices = []
-        dist_qty_avail = []
-        dist_qty_purchased = []
-        dist_code_avail = []
-        for dist in list(distributor_dict.keys()):
-
-            # Get the name of the data range for this distributor.
-            dist_data_rng = '{}_part_data'.format(dist)
-
-            # Get the contents of the unit price cell for this part (row) and distributor (column+offset).
-            dist_unit_prices.append(
-                'INDIRECT(ADDRESS(ROW(),COLUMN({})+2))'.format(dist_data_rng))
-
-            # Get the contents of the quantity purchased cell for this part and distributor
-            # unless the unit price is not a number in which case return 0.
-            dist_qty_purchased.append(
-                'IF(ISNUMBER(INDIRECT(ADDRESS(ROW(),COLUMN({0})+2))),INDIRECT(ADDRESS(ROW(),COLUMN({0})+1)),0)'.format(dist_data_rng))
-
-            # Get the contents of the quantity available cell of this part from this distributor.
-            dist_qty_avail.append(
-                'INDIRECT(ADDRESS(ROW(),COLUMN({})+0))'.format(dist_data_rng))
-
-            # Get the contents of the manufacture and distributors codes.
-            dist_code_avail.append(
-                'ISBLANK(INDIRECT(ADDRESS(ROW(),COLUMN({})+4)))'.format(dist_data_rng))
-
-
-        # If part do not have manf# code or distributor codes, color quantity cell gray.
-        wks.conditional_format(
-            row, start_col + columns['qty']['col'],
-            row, start_col + columns['qty']['col'],
-            {
-                'type': 'formula',
-                'criteria': '=AND(ISBLANK({g}),{d})'.format(
-                    g=xl_rowcol_to_cell(row,start_col + columns['manf#']['col']), # Manf# column also have to be blank.
-                    d=(','.join(dist_code_avail) if dist_code_avail else 'TRUE()')
-                 ),
-                'format': wrk_formats['not_manf_codes']
-            }
-        )
-
         # Enter the spreadsheet formula for calculating the minimum extended price (based on the unit price found on next formula).
         wks.write_formula(
             row, start_col + columns['ext_price']['col'],
@@ -587,41 +781,6 @@ Yellow -> Enough parts available, but haven't purchased enough.''',
                 wrk_formats['currency']
             )
 
-            # If part is unavailable from all distributors, color quantity cell red.
-            wks.conditional_format(
-                row, start_col + columns['qty']['col'],
-                row, start_col + columns['qty']['col'],
-                {
-                    'type': 'formula',
-                    'criteria': '=IF(SUM({})=0,1,0)'.format(','.join(dist_qty_avail)),
-                    'format': wrk_formats['not_available']
-                }
-            )
-
-            # If total available part quantity is less than needed quantity, color cell orange. 
-            wks.conditional_format(
-                row, start_col + columns['qty']['col'],
-                row, start_col + columns['qty']['col'],
-                {
-                    'type': 'cell',
-                    'criteria': '>',
-                    'value': '=SUM({})'.format(','.join(dist_qty_avail)),
-                    'format': wrk_formats['too_few_available']
-                }
-            )
-
-            # If total purchased part quantity is less than needed quantity, color cell yellow. 
-            wks.conditional_format(
-                row, start_col + columns['qty']['col'],
-                row, start_col + columns['qty']['col'],
-                {
-                    'type': 'cell',
-                    'criteria': '>',
-                    'value': '=SUM({})'.format(','.join(dist_qty_purchased)),
-                    'format': wrk_formats['too_few_purchased'],
-                }
-            )
-
         # Enter part shortage quantity.
         try:
             wks.write(row, start_col + columns['short']['col'],
@@ -631,96 +790,143 @@ Yellow -> Enough parts available, but haven't purchased enough.''',
 
         row += 1  # Go to next row.
 
-    # Sum the extended prices for all the parts to get the total minimum cost.
-    # If have read multiple BOM file calculate it by `SUMPRODUCT()` of the
-    # board project quantity components 'qty_prj*' by unitary price 'Unit$'.
-    total_cost_col = start_col + columns['ext_price']['col']
-    if isinstance(qty, list):
-        unit_price_col = start_col + columns['unit_price']['col']
-        unit_price_range = xl_range(PART_INFO_FIRST_ROW, unit_price_col,
-                                    PART_INFO_LAST_ROW, unit_price_col)
-        # Add each project board total.
-        for i_prj in range(len(qty)):
-            qty_col = start_col + columns['qty_prj{}'.format(i_prj)]['col']
-            wks.write(total_cost_row + 3*i_prj, total_cost_col,
-                      '=SUMPRODUCT({qty_range},{unit_price_range})'.format(
-                            unit_price_range=unit_price_range,
-                            qty_range=xl_range(PART_INFO_FIRST_ROW, qty_col,
-                                PART_INFO_LAST_ROW, qty_col)),
-                      wrk_formats['total_cost_currency'])
-        # Add total of the spreadsheet, this can be equal or bigger than
-        # than the sum of the above totals, because, in the case of partial
-        # or fractional quantity of one part or subpart, the total quantity
-        # column 'qty' will be the ceil of the sum of the other ones.
-        total_cost_row = start_row -1 # Change the position of the total price cell.
-    wks.write(total_cost_row, total_cost_col, '=SUM({sum_range})'.format(
-              sum_range=xl_range(PART_INFO_FIRST_ROW, total_cost_col,
-                           PART_INFO_LAST_ROW, total_cost_col)),
-              wrk_formats['total_cost_currency'])
+    if not parts:
+        return
+
+    # Conditional formats of the quantity column, one rule for all the part rows
+    # (the references relative to the first row are adjusted to each row).
+    qty_col = start_col + columns['qty']['col']
+
+    # If part do not have manf# code or distributor codes, color quantity cell gray.
+    wks.conditional_format(
+        PART_INFO_FIRST_ROW, qty_col, PART_INFO_LAST_ROW, qty_col,
+        {
+            'type': 'formula',
+            'criteria': '=AND(ISBLANK({g}),{d})'.format(
+                g=xl_rowcol_to_cell(PART_INFO_FIRST_ROW, start_col + columns['manf#']['col']), # Manf# column also have to be blank.
+                d=(','.join(dist_code_avail) if dist_code_avail else 'TRUE()')
+             ),
+            'format': wrk_formats['not_manf_codes']
+        }
+    )
+
+    # If not asked to scrape, to correlate the prices and available quantities.
+    if distributor_dict.keys():
+        # If part is unavailable from all distributors, color quantity cell red.
+        wks.conditional_format(
+            PART_INFO_FIRST_ROW, qty_col, PART_INFO_LAST_ROW, qty_col,
+            {
+                'type': 'formula',
+                'criteria': '=IF(SUM({})=0,1,0)'.format(','.join(dist_qty_avail)),
+                'format': wrk_formats['not_available']
+            }
+        )
+
+        # If total available part quantity is less than needed quantity, color cell orange. 
+        wks.conditional_format(
+            PART_INFO_FIRST_ROW, qty_col, PART_INFO_LAST_ROW, qty_col,
+            {
+                'type': 'cell',
+                'criteria': '>',
+                'value': '=SUM({})'.format(','.join(dist_qty_avail)),
+                'format': wrk_formats['too_few_available']
+            }
+        )
+
+        # If total purchased part quantity is less than needed quantity, color cell yellow. 
+        wks.conditional_format(
+            PART_INFO_FIRST_ROW, qty_col, PART_INFO_LAST_ROW, qty_col,
+            {
+                'type': 'cell',
+                'criteria': '>',
+                'value': '=SUM({})'.format(','.join(dist_qty_purchased)),
+                'format': wrk_formats['too_few_purchased'],
+            }
+        )
 
-    # Return column following the globals so we know where to start next set of cells.
-    # Also return the columns where the references and quantity needed of each part is stored.
-    return start_col + num_cols, start_col + columns['refs']['col'], start_col + columns['qty']['col']
 
 
 def add_dist_to_worksheet(wks, wrk_formats, start_row, start_col,
                           unit_cost_row, total_cost_row, part_ref_col, part_qty_col,
-                          dist, parts):
-    '''Add distributor-specific part data to the spreadsheet.'''
+                          dist, parts, static_order=False,
+                          price_table=None, price_comments=True, purchases=None):
+    '''Add distributor-specific part data to the spreadsheet.
+
+    This is a worksheet block generator, it yields each row before write it (see `write_rows()`).
+    If `static_order`, the part of each purchase order line is chosen here (see below).
+    If `price_table` (see `add_price_tiers()`), the unit prices are looked up in it.
+    The `purchases` of this distributor (see `create_spreadsheet()`) are filled in.'''
 
     logger.log(DEBUG_OVERVIEW, '# Writing {}'.format(distributor_dict[dist]['label']))
 
-    # Columns for the various types of distributor-specific part data.
-    columns = {
-        'avail': {
-            'col': 0,
-            # column offset within this distributor range of the worksheet.
-            'level': 1,  # Outline level (or hierarchy level) for this column.
-            'label': 'Avail',  # Column header label.
-            'width': None,  # Column width (default in this case).
-            'comment': '''Available quantity of each part at the distributor.
-Red -> No quantity available.
-Orange -> Too little quantity available.'''
-        },
-        'purch': {
-            'col': 1,
-            'level': 2,
-            'label': 'Purch',
-            'width': None,
-            'comment': 'Purchase quantity of each part from this distributor.\nRed -> Purchasing more than the available quantity.'
-        },
-        'unit_price': {
-            'col': 2,
-            'level': 2,
-            'label': 'Unit$',
-            'width': None,
-            'comment': 'Unit price of each part from this distributor.\nGreen -> lowest price.'
-        },
-        'ext_price': {
-            'col': 3,
-            'level': 0,
-            'label': 'Ext$',
-            'width': 15,  # Displays up to $9,999,999.99 without "###".
-            'comment': '(Unit Price) x (Purchase Qty) of each part from this distributor.\nRed -> Next price break is cheaper.\nGreen -> Cheapest supplier.'
-        },
-        'part_num': {
-            'col': 4,
-            'level': 2,
-            'label': 'Cat#',
-            'width': 15,
-            'comment': 'Distributor-assigned catalog number for each part and link to it\'s web page (ctrl-click). Extra distributor data is shown as comment.'
-        },
-    }
+    columns = DIST_COLUMNS
     num_cols = len(list(columns.keys()))
 
+    num_parts = len(parts)
+    # For check the number of BOM files read, see the length of p[?]['manf#_qty'],
+    # if it is a `list()` instance, if don't, the lenth is always `1`.
+    num_prj = max([len(part.fields.get('manf#_qty',[])) if isinstance(part.fields.get('manf#_qty',[]),list) else 1 for part in parts])
+    PART_INFO_FIRST_ROW = start_row + 2  # Starting row of part info.
+    PART_INFO_LAST_ROW = PART_INFO_FIRST_ROW + num_parts - 1  # Last row of part info.
+
+    total_cost_col = start_col + columns['ext_price']['col']
+    unit_cost_col = start_col + columns['unit_price']['col']
+    
+    # If more than one file (multi-files mode) show how many
+    # parts of each BOM as found at this distributor and
+    # the correspondent total price.
+    if num_prj>1:
+        for i_prj in range(num_prj):
+            # Sum the extended prices (unit multiplied by quantity) for each file/BOM.
+            qty_prj_col = part_qty_col - (num_prj - i_prj)
+            row = total_cost_row + i_prj * 3
+            yield row
+            wks.write(row, total_cost_col,
+                      '=SUMPRODUCT({qty_range},{unit_price_range})'.format(
+                            qty_range=xl_range(PART_INFO_FIRST_ROW, qty_prj_col,
+                                            PART_INFO_LAST_ROW, qty_prj_col),
+                            unit_price_range=xl_range(PART_INFO_FIRST_ROW, unit_cost_col,
+                                            PART_INFO_LAST_ROW, unit_cost_col)),
+                      wrk_formats['total_cost_currency'])
+            # Show how many parts were found at this distributor.
+            wks.write(row, total_cost_col+1,
+                '=COUNTIFS({price_range},"<>",{qty_range},"<>0",{qty_range},"<>")&" of "&COUNTIFS({qty_range},"<>0",{qty_range},"<>")&" parts found"'.format(
+                price_range=xl_range(PART_INFO_FIRST_ROW, total_cost_col,
+                                     PART_INFO_LAST_ROW, total_cost_col),
+                qty_range=xl_range(PART_INFO_FIRST_ROW, qty_prj_col,
+                                   PART_INFO_LAST_ROW, qty_prj_col)),
+                wrk_formats['found_part_pct'])
+            wks.write_comment(row, total_cost_col+1, 'Number of parts found at this distributor for the project {}.'.format(i_prj))
+        total_cost_row = PART_INFO_FIRST_ROW - 3 # Shift the total price in this distributor.
+    
+    # Sum the extended prices for all the parts to get the total cost from this distributor.
+    yield total_cost_row
+    wks.write(total_cost_row, total_cost_col, '=SUM({sum_range})'.format(
+        sum_range=xl_range(PART_INFO_FIRST_ROW, total_cost_col,
+                           PART_INFO_LAST_ROW, total_cost_col)),
+              wrk_formats['total_cost_currency'])
+    # Show how many parts were found at this distributor.
+    wks.write(total_cost_row, total_cost_col+1,
+        '=(ROWS({count_range})-COUNTBLANK({count_range}))&" of "&ROWS({count_range})&" parts found"'.format(
+        #'=COUNTIF({count_range},"<>")&" of "&ROWS({count_range})&" parts found"'.format(
+            count_range=xl_range(PART_INFO_FIRST_ROW, total_cost_col,
+                                 PART_INFO_LAST_ROW, total_cost_col)),
+            wrk_formats['found_part_pct'])
+    wks.write_comment(total_cost_row, total_cost_col+1, 'Number of parts found at this distributor.')
+
     row = start_row  # Start building distributor section at this row.
 
     # Add label for this distributor.
+    yield row
     wks.merge_range(row, start_col, row, start_col + num_cols - 1,
             distributor_dict[dist]['label'].title(), wrk_formats[dist])
+    if distributor_dict[dist].get('failure'):
+        # The site failed while scraping, see `kicost.report_scrape_stats()`.
+        wks.write_comment(row, start_col, distributor_dict[dist]['failure'])
     row += 1  # Go to next row.
 
     # Add column headers, comments, and outline level (for hierarchy).
+    yield row
     for k in list(columns.keys()):
         col = start_col + columns[k]['col']  # Column index for this column.
         wks.write_string(row, col, columns[k]['label'], wrk_formats['header'])
@@ -729,16 +935,10 @@ Orange -> Too little quantity available.'''
                        {'level': columns[k]['level']})
     row += 1  # Go to next row.
 
-    num_parts = len(parts)
-    # For check the number of BOM files read, see the length of p[?]['manf#_qty'],
-    # if it is a `list()` instance, if don't, the lenth is always `1`.
-    num_prj = max([len(part.fields.get('manf#_qty',[])) if isinstance(part.fields.get('manf#_qty',[]),list) else 1 for part in parts])
-
     # Add distributor data for each part.
-    PART_INFO_FIRST_ROW = row  # Starting row of part info.
-    PART_INFO_LAST_ROW = PART_INFO_FIRST_ROW + num_parts - 1  # Last row of part info.
-
-    for part in parts:
+    priced_rows = []  # Rows of the parts with pricing information.
+    for i_part, part in enumerate(parts):
+        yield row
 
         # Get the distributor part number.
         dist_part_num = part.part_num[dist]
@@ -788,8 +988,12 @@ Orange -> Too little quantity available.'''
             wks.write_comment(row, start_col + columns['avail']['col'], 
                 'This part is listed but is not normally stocked.')
 
-        # Purchase quantity always starts as blank because nothing has been purchased yet.
-        wks.write(row, start_col + columns['purch']['col'], '', None)
+        # Purchase quantity starts as blank because nothing has been purchased yet,
+        # unless a purchase of this part in this distributor was given.
+        if purchases and purchases[i_part] and purchases[i_part][0] == dist:
+            wks.write(row, start_col + columns['purch']['col'], purchases[i_part][1], None)
+        else:
+            wks.write(row, start_col + columns['purch']['col'], '', None)
 
         # Add pricing information if it exists.
         if len(list(price_tiers)) > 0:
@@ -812,61 +1016,37 @@ Orange -> Too little quantity available.'''
             unit_price_col = start_col + columns['unit_price']['col']
             ext_price_col = start_col + columns['ext_price']['col']
 
+            # The quantity and price break arrays, inline in the formula or the
+            # ranges of this part in the price breaks table.
+            if price_table is None:
+                qtys_array = '{{{}}}'.format(','.join([str(q) for q in qtys]))
+                prices_array = '{{{}}}'.format(','.join([str(price_tiers[q]) for q in qtys]))
+            else:
+                qtys_array, prices_array = add_price_tiers(price_table, dist,
+                                                           part.part_num[dist], qtys, price_tiers)
+
             # Enter a spreadsheet lookup function that determines the unit price based on the needed quantity
             # or the purchased quantity (if that is non-zero).
             wks.write_formula(
                 row, unit_price_col,
-                '=iferror(lookup(if({purch_qty}="",{needed_qty},{purch_qty}),{{{qtys}}},{{{prices}}}),"")'.format(
+                '=iferror(lookup(if({purch_qty}="",{needed_qty},{purch_qty}),{qtys},{prices}),"")'.format(
                     needed_qty=xl_rowcol_to_cell(row, part_qty_col),
                     purch_qty=xl_rowcol_to_cell(row, purch_qty_col),
-                    qtys=','.join([str(q) for q in qtys]),
-                    prices=','.join([str(price_tiers[q]) for q in qtys])),
+                    qtys=qtys_array,
+                    prices=prices_array),
                     wrk_formats['currency'])
 
-            # Add a comment to the cell showing the qty/price breaks.
-            price_break_info = 'Qty/Price Breaks:\n  Qty  -  Unit$  -  Ext$\n================'
-            for q in qtys[1:]:  # Skip the first qty which is always 0.
-                price_break_info += '\n{:>6d} {:>7s} {:>10s}'.format(
-                    q,
-                    '${:.2f}'.format(price_tiers[q]),
-                    '${:.2f}'.format(price_tiers[q] * q))
-            wks.write_comment(row, unit_price_col, price_break_info)
-
-            # Conditional format to show no quantity is available.
-            wks.conditional_format(
-                row, start_col + columns['avail']['col'], 
-                row, start_col + columns['avail']['col'],
-                {
-                    'type': 'cell',
-                    'criteria': '==',
-                    'value': 0,
-                    'format': wrk_formats['not_available']
-                }
-            )
+            if price_comments:
+                # Add a comment to the cell showing the qty/price breaks.
+                price_break_info = 'Qty/Price Breaks:\n  Qty  -  Unit$  -  Ext$\n================'
+                for q in qtys[1:]:  # Skip the first qty which is always 0.
+                    price_break_info += '\n{:>6d} {:>7s} {:>10s}'.format(
+                        q,
+                        '${:.2f}'.format(price_tiers[q]),
+                        '${:.2f}'.format(price_tiers[q] * q))
+                wks.write_comment(row, unit_price_col, price_break_info)
 
-            # Conditional format to show the available quantity is less than required.
-            wks.conditional_format(
-                row, start_col + columns['avail']['col'], 
-                row, start_col + columns['avail']['col'],
-                {
-                    'type': 'cell',
-                    'criteria': '<',
-                    'value': xl_rowcol_to_cell(row, part_qty_col),
-                    'format': wrk_formats['too_few_available']
-                }
-            )
-
-            # Conditional format to show the purchase quantity is more than what is available.
-            wks.conditional_format(
-                row, start_col + columns['purch']['col'], 
-                row, start_col + columns['purch']['col'],
-                {
-                    'type': 'cell',
-                    'criteria': '>',
-                    'value': xl_rowcol_to_cell(row, avail_qty_col),
-                    'format': wrk_formats['order_too_much']
-                }
-            )
+            priced_rows.append(row)
 
             # Enter the formula for the extended price = purch qty * unit price.
             wks.write_formula(
@@ -877,69 +1057,66 @@ Orange -> Too little quantity available.'''
                     unit_price=xl_rowcol_to_cell(row, unit_price_col)),
                 wrk_formats['currency'])
 
-            if len(distributor_dict)>1: # Just use the best price highlight if more than one distributor.
-                # Conditionally format the extended price cell that contains the best price.
-                wks.conditional_format(row, ext_price_col, row, ext_price_col, {
-                    'type': 'cell',
-                    'criteria': '<=',
-                    'value': xl_rowcol_to_cell(row, part_qty_col+2),
-                    # This is the global data cell holding the minimum extended price for this part.
-                    'format': wrk_formats['best_price']
-                })
-                # Conditionally format the unit price cell that contains the best price.
-                wks.conditional_format(row, unit_price_col, row, unit_price_col, {
-                    'type': 'cell',
-                    'criteria': '<=',
-                    'value': xl_rowcol_to_cell(row, part_qty_col+1),
-                    # This is the global data cell holding the minimum unit price for this part.
-                    'format': wrk_formats['best_price']
-                })
-
         # Finished processing distributor data for this part.
         row += 1  # Go to next row.
 
-    total_cost_col = start_col + columns['ext_price']['col']
-    unit_cost_col = start_col + columns['unit_price']['col']
-    
-    # If more than one file (multi-files mode) show how many
-    # parts of each BOM as found at this distributor and
-    # the correspondent total price.
-    if num_prj>1:
-        for i_prj in range(num_prj):
-            # Sum the extended prices (unit multiplied by quantity) for each file/BOM.
-            qty_prj_col = part_qty_col - (num_prj - i_prj)
-            row = total_cost_row + i_prj * 3
-            wks.write(row, total_cost_col,
-                      '=SUMPRODUCT({qty_range},{unit_price_range})'.format(
-                            qty_range=xl_range(PART_INFO_FIRST_ROW, qty_prj_col,
-                                            PART_INFO_LAST_ROW, qty_prj_col),
-                            unit_price_range=xl_range(PART_INFO_FIRST_ROW, unit_cost_col,
-                                            PART_INFO_LAST_ROW, unit_cost_col)),
-                      wrk_formats['total_cost_currency'])
-            # Show how many parts were found at this distributor.
-            wks.write(row, total_cost_col+1,
-                '=COUNTIFS({price_range},"<>",{qty_range},"<>0",{qty_range},"<>")&" of "&COUNTIFS({qty_range},"<>0",{qty_range},"<>")&" parts found"'.format(
-                price_range=xl_range(PART_INFO_FIRST_ROW, total_cost_col,
-                                     PART_INFO_LAST_ROW, total_cost_col),
-                qty_range=xl_range(PART_INFO_FIRST_ROW, qty_prj_col,
-                                   PART_INFO_LAST_ROW, qty_prj_col)),
-                wrk_formats['found_part_pct'])
-            wks.write_comment(row, total_cost_col+1, 'Number of parts found at this distributor for the project {}.'.format(i_prj))
-        total_cost_row = PART_INFO_FIRST_ROW - 3 # Shift the total price in this distributor.
-    
-    # Sum the extended prices for all the parts to get the total cost from this distributor.
-    wks.write(total_cost_row, total_cost_col, '=SUM({sum_range})'.format(
-        sum_range=xl_range(PART_INFO_FIRST_ROW, total_cost_col,
-                           PART_INFO_LAST_ROW, total_cost_col)),
-              wrk_formats['total_cost_currency'])
-    # Show how many parts were found at this distributor.
-    wks.write(total_cost_row, total_cost_col+1,
-        '=(ROWS({count_range})-COUNTBLANK({count_range}))&" of "&ROWS({count_range})&" parts found"'.format(
-        #'=COUNTIF({count_range},"<>")&" of "&ROWS({count_range})&" parts found"'.format(
-            count_range=xl_range(PART_INFO_FIRST_ROW, total_cost_col,
-                                 PART_INFO_LAST_ROW, total_cost_col)),
-            wrk_formats['found_part_pct'])
-    wks.write_comment(total_cost_row, total_cost_col+1, 'Number of parts found at this distributor.')
+    # Conditional formats of the parts with pricing information, one rule for
+    # each column of this distributor (the references relative to the first
+    # priced row are adjusted to each row).
+    avail_qty_col = start_col + columns['avail']['col']
+    purch_qty_col = start_col + columns['purch']['col']
+    unit_price_col = start_col + columns['unit_price']['col']
+    ext_price_col = start_col + columns['ext_price']['col']
+    if priced_rows:
+        first_row = priced_rows[0]
+
+        # Conditional format to show no quantity is available.
+        conditional_format_rows(wks, priced_rows, avail_qty_col,
+            {
+                'type': 'cell',
+                'criteria': '==',
+                'value': 0,
+                'format': wrk_formats['not_available']
+            }
+        )
+
+        # Conditional format to show the available quantity is less than required.
+        conditional_format_rows(wks, priced_rows, avail_qty_col,
+            {
+                'type': 'cell',
+                'criteria': '<',
+                'value': xl_rowcol_to_cell(first_row, part_qty_col),
+                'format': wrk_formats['too_few_available']
+            }
+        )
+
+        # Conditional format to show the purchase quantity is more than what is available.
+        conditional_format_rows(wks, priced_rows, purch_qty_col,
+            {
+                'type': 'cell',
+                'criteria': '>',
+                'value': xl_rowcol_to_cell(first_row, avail_qty_col),
+                'format': wrk_formats['order_too_much']
+            }
+        )
+
+        if len(distributor_dict)>1: # Just use the best price highlight if more than one distributor.
+            # Conditionally format the extended price cell that contains the best price.
+            conditional_format_rows(wks, priced_rows, ext_price_col, {
+                'type': 'cell',
+                'criteria': '<=',
+                'value': xl_rowcol_to_cell(first_row, part_qty_col+2),
+                # This is the global data cell holding the minimum extended price for this part.
+                'format': wrk_formats['best_price']
+            })
+            # Conditionally format the unit price cell that contains the best price.
+            conditional_format_rows(wks, priced_rows, unit_price_col, {
+                'type': 'cell',
+                'criteria': '<=',
+                'value': xl_rowcol_to_cell(first_row, part_qty_col+1),
+                # This is the global data cell holding the minimum unit price for this part.
+                'format': wrk_formats['best_price']
+            })
 
     # Add list of part numbers and purchase quantities for ordering from this distributor.
     ORDER_START_COL = start_col + 1
@@ -970,10 +1147,10 @@ Orange -> Too little quantity available.'''
         except KeyError:
             dist_col[col_tag] = part_ref_col
 
-    def enter_order_info(info_col, order_col, numeric=False, delimiter=''):
-        # This function enters a function into a spreadsheet cell that
-        # prints the information found in info_col into the order_col column
-        # of the order.
+    def order_info_formula(info_col, numeric=False, delimiter=''):
+        # This function returns the array formula of a spreadsheet cell that
+        # prints the information found in info_col into a column of the order.
+        # It is the same for every row of that column.
 
         # This very complicated spreadsheet function does the following:
         # 1) Computes the set of row index in the part data that have
@@ -1040,11 +1217,7 @@ Orange -> Too little quantity available.'''
         purch_qty_col = start_col + columns['purch']['col']
         part_num_col = start_col + columns['part_num']['col']
 
-        # Now write the order_info_func into every row of the order in the given column.
-        for r in range(ORDER_FIRST_ROW, ORDER_LAST_ROW + 1):
-            wks.write_array_formula(
-                xl_range(r, order_col, r, order_col),
-                '{{={func}}}'.format(func=order_info_func.format(
+        return '{{={func}}}'.format(func=order_info_func.format(
                     order_first_row=xl_rowcol_to_cell(ORDER_FIRST_ROW, 0,
                                                       row_abs=True),
                     sel_range1=xl_range_abs(PART_INFO_FIRST_ROW, purch_qty_col,
@@ -1055,11 +1228,12 @@ Orange -> Too little quantity available.'''
                                            PART_INFO_LAST_ROW, info_col),
                     delimiter=delimiter,
                     num_to_text_func=num_to_text_func,
-                    num_to_text_fmt=num_to_text_fmt)))
+                    num_to_text_fmt=num_to_text_fmt))
 
     # Write the header and how many parts are being purchased.
     purch_qty_col = start_col + columns['purch']['col']
     ORDER_HEADER =  PART_INFO_LAST_ROW + 2
+    yield ORDER_HEADER
     wks.write_formula(
         ORDER_HEADER, purch_qty_col,
         '=IFERROR(IF(OR({count_range}),COUNTIF({count_range},">0")&" of "&ROWS({count_range})&" parts purchased",""),"")'.format(
@@ -1071,10 +1245,121 @@ Orange -> Too little quantity available.'''
     wks.write_comment(ORDER_HEADER, purch_qty_col,
         'Copy the information below to the BOM import page of the distributor web site.')
 
-    # For every column in the order info range, enter the part order information.
-    for col_tag in ('purch', 'part_num', 'refs'):
-        enter_order_info(dist_col[col_tag], order_col[col_tag],
-                         numeric=order_col_numeric[col_tag],
-                         delimiter=order_delimiter[col_tag])
-
-    return start_col + num_cols  # Return column following the globals so we know where to start next set of cells.
+    if static_order:
+        # The order has one line for each part with a catalogue number in this
+        # distributor, in the same order of the part rows. Each cell of the line
+        # just shows the information of its part if a purchase quantity was
+        # entered, this simple `IF()` is much faster to recalculate than the
+        # array formulas (that search all the part rows for each cell) on big
+        # BOMs. The lines of the parts not purchased stay blank.
+        purch_qty_col = start_col + columns['purch']['col']
+        r = ORDER_FIRST_ROW
+        for part_row, part in enumerate(parts, PART_INFO_FIRST_ROW):
+            if not part.part_num[dist]:
+                continue
+            purch_qty = xl_rowcol_to_cell(part_row, purch_qty_col)
+            yield r
+            for col_tag in ('purch', 'part_num', 'refs'):
+                info = xl_rowcol_to_cell(part_row, dist_col[col_tag])
+                if order_col_numeric[col_tag]:
+                    info = 'TEXT({},"##0")'.format(info)
+                if order_delimiter[col_tag] != '':
+                    info += '&"{}"'.format(order_delimiter[col_tag])
+                wks.write_formula(r, order_col[col_tag],
+                                  '=IF({}="","",{})'.format(purch_qty, info))
+            r += 1
+        return
+
+    # For every column in the order info range, enter the part order information
+    # into every row of the order.
+    order_info = [(order_col[col_tag],
+                   order_info_formula(dist_col[col_tag],
+                                      numeric=order_col_numeric[col_tag],
+                                      delimiter=order_delimiter[col_tag]))
+                  for col_tag in ('purch', 'part_num', 'refs')]
+    for r in range(ORDER_FIRST_ROW, ORDER_LAST_ROW + 1):
+        yield r
+        for order_info_col, order_info_func in order_info:
+            wks.write_array_formula(xl_range(r, order_info_col, r, order_info_col),
+                                    order_info_func)
+
+
+def add_sweep_to_workbook(workbook, wrk_formats, cost_sweep, name=COST_SWEEP_NAME):
+    '''Add the worksheet with the costs for many board quantities and its unit cost chart.'''
+
+    logger.log(DEBUG_OVERVIEW, 'Writing the costs of {} board quantities...'.format(len(cost_sweep)))
+    wks = workbook.add_worksheet(name)
+    for col, label in enumerate(COST_SWEEP_COLUMNS):
+        wks.write_string(0, col, label, wrk_formats['header'])
+    wks.set_column(0, len(COST_SWEEP_COLUMNS) - 1, 14)
+    wks.freeze_panes(1, 0)
+    for row, (board_qty, total_cost, unit_cost, missing) in enumerate(cost_sweep, 1):
+        wks.write_number(row, 0, board_qty)
+        wks.write_number(row, 1, total_cost, wrk_formats['currency'])
+        wks.write_number(row, 2, unit_cost, wrk_formats['currency'])
+        wks.write_number(row, 3, missing)
+
+    # Unit cost by the board quantity, in a logarithmic axis.
+    chart = workbook.add_chart({'type': 'scatter', 'subtype': 'straight_with_markers'})
+    chart.add_series({
+        'name': 'Unit Cost',
+        'categories': [name, 1, 0, len(cost_sweep), 0],
+        'values': [name, 1, 2, len(cost_sweep), 2],
+    })
+    chart.set_x_axis({'name': 'Board Qty', 'log_base': 10})
+    chart.set_y_axis({'name': 'Unit Cost', 'num_format': '$#,##0.00'})
+    chart.set_legend({'none': True})
+    wks.insert_chart(1, len(COST_SWEEP_COLUMNS) + 1, chart)
+
+
+def write_cost_sweep_csv(filename, cost_sweep):
+    '''Write the costs for many board quantities, by `optimizer.cost_sweep()`, in a CSV file.'''
+
+    logger.log(DEBUG_OVERVIEW, 'Creating the \'{}\' costs file...'.format(os.path.basename(filename)))
+    with io.open(filename, 'w', encoding='utf-8', newline='') as csv_file:
+        writer = csv.writer(csv_file, lineterminator='\n')
+        writer.writerow(COST_SWEEP_COLUMNS)
+        for board_qty, total_cost, unit_cost, missing in cost_sweep:
+            writer.writerow([board_qty, '{:.4f}'.format(total_cost), '{:.4f}'.format(unit_cost), missing])
+
+
+def conditional_format_rows(wks, rows, col, options):
+    '''Add one conditional format to the cells of the column `col` in `rows`.
+
+    The sorted `rows` are grouped in ranges of consecutive rows, all of them
+    covered by just one rule (the relative cell references of `options` are
+    those of the first row).'''
+
+    ranges = []
+    first_row = last_row = rows[0]
+    for row in rows[1:]:
+        if row != last_row + 1:
+            ranges.append(xl_range(first_row, col, last_row, col))
+            first_row = row
+        last_row = row
+    ranges.append(xl_range(first_row, col, last_row, col))
+    options = dict(options, multi_range=' '.join(ranges))
+    wks.conditional_format(rows[0], col, rows[0], col, options)
+
+
+def add_price_tiers(price_table, dist, part_num, qtys, price_tiers):
+    '''Add the price breaks of one distributor part to the price breaks table.
+
+    The table is a hidden worksheet with one (distributor, cat#, qty, unit price)
+    row for each price break, the breaks of each part are in contiguous rows
+    sorted by quantity, as needed by the spreadsheet LOOKUP function.
+    `price_table` is a `dict()` with the worksheet, `wks`, and its next free
+    `row`. Return the quantity and price ranges of the part in the table.'''
+
+    price_wks = price_table['wks']
+    first_row = price_table['row']
+    for row, q in enumerate(qtys, first_row):
+        price_wks.write_string(row, 0, dist)
+        price_wks.write_string(row, 1, part_num)
+        price_wks.write_number(row, 2, q)
+        price_wks.write_number(row, 3, price_tiers[q])
+    last_row = first_row + len(qtys) - 1
+    price_table['row'] = last_row + 1
+    sheet = "'" + PRICE_TABLE_NAME + "'!"
+    return (sheet + xl_range_abs(first_row, 2, last_row, 2),
+            sheet + xl_range_abs(first_row, 3, last_row, 3))
@@ -27,6 +27,7 @@ requirements = [
     'CurrencyConverter >= 0.5', # Used to convert price to a not avaiable currecy in one distributor.
     'pycountry >= 18.2', # ISO4117, ISO3166 country and currency definitons from Debian’s pkg-isocodes.
 #    'wxPython >= 4.0', # Graphical package/library needed to user guide.
+#    'numpy >= 1.15', # Optional, needed by the purchase optimizer (`--optimize`).
 ]
 
 # KiCost Python packages requirements to debug and tests.
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_eda_tools
+----------------------------------
+
+Tests for `kicost.eda_tools.eda_tools` module.
+"""
+
+import unittest
+from fractions import Fraction
+
+from kicost.eda_tools.eda_tools import manf_code_qtypart, group_parts, partgroup_qty
+from kicost.eda_tools.eda_tools import IdenticalComponents, groups_sort
+from kicost.eda_tools.references import order_refs, split_refs
+
+
+class TestQuantities(unittest.TestCase):
+
+    def test_manf_code_qtypart(self):
+        self.assertEqual(manf_code_qtypart(' 4.5 : ADUM3150BRSZ-RL7'), (Fraction(9, 2), 'ADUM3150BRSZ-RL7'))
+        self.assertEqual(manf_code_qtypart('4/5  : ADUM3150BRSZ-RL7'), (Fraction(4, 5), 'ADUM3150BRSZ-RL7'))
+        self.assertEqual(manf_code_qtypart('ADUM3150BRSZ-RL7 :   7'), (Fraction(7), 'ADUM3150BRSZ-RL7'))
+        self.assertEqual(manf_code_qtypart('ADUM3150BRSZ-RL7:'), (Fraction(1), 'ADUM3150BRSZ-RL7'))
+
+    def test_group_qty_sum(self):
+        components = {
+            'U1': {'value': 'x', 'manf#': 'P1', 'manf#_qty': Fraction(1, 2)},
+            'U2': {'value': 'x', 'manf#': 'P1', 'manf#_qty': Fraction(1, 2)},
+            'U3': {'value': 'x', 'manf#': 'P1', 'manf#_qty': Fraction(4, 5)},
+        }
+        grp, = group_parts(components, [])
+        self.assertEqual(grp.fields['manf#_qty'], Fraction(9, 5))
+        self.assertEqual(partgroup_qty(grp), '=CEILING({}*(9/5),1)')
+
+    def test_group_qty_multifiles(self):
+        components = {
+            'prj0:R1': {'value': '1k', 'manf#': 'P1', 'manf#_qty': [Fraction(1), Fraction(0)]},
+            'prj1:R1': {'value': '1k', 'manf#': 'P1', 'manf#_qty': [Fraction(0), Fraction(1)]},
+            'prj1:R2': {'value': '1k', 'manf#': 'P1', 'manf#_qty': [Fraction(0), Fraction(1)]},
+        }
+        grp, = group_parts(components, [])
+        self.assertEqual(partgroup_qty(grp), ['={}*1', '={}*2'])
+
+    def test_groups_sort(self):
+        components = {
+            'R10': {'value': '1k', 'manf#': 'P1'},
+            'R2': {'value': '2k', 'manf#': 'P2'},
+            'R1': {'value': '3k'},
+            'C1': {'value': '1u', 'manf#': 'P3'},
+            'U1': {'value': 'x', 'manf#': 'P4'},
+            'Z1': {'value': 'z', 'manf#': 'P5'},
+            'A1': {'value': 'a', 'manf#': 'P6'},
+        }
+        groups = group_parts(components, [])
+        self.assertEqual([g.refs[0] for g in groups_sort(groups)],
+                         ['U1', 'C1', 'R2', 'R10', 'R1', 'A1', 'Z1'])
+        self.assertEqual([g.refs[0] for g in groups_sort(groups, 'z,r')],
+                         ['Z1', 'R2', 'R10', 'R1', 'A1', 'C1', 'U1'])
+
+
+class TestReferences(unittest.TestCase):
+
+    def test_order_refs(self):
+        refs = ['R3', 'R1', 'R2', 'C1', 'R5', 'R4#2', 'R10']
+        self.assertEqual(order_refs(refs), ['R1-R3', 'R4#2', 'R5', 'R10', 'C1'])
+        self.assertEqual(order_refs(refs, collapse=False), ['R1', 'R2', 'R3', 'R4#2', 'R5', 'R10', 'C1'])
+
+    def test_order_refs_gap(self):
+        # A subpart must not be taken as the missing number of a range.
+        self.assertEqual(order_refs(['C16', 'C16#3', 'C18', 'C19', 'C20']), ['C16', 'C16#3', 'C18-C20'])
+
+    def test_split_refs(self):
+        self.assertEqual(split_refs('C17/18/19'), ['C17', 'C18', 'C19'])
+        self.assertEqual(split_refs('D33-36'), ['D33', 'D34', 'D35', 'D36'])
+        self.assertEqual(split_refs('R2.1-R2.3, J1'), ['R2.1', 'R2.2', 'R2.3', 'J1'])
+        self.assertEqual(order_refs(split_refs('D33-D36')), ['D33-D36'])
+
+
+class TestPartGroup(unittest.TestCase):
+
+    def test_dist_data(self):
+        part = IdenticalComponents()
+        part.refs = ['R1']
+        self.assertFalse(hasattr(part, '__dict__'))
+        self.assertNotIn('digikey', part.url)
+        part.set_dist_data('mouser', 'M1', 'http://m', {1: 0.1}, 10, {})
+        part.set_dist_data('digikey', 'D1', 'http://d', {1: 0.2}, None, {'desc': 'x'})
+        self.assertEqual(part.part_num['digikey'], 'D1')
+        self.assertEqual(part.price_tiers['mouser'], {1: 0.1})
+        self.assertIsNone(part.qty_avail['digikey'])
+        self.assertEqual(dict(part.url.items()), {'mouser': 'http://m', 'digikey': 'http://d'})
+        part.url['mouser'] = ''
+        self.assertEqual(part.url['mouser'], '')
+        self.assertEqual(part.part_num['mouser'], 'M1')
+        # Other groups don't get data of distributors not stored in them.
+        other = IdenticalComponents()
+        self.assertRaises(KeyError, lambda: other.part_num['mouser'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_exporters
+----------------------------------
+
+Tests for `kicost.exporters` module.
+"""
+
+import os
+import io
+import csv
+import json
+import shutil
+import tempfile
+import unittest
+from fractions import Fraction
+
+from kicost.eda_tools.eda_tools import IdenticalComponents
+from kicost.exporters import export_parts, export_format
+
+
+class TestExporters(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        part = IdenticalComponents()
+        part.refs = ['C1', 'C2', 'C3']
+        part.fields = {'value': '10uF', 'manf#': 'GRM21', 'manf#_qty': Fraction(3, 2)}
+        part.set_dist_data('digikey', 'D1', 'http://d', {0: 0.2, 1: 0.2, 10: 0.15}, 100, {})
+        other = IdenticalComponents()
+        other.refs = ['R1']
+        other.fields = {'value': u'1kΩ'}
+        self.parts = [part, other]
+        self.prj_info = [{'title': 'A', 'company': 'B', 'date': 'C'}]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_format(self):
+        self.assertEqual(export_format('a/b.CSV'), 'csv')
+        self.assertEqual(export_format('b.ndjson'), 'jsonl')
+        self.assertEqual(export_format('b.parquet'), 'parquet')
+        self.assertIsNone(export_format('b.xlsx'))
+
+    def test_jsonl(self):
+        filename = os.path.join(self.tmp_dir, 'parts.jsonl')
+        export_parts('jsonl', filename, self.parts, self.prj_info, [],
+                     purchases=[('digikey', 10, 1.5), None])
+        with io.open(filename, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records[0]['refs'], 'C1-C3')
+        self.assertEqual(records[0]['qty'], 1.5)
+        self.assertEqual(records[0]['dists']['digikey'], {'part_num': 'D1', 'url': 'http://d',
+            'qty_avail': 100, 'purch': 10, 'price_tiers': [[1, 0.2], [10, 0.15]]})
+        self.assertEqual(records[1]['dists'], {})
+
+    def test_csv(self):
+        filename = os.path.join(self.tmp_dir, 'parts.csv')
+        export_parts('csv', filename, self.parts, self.prj_info, [], collapse_refs=False)
+        with io.open(filename, encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([(r['refs'], r['dist'], r['break_qty'], r['unit_price']) for r in rows],
+                         [('C1,C2,C3', 'digikey', '1', '0.2'), ('C1,C2,C3', 'digikey', '10', '0.15'),
+                          ('R1', '', '', '')])
+        self.assertEqual(rows[2]['value'], u'1kΩ')
+
+
+if __name__ == '__main__':
+    unittest.main()
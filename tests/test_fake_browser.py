@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_fake_browser
+----------------------------------
+
+Tests for `kicost.distributors.fake_browser` module.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from kicost.global_vars import logger, PartHtmlError
+from kicost.distributors.distributor import distributor
+from kicost.distributors.url_cache import url_cache
+from kicost.distributors.fake_browser import fake_browser, BREAKER_WINDOW
+from kicost.distributors.session_cache import session_cache
+
+
+class FakeResponse(object):
+    status_code = 200
+    url = 'https://site'
+    text = '<html></html>'
+    headers = {}
+
+    def __init__(self):
+        self.request = self
+
+
+class FakeSession(object):
+    '''Session of a site that is down until `up` is set.'''
+    up = False
+
+    def get(self, url, timeout):
+        if not self.up:
+            raise IOError('Down')
+        return FakeResponse()
+
+
+class dist_browser(distributor):
+    '''Distributor requesting its pages by a `fake_browser`, as the dist modules.'''
+    def __init__(self, browser):
+        super(dist_browser, self).__init__('digikey', None, 1, 0)
+        self.browser = browser
+
+    def dist_get_part_html_tree(self, pn, extra_search_terms='', url=None, descend=2):
+        try:
+            return self.browser.scrape_URL(url or 'https://site/search?' + pn), url
+        except Exception:
+            raise PartHtmlError
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.browser = fake_browser('https://site', logger, 2, 0)
+        self.browser.session = FakeSession()
+
+    def test_trip_and_recover(self):
+        for _ in range(BREAKER_WINDOW):
+            self.assertRaises(ValueError, self.browser.scrape_URL, 'https://site/p')
+        self.assertTrue(self.browser.breaker_open)
+        self.assertEqual(self.browser.breaker_trips, 1)
+
+        # While open the requests fail at once, without retries.
+        self.browser.session.up = True
+        self.assertRaises(ValueError, self.browser.scrape_URL, 'https://site/p')
+        self.assertEqual(self.browser.skipped_requests, 1)
+
+        # Until the probe delay, when a successful request closes it.
+        self.browser.probe_time = 0
+        self.assertEqual(self.browser.scrape_URL('https://site/p'), '<html></html>')
+        self.assertFalse(self.browser.breaker_open)
+        self.assertEqual((self.browser.requests, self.browser.failed_requests), (BREAKER_WINDOW + 2, BREAKER_WINDOW + 1))
+
+    def test_disabled(self):
+        for ratio in (None, 0):
+            self.browser.breaker_ratio = ratio
+            for _ in range(BREAKER_WINDOW * 2):
+                self.assertRaises(ValueError, self.browser.scrape_URL, 'https://site/p')
+            self.assertFalse(self.browser.breaker_open)
+        self.browser.session.up = True
+        for _ in range(BREAKER_WINDOW):
+            self.browser.scrape_URL('https://site/p')
+        self.assertFalse(self.browser.breaker_open)
+
+    def test_live_browser_jobs(self):
+        # A browser kept alive for the next jobs reports the trips of each job.
+        fake_browser.live = {}
+        try:
+            browser = fake_browser.get('https://site', logger, 2, 0, name='site')
+            browser.session = FakeSession()
+            for _ in range(BREAKER_WINDOW):
+                self.assertRaises(ValueError, browser.scrape_URL, 'https://site/p')
+            self.assertEqual(browser.breaker_trips, 1)
+
+            # Still failing when the next job starts.
+            self.assertIs(fake_browser.get('https://site', logger, 2, 0, name='site'), browser)
+            self.assertTrue(browser.breaker_open)
+            self.assertEqual(browser.breaker_trips, 1)
+            browser.session.up = True
+            browser.probe_time = 0
+            browser.scrape_URL('https://site/p')
+            self.assertFalse(browser.breaker_open)
+
+            # The site is up again for the next one.
+            self.assertIs(fake_browser.get('https://site', logger, 2, 0, name='site'), browser)
+            browser.scrape_URL('https://site/p')
+            self.assertEqual((browser.breaker_trips, browser.requests, browser.failed_requests), (0, 1, 0))
+        finally:
+            fake_browser.live = None
+
+    def test_cached_urls_kept(self):
+        # The requests skipped by the open breaker do not drop the cached product URLs.
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            distributor.url_cache = url_cache(os.path.join(tmp_dir, 'urls.json'))
+            distributor.url_cache.set('digikey', 'A1', '', 'https://site/A1')
+            dist = dist_browser(self.browser)
+            for _ in range(BREAKER_WINDOW + 1):
+                self.assertRaises(PartHtmlError, dist.lookup_part_html_tree, 'A1')
+            self.assertTrue(self.browser.breaker_open)
+            self.assertEqual(distributor.url_cache.get('digikey', 'A1'), 'https://site/A1')
+        finally:
+            distributor.url_cache = None
+            shutil.rmtree(tmp_dir)
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Keep the connections alive.
+
+    def do_GET(self):
+        body = b'<html></html>'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), PageHandler)
+        threading.Thread(target=self.server.serve_forever).start()
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_port)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive(self):
+        browser = fake_browser(self.url, logger, 1, 0)
+        browser.start_new_session()
+        browser.scrape_URL(self.url + '/p1')
+        # A new session (as after a 403) keeps the connections.
+        browser.start_new_session(False)
+        browser.scrape_URL(self.url + '/p2')
+        self.assertEqual(browser.session.headers['Connection'], 'keep-alive')
+        self.assertEqual(browser.connection_stats(), (3, 1))
+
+
+class TestSessionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, 'sessions.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        fake_browser.sessions = None
+
+    def test_restore(self):
+        browser = fake_browser('https://site', logger, 1, 0)
+        browser.add_cookie('.site', 'preferences', 'pc=EUR')
+        browser.ret_url = 'https://eu.site/'
+        sessions = session_cache(self.filename, 'EUR')
+        sessions.set('site', {'url': 'https://eu.site'}, browser.get_state())
+        sessions.save()
+
+        fake_browser.sessions = session_cache(self.filename, 'EUR')
+        restored = fake_browser('https://site', logger, 1, 0, name='site')
+        restored.start_new_session() # No request, the session is restored.
+        self.assertEqual(restored.requests, 0)
+        self.assertEqual(restored.restored['site'], {'url': 'https://eu.site'})
+        self.assertEqual(restored.userAgent, browser.userAgent)
+        self.assertEqual(restored.ret_url, 'https://eu.site/')
+        self.assertEqual(restored.session.cookies.get('preferences'), 'pc=EUR')
+
+        # Other locale or expired sessions are not restored.
+        self.assertIsNone(session_cache(self.filename, 'USD').get('site'))
+        self.assertIsNone(session_cache(self.filename, 'EUR', ttl=0).get('site'))
+
+
+if __name__ == '__main__':
+    unittest.main()
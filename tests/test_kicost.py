@@ -8,9 +8,16 @@ test_kicost
 Tests for `kicost` module.
 """
 
+import os
+import copy
+import shutil
+import tempfile
 import unittest
+from fractions import Fraction
 
-from kicost import kicost
+from kicost.kicost import kicost, unique_part_groups, variant_filename, batch_filenames
+from kicost.distributors.global_vars import distributor_dict
+from kicost.eda_tools.eda_tools import IdenticalComponents
 
 
 class TestKicost(unittest.TestCase):
@@ -21,6 +28,44 @@ class TestKicost(unittest.TestCase):
     def test_something(self):
         pass
 
+    def test_unique_part_groups(self):
+        def group(refs, value):
+            part = IdenticalComponents()
+            part.refs = refs
+            part.fields = {'value': value, 'manf#_qty': Fraction(len(refs))}
+            return part
+        v1 = [group(['C1', 'C2'], '1u'), group(['R1'], '1k')]
+        v2 = [group(['C1'], '1u'), group(['J1'], 'JACK')]
+        parts, part_ids = unique_part_groups([v1, v2])
+        self.assertEqual([p.refs for p in parts], [['C1', 'C2'], ['R1'], ['J1']])
+        self.assertEqual(part_ids, [[0, 1], [0, 2]])
+
+    def test_variant_filename(self):
+        self.assertEqual(variant_filename('a/b.xlsx', 'v1', 0), 'a/b.v1.xlsx')
+        self.assertEqual(variant_filename('b.csv', 'v(1|2)', 0), 'b.v_1_2.csv')
+        self.assertEqual(variant_filename('b.csv', ' ', 3), 'b.3.csv')
+
+    def test_batch_filenames(self):
+        self.assertEqual(batch_filenames(['a/b.xml', 'c.csv']), ['a/b.xlsx', 'c.xlsx'])
+        self.assertEqual(batch_filenames(['a/b.xml', 'c/b.xml'], 'out', '.csv'),
+                         ['out/b_0.csv', 'out/b_1.csv'])
+
+    def test_batch(self):
+        tmp_dir = tempfile.mkdtemp()
+        saved_distributor_dict = copy.deepcopy(distributor_dict)
+        try:
+            tests_dir = os.path.dirname(os.path.abspath(__file__))
+            kicost([os.path.join(tests_dir, f) for f in ('TestParts.xml', 'multipart.xml')],
+                   'kicad', tmp_dir, [], [], [], ' ', dist_list=None, out_format='csv',
+                   snapshot=os.path.join(tmp_dir, 'snapshot.jsonl'), batch=True)
+            self.assertEqual(sorted(os.listdir(tmp_dir)),
+                             ['TestParts.csv', 'multipart.csv',
+                              'snapshot.TestParts.jsonl', 'snapshot.multipart.jsonl'])
+        finally:
+            distributor_dict.clear()
+            distributor_dict.update(saved_distributor_dict)
+            shutil.rmtree(tmp_dir)
+
     def tearDown(self):
         pass
 
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_optimizer
+----------------------------------
+
+Tests for `kicost.optimizer` module.
+"""
+
+import unittest
+from fractions import Fraction
+
+from kicost.eda_tools.eda_tools import IdenticalComponents
+from kicost.optimizer import optimize_purchase, purchase_plan, cost_sweep
+
+
+def part_group(refs, qty=None, **dists):
+    part = IdenticalComponents()
+    part.refs = refs
+    part.fields = {} if qty is None else {'manf#_qty': qty}
+    for dist, (price_tiers, qty_avail) in dists.items():
+        part.set_dist_data(dist, dist + refs[0], '', price_tiers, qty_avail, {})
+    return part
+
+
+class TestOptimizer(unittest.TestCase):
+
+    def test_purchase_plan(self):
+        parts = [
+            # Cheaper to buy the 100 break at `dist_b`.
+            part_group(['R1', 'R2'], dist_a=({1: 0.10, 100: 0.05}, 1000),
+                                     dist_b=({1: 0.09, 100: 0.01}, None)),
+            # Not enough available at `dist_b`.
+            part_group(['C1'], Fraction(3, 2), dist_a=({1: 0.20}, 0),
+                                               dist_b=({1: 0.10}, 10)),
+            # Not found at any distributor.
+            part_group(['U1']),
+        ]
+        purchases = purchase_plan(parts, 10, ['dist_a', 'dist_b'])
+        self.assertEqual(purchases[0][:2], ('dist_b', 100))
+        self.assertAlmostEqual(purchases[0][2], 1.0)
+        self.assertEqual(purchases[1][:2], ('dist_a', 15))
+        self.assertAlmostEqual(purchases[1][2], 3.0)
+        self.assertIsNone(purchases[2])
+
+    def test_board_qtys(self):
+        parts = [part_group(['R1'], dist_a=({1: 1.0, 10: 0.5, 100: 0.1}, None))]
+        plan = optimize_purchase(parts, [1, 6, 10, 50, 200], ['dist_a'])
+        self.assertEqual(list(plan['qty'][:, 0]), [1, 10, 10, 100, 200])
+        self.assertEqual(list(plan['total']), [1.0, 5.0, 5.0, 10.0, 20.0])
+        self.assertEqual(list(plan['missing']), [0] * 5)
+
+    def test_cost_sweep(self):
+        parts = [part_group(['R1'], dist_a=({1: 1.0, 10: 0.5}, None)),
+                 part_group(['U1'])]
+        sweep = cost_sweep(parts, [1, 10], ['dist_a'])
+        self.assertEqual(sweep, [(1, 1.0, 1.0, 1), (10, 5.0, 0.5, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_priority
+----------------------------------
+
+Tests for `kicost.priority` module.
+"""
+
+import unittest
+from fractions import Fraction
+
+from kicost.eda_tools.eda_tools import IdenticalComponents
+from kicost.priority import scrape_order, serve_stale_data
+
+
+def group(ref, manf, qty=1, price=None, date='2026-01-01 00:00:00'):
+    part = IdenticalComponents()
+    part.refs = [ref]
+    part.fields = {'manf#': manf, 'manf#_qty': Fraction(qty)}
+    if price is not None:
+        part.set_dist_data('digikey', 'D' + manf, 'http://d/' + manf, {1: price, 10: price / 2}, 5, {})
+        part.scrape_date = date
+    return part
+
+
+class TestPriority(unittest.TestCase):
+
+    def setUp(self):
+        self.parts = [group('R1', 'R10K', 10), group('U1', 'MCU'), group('C1', 'C1U', 4), group('J1', 'JACK')]
+        self.previous = [group('R1', 'R10K', 1, 0.01), group('C2', 'C1U', 1, 0.5), group('U1', 'MCU', 1, 3.0)]
+
+    def test_scrape_order(self):
+        self.assertEqual(scrape_order(self.parts, None), [0, 1, 2, 3])
+        self.assertEqual(scrape_order(self.parts, ['ics']), [1, 3, 0, 2])
+        self.assertEqual(scrape_order(self.parts, ['uncached', 'cost'], self.previous), [3, 1, 2, 0])
+        self.assertRaises(ValueError, scrape_order, self.parts, ['size'])
+
+    def test_serve_stale_data(self):
+        served = serve_stale_data(self.parts, {'digikey': [2, 3]}, self.previous)
+        self.assertEqual(served, {'digikey': 1})
+        self.assertEqual(self.parts[2].part_num['digikey'], 'DC1U')
+        self.assertEqual(self.parts[2].scrape_date, '2026-01-01 00:00:00')
+        self.assertNotIn('digikey', self.parts[3].part_num)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_server
+----------------------------------
+
+Tests for `kicost.server` module, the jobs are costed without scraping.
+"""
+
+import io
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from urllib.request import urlopen, Request
+from urllib.error import HTTPError
+
+from kicost.server import make_server, job_arguments
+from kicost.distributors.fake_browser import fake_browser
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = make_server('127.0.0.1:0', {'dist_list': None, 'url_cache_file': None,
+                                                  'session_cache_file': None})
+        threading.Thread(target=self.server.serve_forever).start()
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        fake_browser.live = None
+
+    def request(self, path, job=None, method=None):
+        data = json.dumps(job).encode('utf-8') if job is not None else None
+        response = urlopen(Request(self.url + path, data=data, method=method))
+        body = response.read()
+        return json.loads(body.decode('utf-8')) if response.headers['Content-Type'] == 'application/json' else body
+
+    def run_job(self, job):
+        job_id = self.request('/jobs', job)['id']
+        for _ in range(100):
+            info = self.request('/jobs/' + job_id)
+            if info['status'] not in ('queued', 'running'):
+                return info
+            time.sleep(0.1)
+        self.fail('The job did not finish.')
+
+    def test_jobs(self):
+        with io.open(os.path.join(tests_dir, 'part_list_small.csv'), encoding='utf-8') as f:
+            bom = {'name': 'small.csv', 'content': f.read()}
+        info = self.run_job({'boms': [bom], 'format': 'jsonl', 'snapshot': True})
+        self.assertEqual(info['status'], 'done')
+        records = [json.loads(l) for l in self.request('/jobs/{}/output'.format(info['id'])).splitlines()]
+        self.assertTrue(records and all('refs' in r for r in records))
+        self.assertTrue(self.request('/jobs/{}/snapshot'.format(info['id'])).startswith(b'{"format"'))
+
+        info = self.run_job({'boms': [bom], 'options': {'board_qty': 10}})
+        self.assertEqual(self.request('/jobs/{}/output'.format(info['id']))[:2], b'PK')
+        self.assertEqual(self.request('/status')['jobs'], 2)
+        self.request('/jobs/' + info['id'], method='DELETE')
+        self.assertEqual(self.request('/status')['jobs'], 1)
+
+    def test_expire_jobs(self):
+        with io.open(os.path.join(tests_dir, 'part_list_small.csv'), encoding='utf-8') as f:
+            bom = {'name': 'small.csv', 'content': f.read()}
+        self.server.max_finished_jobs = 1
+        first = self.run_job({'boms': [bom], 'format': 'csv'})
+        first_dir = self.server.jobs[first['id']].dir
+        self.run_job({'boms': [bom], 'format': 'csv'})
+        for _ in range(100): # Expired once the job is finished.
+            if self.request('/status')['jobs'] == 1:
+                break
+            time.sleep(0.1)
+        self.assertEqual(self.request('/status')['jobs'], 1)
+        self.assertFalse(os.path.exists(first_dir))
+        with self.assertRaises(HTTPError) as e:
+            self.request('/jobs/' + first['id'])
+        self.assertEqual(e.exception.code, 404)
+
+        self.server.job_ttl = 0
+        self.server.expire_jobs()
+        self.assertEqual(self.request('/status')['jobs'], 0)
+
+    def test_same_bom_names(self):
+        job_dir = tempfile.mkdtemp()
+        try:
+            boms = [{'name': 'a/bom.csv', 'content': 'A'}, {'name': 'b/bom.csv', 'content': 'B'}]
+            in_file = job_arguments({'boms': boms}, {}, job_dir)['in_file']
+            self.assertEqual([os.path.basename(f) for f in in_file], ['bom.csv', 'bom_1.csv'])
+            self.assertEqual([io.open(f, encoding='utf-8').read() for f in in_file], ['A', 'B'])
+        finally:
+            shutil.rmtree(job_dir)
+
+    def test_bad_job(self):
+        with self.assertRaises(HTTPError) as e:
+            self.request('/jobs', {'boms': [{'content': ''}], 'options': {'out_filename': '/etc/x'}})
+        self.assertEqual(e.exception.code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
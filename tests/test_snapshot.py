@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_snapshot
+----------------------------------
+
+Tests for `kicost.snapshot` module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from fractions import Fraction
+
+from kicost.distributors.global_vars import distributor_dict
+from kicost.eda_tools.eda_tools import IdenticalComponents
+from kicost.snapshot import write_snapshot, read_snapshot, reuse_scraped_data, Checkpoint
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.saved_dists = distributor_dict.copy()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        distributor_dict.clear()
+        distributor_dict.update(self.saved_dists)
+
+    def test_round_trip(self):
+        part = IdenticalComponents()
+        part.refs = ['C1', 'C2']
+        part.fields = {'value': u'10µF', 'manf#': 'GRM21', 'manf#_qty': [Fraction(3, 2), Fraction(1)]}
+        part.set_dist_data('digikey', 'D1', 'http://d', {1: 0.2, 10: 0.15}, None, {'desc': 'x'})
+        prj_info = [{'title': 'A', 'company': 'B', 'date': 'C'}] * 2
+        filename = os.path.join(self.tmp_dir, 'snapshot.jsonl')
+        write_snapshot(filename, [part], prj_info)
+
+        distributor_dict.clear()
+        parts, prj_info_read = read_snapshot(filename)
+        self.assertEqual(prj_info_read, prj_info)
+        self.assertEqual(sorted(distributor_dict), sorted(self.saved_dists))
+        self.assertEqual(distributor_dict['digikey']['label'], self.saved_dists['digikey']['label'])
+        self.assertEqual(parts[0].refs, part.refs)
+        self.assertEqual(parts[0].fields, part.fields)
+        self.assertEqual(parts[0].price_tiers['digikey'], {1: 0.2, 10: 0.15})
+        self.assertEqual(parts[0].part_num['digikey'], 'D1')
+        self.assertIsNone(parts[0].qty_avail['digikey'])
+        self.assertNotIn('mouser', parts[0].part_num)
+
+    def test_not_snapshot(self):
+        filename = os.path.join(self.tmp_dir, 'other.jsonl')
+        with open(filename, 'w') as f:
+            f.write('{"a": 1}\n')
+        self.assertRaises(ValueError, read_snapshot, filename)
+
+    def test_reuse_scraped_data(self):
+        distributor_dict.clear()
+        distributor_dict.update({'digikey': self.saved_dists['digikey']})
+        previous_parts = []
+        for manf_code, date in (('A', '2000-01-01 00:00:00'), ('B', None), ('C', None)):
+            part = IdenticalComponents()
+            part.fields = {'manf#': manf_code, 'manf#_qty': 1}
+            part.set_dist_data('digikey', 'D' + manf_code, '', {1: 0.1}, 5, {})
+            part.scrape_date = date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            previous_parts.append(part)
+        parts = []
+        for manf_code in ('A', 'B', 'C2'):
+            part = IdenticalComponents()
+            part.refs = ['U1']
+            part.fields = {'manf#': manf_code, 'manf#_qty': 2}
+            parts.append(part)
+        # 'A' is stale, 'B' is the same part group and 'C2' changed its code.
+        self.assertEqual(reuse_scraped_data(parts, previous_parts), [parts[0], parts[2]])
+        self.assertEqual(parts[1].part_num['digikey'], 'DB')
+        self.assertEqual(reuse_scraped_data(parts[:1], previous_parts, ttl=None), [])
+        self.assertEqual(parts[0].part_num['digikey'], 'DA')
+
+    def test_failed_scraped_again(self):
+        distributor_dict.clear()
+        distributor_dict.update({'digikey': self.saved_dists['digikey']})
+        previous_parts = []
+        for manf_code in ('A', 'B'):
+            part = IdenticalComponents()
+            part.refs = ['U1']
+            part.fields = {'manf#': manf_code, 'manf#_qty': 1}
+            part.set_dist_data('digikey', '', '', {}, None, {})
+            previous_parts.append(part)
+        # The look up of 'A' failed, 'B' was not found.
+        previous_parts[0].failed_dists.add('digikey')
+        filename = os.path.join(self.tmp_dir, 'snapshot.jsonl')
+        write_snapshot(filename, previous_parts, [])
+        previous_parts, _ = read_snapshot(filename, set_distributors=False)
+        self.assertEqual(previous_parts[0].failed_dists, {'digikey'})
+        self.assertEqual(previous_parts[1].failed_dists, set())
+
+        parts = []
+        for manf_code in ('A', 'B'):
+            part = IdenticalComponents()
+            part.refs = ['U2']
+            part.fields = {'manf#': manf_code, 'manf#_qty': 2}
+            parts.append(part)
+        self.assertEqual(reuse_scraped_data(parts, previous_parts), [parts[0]])
+
+    def test_checkpoint(self):
+        filename = os.path.join(self.tmp_dir, 'checkpoint.jsonl')
+        part = IdenticalComponents()
+        part.fields = {'manf#': 'A', 'manf#_qty': Fraction(1, 2)}
+        checkpoint = Checkpoint(filename, 'USD')
+        checkpoint.write('digikey', part, ('DA', 'http://d', {1: 0.1, 10: 0.05}, 7, {}))
+        checkpoint.write('mouser', part, ('MA', 'http://m', {}, None, {}))
+        checkpoint.close()
+        with open(filename, 'a') as f:
+            f.write('{"dist": "farnell", "ke') # Killed while writing.
+
+        checkpoint = Checkpoint(filename, 'USD', resume=True)
+        self.assertEqual(checkpoint.get('digikey', part), ['DA', 'http://d', {1: 0.1, 10: 0.05}, 7, {}])
+        self.assertEqual(checkpoint.get('mouser', part)[0], 'MA')
+        self.assertIsNone(checkpoint.get('farnell', part))
+        checkpoint.write('farnell', part, ('FA', 'http://f', {}, 0, {}))
+        checkpoint.close()
+        checkpoint = Checkpoint(filename, 'USD', resume=True)
+        self.assertEqual(checkpoint.get('farnell', part)[0], 'FA')
+        checkpoint.close()
+        # Not resumed in other currency, the file is started again.
+        checkpoint = Checkpoint(filename, 'EUR', resume=True)
+        self.assertIsNone(checkpoint.get('digikey', part))
+        checkpoint.close(remove=True)
+        self.assertFalse(os.path.exists(filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
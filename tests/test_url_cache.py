@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_url_cache
+----------------------------------
+
+Tests for `kicost.distributors.url_cache` module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from kicost.global_vars import PartHtmlError
+from kicost.distributors.distributor import distributor
+from kicost.distributors.url_cache import url_cache, MIN_SEARCH_TRIES
+
+
+class dist_fake(distributor):
+    '''Distributor whose site search goes through a product table, as most of them.'''
+    def __init__(self, pages):
+        super(dist_fake, self).__init__('digikey', None, 1, 0)
+        self.pages = pages
+        self.offline_urls = []
+        self.requests = []
+        self.browser = self
+        self.failed_requests = 0
+
+    def dist_get_part_html_tree(self, pn, extra_search_terms='', url=None, descend=2):
+        if url is None:
+            self.requests.append('search')
+            url = '/product/' + pn
+            if pn == 'offline':
+                self.failed_requests += 1
+                raise PartHtmlError
+        self.requests.append(url)
+        if url in self.offline_urls:
+            self.failed_requests += 1
+            raise PartHtmlError
+        if pn not in self.pages.get(url, ''):
+            raise PartHtmlError
+        return self.pages[url], url
+
+
+class TestUrlCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, 'cache', 'urls.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        distributor.url_cache = None
+
+    def test_persistence(self):
+        cache = url_cache(self.filename)
+        self.assertIsNone(cache.get('digikey', 'A1'))
+        cache.set('digikey', 'A1', 'Murata', '/p/A1')
+        cache.save()
+        cache = url_cache(self.filename)
+        self.assertEqual(cache.get('digikey', 'A1', 'Murata'), '/p/A1')
+        self.assertIsNone(cache.get('digikey', 'A1'))
+        cache.discard('digikey', 'A1', 'Murata')
+        self.assertIsNone(cache.get('digikey', 'A1', 'Murata'))
+
+    def test_lookup(self):
+        dist = dist_fake({'/product/A1': 'page of A1'})
+        distributor.url_cache = url_cache(self.filename)
+        self.assertEqual(dist.lookup_part_html_tree('A1'), ('page of A1', '/product/A1'))
+        self.assertEqual(dist.lookup_part_html_tree('A1'), ('page of A1', '/product/A1'))
+        self.assertEqual(dist.requests, ['search', '/product/A1', '/product/A1'])
+
+        # The cached URL without the part is dropped and the part searched again.
+        distributor.url_cache.set('digikey', 'A1', '', '/old/A1')
+        dist.requests = []
+        dist.lookup_part_html_tree('A1')
+        self.assertEqual(dist.requests, ['/old/A1', 'search', '/product/A1'])
+        self.assertEqual(distributor.url_cache.get('digikey', 'A1'), '/product/A1')
+
+        # A failed request keeps the cached URL, without searching the part.
+        dist.offline_urls = ['/product/A1']
+        dist.requests = []
+        self.assertRaises(PartHtmlError, dist.lookup_part_html_tree, 'A1')
+        self.assertEqual(dist.requests, ['/product/A1'])
+        self.assertEqual(distributor.url_cache.get('digikey', 'A1'), '/product/A1')
+
+    def test_misses(self):
+        dist = dist_fake({})
+        distributor.url_cache = url_cache(self.filename)
+        for _ in range(2):
+            self.assertRaises(PartHtmlError, dist.lookup_part_html_tree, 'B2')
+            self.assertRaises(PartHtmlError, dist.lookup_part_html_tree, 'offline')
+        # The part not found is not searched again, the connection failures are.
+        self.assertEqual(dist.requests, ['search', '/product/B2', 'search', 'search'])
+        distributor.url_cache.save()
+        self.assertTrue(url_cache(self.filename).is_missing('digikey', 'B2'))
+        self.assertFalse(url_cache(self.filename, miss_ttl=0).is_missing('digikey', 'B2'))
+
+    def test_search_plan(self):
+        cache = url_cache(self.filename)
+        self.assertEqual(cache.search_plan('digikey', 'Murata'), ['Murata', ''])
+        self.assertEqual(cache.search_plan('digikey'), [''])
+        cache.count_search('digikey', '', True)
+        self.assertEqual(cache.search_plan('digikey', 'Murata'), ['', 'Murata'])
+        for _ in range(MIN_SEARCH_TRIES):
+            cache.count_search('digikey', 'Murata', False)
+        self.assertEqual(cache.search_plan('digikey', 'TI'), [''])
+        self.assertEqual(cache.search_plan('mouser', 'TI'), ['TI', ''])
+
+
+if __name__ == '__main__':
+    unittest.main()